@@ -1,7 +1,8 @@
 """
 RFQ Management API Endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from typing import List
@@ -9,11 +10,17 @@ from uuid import UUID
 from datetime import datetime
 
 from app.core.database import get_db
-from app.schemas.rfq import RFQCreate, RFQResponse, RFQUpdate
+from app.schemas.rfq import (
+    RFQCreate, RFQResponse, RFQUpdate,
+    RFQBatchMatchRequest, RFQBatchMatchResponse,
+    SpecParseBatchRequest, SpecParseBatchResponse
+)
 from app.models.rfq import RFQ, RFQStatus
 from app.models.company import Company
 from app.ml.spec_parser import SpecParser
 from app.services.matching_service import MatchingService
+from app.services.match_stream import match_events
+from app.services.matching_queue import matching_queue
 from loguru import logger
 
 router = APIRouter()
@@ -23,10 +30,17 @@ spec_parser = SpecParser()
 matching_service = MatchingService()
 
 
+async def enqueue_matching(rfq_id: UUID):
+    """Queue an RFQ for the matching workers; a broker outage does not fail the request"""
+    try:
+        await matching_queue.enqueue(rfq_id)
+    except Exception as e:
+        logger.error(f"❌ Could not queue matching for RFQ {rfq_id}: {e}")
+
+
 @router.post("/", response_model=RFQResponse, status_code=status.HTTP_201_CREATED)
 async def create_rfq(
     rfq_data: RFQCreate,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -37,7 +51,7 @@ async def create_rfq(
     2. Normalize ingredient name using ontology
     3. Extract requirements (assay, grade, certifications, etc.)
     4. Store RFQ in database
-    5. Trigger async matching if auto-publish enabled
+    5. Queue matching for the workers if auto-publish enabled
     """
     
     # Generate RFQ number
@@ -72,18 +86,58 @@ async def create_rfq(
     await db.flush()
     await db.refresh(rfq)
     
-    # Trigger matching in background if published
+    # Queue matching if published (workers read the RFQ once committed)
     if rfq_data.auto_publish:
-        logger.info(f"Triggering async matching for {rfq_number}")
-        background_tasks.add_task(
-            matching_service.find_and_rank_sellers,
-            rfq_id=rfq.id,
-            db=db
-        )
+        await db.commit()
+        logger.info(f"Queueing matching for {rfq_number}")
+        await enqueue_matching(rfq.id)
     
     return rfq
 
 
+@router.post("/parse-batch", response_model=SpecParseBatchResponse)
+async def parse_spec_batch(request: SpecParseBatchRequest):
+    """
+    Parse many specifications in one call (e.g. a spreadsheet of RFQ lines)
+    
+    Duplicate specifications are parsed once and ingredients are resolved
+    against the ontology in one batched query; results are returned in
+    request order.
+    """
+    results = await spec_parser.parse_many(request.specifications)
+    
+    return SpecParseBatchResponse(total_specs=len(results), results=results)
+
+
+@router.post("/match-batch", response_model=RFQBatchMatchResponse, status_code=status.HTTP_202_ACCEPTED)
+async def match_rfq_batch(request: RFQBatchMatchRequest):
+    """
+    Queue matching for many RFQs in one job (e.g. a whole formulation bill of materials)
+    
+    The job runs on a matching worker, where RFQs sharing an ingredient
+    reuse one candidate SKU and seller load and all matches are written
+    in one transaction. RFQs that already have a pending job are left to
+    it. Results are read from /{rfq_id}/matches or its stream.
+    """
+    rfq_ids = list(dict.fromkeys(request.rfq_ids))
+    try:
+        task_id, queued = await matching_queue.enqueue_batch(rfq_ids)
+    except Exception as e:
+        logger.error(f"❌ Could not queue batch matching for {len(rfq_ids)} RFQs: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Matching queue unavailable"
+        )
+    
+    queued_ids = set(queued)
+    return RFQBatchMatchResponse(
+        task_id=task_id,
+        total_rfqs=len(rfq_ids),
+        queued_rfq_ids=queued,
+        already_queued_rfq_ids=[rfq_id for rfq_id in rfq_ids if rfq_id not in queued_ids]
+    )
+
+
 @router.get("/{rfq_id}", response_model=RFQResponse)
 async def get_rfq(
     rfq_id: UUID,
@@ -107,7 +161,6 @@ async def get_rfq(
 @router.post("/{rfq_id}/publish")
 async def publish_rfq(
     rfq_id: UUID,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -131,15 +184,11 @@ async def publish_rfq(
     rfq.status = RFQStatus.PUBLISHED
     rfq.published_at = datetime.utcnow()
     
-    await db.flush()
+    await db.commit()
     
-    # Trigger matching
-    logger.info(f"Publishing RFQ {rfq.rfq_number}, triggering matching")
-    background_tasks.add_task(
-        matching_service.find_and_rank_sellers,
-        rfq_id=rfq.id,
-        db=db
-    )
+    # Queue matching
+    logger.info(f"Publishing RFQ {rfq.rfq_number}, queueing matching")
+    await enqueue_matching(rfq.id)
     
     return {"message": "RFQ published, matching initiated", "rfq_id": str(rfq.id)}
 
@@ -154,36 +203,35 @@ async def get_rfq_matches(
     """
     Get seller matches for an RFQ with explanations
     """
-    from app.models.rfq import RFQMatch
-    
-    result = await db.execute(
-        select(RFQMatch)
-        .where(RFQMatch.rfq_id == rfq_id)
-        .where(RFQMatch.match_score >= min_score)
-        .order_by(RFQMatch.rank)
-        .limit(limit)
-    )
-    
-    matches = result.scalars().all()
+    matches = await matching_service.get_ranked_matches(rfq_id, min_score, limit, db)
     
     return {
         "rfq_id": str(rfq_id),
         "total_matches": len(matches),
-        "matches": [
-            {
-                "seller_id": str(m.seller_company_id),
-                "sku_id": str(m.sku_id) if m.sku_id else None,
-                "match_score": float(m.match_score),
-                "rank": m.rank,
-                "explanation": m.explanation,
-                "recommended_price_usd": float(m.recommended_price_usd) if m.recommended_price_usd else None,
-                "auto_bid_eligible": m.auto_bid_eligible
-            }
-            for m in matches
-        ]
+        "matches": matches
     }
 
 
+@router.get("/{rfq_id}/matches/stream")
+async def stream_rfq_matches(
+    rfq_id: UUID,
+    request: Request
+):
+    """
+    Stream seller matches as they are ranked (Server-Sent Events)
+    
+    **Events:**
+    - `partial`: running top matches, sent as scoring shards finish
+    - `complete`: final ranks (sent at once if matching already finished)
+    - `timeout`: no result within the stream timeout
+    """
+    return StreamingResponse(
+        match_events(rfq_id, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/", response_model=List[RFQResponse])
 async def list_rfqs(
     company_id: UUID = None,
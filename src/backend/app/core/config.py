@@ -58,16 +58,75 @@ class Settings(BaseSettings):
     # Model paths
     NLP_MODEL_PATH: str = "models/spec_parser"
     MATCHER_MODEL_PATH: str = "models/seller_matcher"
+    MATCHER_RANKER: str = "weighted"  # weighted, xgboost or lightgbm
     FRAUD_MODEL_PATH: str = "models/fraud_detector"
     
     # Matching thresholds
     MIN_MATCH_SCORE: float = 0.6
+    MATCH_TOP_K: int = 0  # Keep only the best K matches per RFQ (0 = keep all)
+    # Skip candidates whose assay and certification shortfalls alone keep them below
+    # MIN_MATCH_SCORE (every other term at its maximum), so matches are unchanged
+    MATCH_SPEC_PREFILTER: bool = True
     MAX_AUTO_BID_MARGIN: float = 0.15
     
+    # Ontology retrieval
+    MATCH_BY_ONTOLOGY: bool = True  # Select candidates by skus.ontology_node_id when the RFQ resolved to a node
+    MATCH_SUBSTITUTES: bool = False  # Also retrieve CAN_SUBSTITUTE targets
+    SUBSTITUTE_MIN_SIMILARITY: float = 0.8
+    SUBSTITUTE_SCORE_FACTOR: float = 0.9  # Substitute score = score x similarity x factor
+    SUBSTITUTE_CACHE_SECONDS: int = 3600
+    
+    # Matching executor
+    MATCHING_WORKERS: int = 4
+    MATCHING_PARALLEL_MIN_CANDIDATES: int = 50000
+    
+    # Matching job queue (Celery workers, Redis broker)
+    MATCHING_QUEUE: str = "matching"
+    # Job threads per worker container. They share one catalog index and seller
+    # feature store; large batches are scored in MATCHING_WORKERS processes
+    MATCHING_QUEUE_CONCURRENCY: int = 4
+    MATCHING_JOB_MAX_RETRIES: int = 5
+    MATCHING_JOB_RETRY_BACKOFF_MAX: int = 300  # Exponential backoff cap (seconds)
+    MATCHING_JOB_TIME_LIMIT: int = 600  # Jobs are cancelled on the worker loop after this (seconds)
+    MATCHING_JOB_DEDUP_SECONDS: int = 900  # A queued RFQ is not enqueued again within this window
+    
+    # Match streaming (Server-Sent Events)
+    MATCH_STREAM_PARTIAL_LIMIT: int = 20  # Matches per partial event
+    MATCH_STREAM_HEARTBEAT_SECONDS: int = 15
+    MATCH_STREAM_TIMEOUT_SECONDS: int = 300
+    
+    # Catalog index
+    CATALOG_INDEX_REFRESH_SECONDS: int = 30
+    CATALOG_INDEX_FULL_RELOAD_SECONDS: int = 3600
+    
+    # Seller feature store
+    SELLER_FEATURES_REFRESH_SECONDS: int = 60
+    SELLER_FEATURES_REBUILD_HOUR: int = 3  # Nightly bulk rebuild (UTC hour)
+    SELLER_FEATURES_CACHE_SECONDS: int = 172800  # Redis TTL, outlives one missed rebuild
+    
+    # Match cache (ranked matches reused across RFQs with the same specs)
+    MATCH_CACHE_ENABLED: bool = True
+    MATCH_CACHE_SECONDS: int = 21600
+    MATCH_CACHE_PRICE_BUCKET_USD: float = 0.01  # Target price bucket width; one cent is exact
+    
+    # Ontology synonym matcher (ingredient detection without Neo4j round trips)
+    ONTOLOGY_REFRESH_SECONDS: int = 60  # Version poll interval
+    ONTOLOGY_MIN_SYNONYM_CONFIDENCE: float = 0.7
+    ONTOLOGY_LOOKUP_WORKERS: int = 8  # Threads for Neo4j lookups made while parsing
+    ONTOLOGY_LOOKUP_TIMEOUT_SECONDS: float = 2.0  # Then the spec is parsed without the ontology
+    ONTOLOGY_BATCH_LOOKUP_TIMEOUT_SECONDS: float = 10.0
+    
+    # Spec parse cache (per-process LRU in front of Redis)
+    PARSE_CACHE_ENABLED: bool = True
+    PARSE_CACHE_LOCAL_SIZE: int = 10000
+    PARSE_CACHE_LOCAL_SECONDS: int = 600
+    PARSE_CACHE_SECONDS: int = 86400
+    
     # Feature flags
     ENABLE_AUTO_BIDDING: bool = True
     ENABLE_FRAUD_DETECTION: bool = True
     ENABLE_REAL_TIME_MATCHING: bool = True
+    ENABLE_CATALOG_INDEX: bool = True
     
     # Logging
     LOG_LEVEL: str = "INFO"
@@ -165,6 +165,8 @@ class Neo4jClient:
         RETURN i
         """
         results = self.execute_query(query, ingredient_data)
+        if results:
+            self.bump_ontology_version()
         return results[0]["i"] if results else None
     
     def add_synonym(
@@ -192,8 +194,136 @@ class Neo4jClient:
             "normalized": normalized,
             "confidence": confidence
         })
+        if results:
+            self.bump_ontology_version()
         return len(results) > 0
     
+    def get_ontology_version(self) -> int:
+        """Current ontology version (0 if it was never bumped)"""
+        query = """
+        MATCH (o:Ontology)
+        RETURN o.version as version
+        """
+        results = self.execute_query(query)
+        return results[0]["version"] if results else 0
+    
+    def bump_ontology_version(self) -> int:
+        """Mark the ontology as changed, so in-memory copies reload"""
+        query = """
+        MERGE (o:Ontology)
+        SET o.version = coalesce(o.version, 0) + 1
+        RETURN o.version as version
+        """
+        return self.execute_query(query)[0]["version"]
+    
+    def get_all_ingredients(self) -> List[Dict]:
+        """All ingredient nodes"""
+        query = """
+        MATCH (i:Ingredient)
+        RETURN i
+        """
+        return [record["i"] for record in self.execute_query(query)]
+    
+    def get_synonym_mappings(self, min_confidence: float = 0.7) -> List[Dict]:
+        """Every synonym with the ingredient it refers to"""
+        query = """
+        MATCH (i:Ingredient)-[:HAS_SYNONYM]->(s:Synonym)
+        WHERE s.confidence >= $min_confidence
+        RETURN i, s.normalized as normalized, s.text as matched_synonym, s.confidence as confidence
+        """
+        return self.execute_query(query, {"min_confidence": min_confidence})
+    
+    def normalize_ingredient_names(
+        self,
+        raw_texts: List[str],
+        min_confidence: float = 0.7
+    ) -> Dict[str, Optional[Dict]]:
+        """
+        Batched normalize_ingredient_name: every text in one UNWIND query
+        
+        Same precedence per text (exact name, then best synonym); texts
+        neither resolves go through one batched fuzzy query.
+        """
+        if not raw_texts:
+            return {}
+        
+        query = """
+        UNWIND $texts AS text
+        OPTIONAL MATCH (exact:Ingredient {name: text})
+        WITH text, head(collect(exact)) AS exact
+        CALL {
+            WITH text
+            OPTIONAL MATCH (s:Synonym)-[:REFERS_TO]->(i:Ingredient)
+            WHERE toLower(s.normalized) CONTAINS toLower(text)
+              AND s.confidence >= $min_confidence
+            RETURN i, s
+            ORDER BY s.confidence DESC
+            LIMIT 1
+        }
+        RETURN text, exact, i, s.confidence as match_confidence, s.text as matched_synonym
+        """
+        results: Dict[str, Optional[Dict]] = {text: None for text in raw_texts}
+        for record in self.execute_query(query, {"texts": list(results), "min_confidence": min_confidence}):
+            if record["exact"]:
+                results[record["text"]] = {
+                    "ingredient": record["exact"],
+                    "confidence": 1.0,
+                    "match_type": "exact"
+                }
+            elif record["i"]:
+                results[record["text"]] = {
+                    "ingredient": record["i"],
+                    "confidence": record["match_confidence"],
+                    "match_type": "synonym",
+                    "matched_text": record["matched_synonym"]
+                }
+        
+        unresolved = [text for text, result in results.items() if result is None]
+        if unresolved:
+            results.update(self.fuzzy_search_ingredients(unresolved))
+        return results
+    
+    def fuzzy_search_ingredients(
+        self,
+        search_terms: List[str],
+        max_distance: int = 3
+    ) -> Dict[str, Dict]:
+        """Batched fuzzy search: closest synonym per term (terms with none are absent)"""
+        # Note: Requires APOC plugin
+        query = """
+        UNWIND $search_terms AS term
+        CALL {
+            WITH term
+            MATCH (s:Synonym)
+            WITH s, apoc.text.levenshteinDistance(toLower(s.normalized), toLower(term)) as distance
+            WHERE distance <= $max_distance
+            MATCH (s)-[:REFERS_TO]->(i:Ingredient)
+            RETURN i, s.text as matched_text, distance
+            ORDER BY distance, s.confidence DESC
+            LIMIT 1
+        }
+        RETURN term, i, matched_text, distance
+        """
+        try:
+            records = self.execute_query(query, {
+                "search_terms": search_terms,
+                "max_distance": max_distance
+            })
+        except Exception as e:
+            # The contains search already ran for these terms
+            logger.warning(f"Batched fuzzy search failed (APOC may not be installed): {e}")
+            return {}
+        
+        return {
+            record["term"]: {
+                "ingredient": record["i"],
+                "confidence": max(0.5, 1.0 - (record["distance"] / 10)),
+                "match_type": "fuzzy",
+                "matched_text": record["matched_text"]
+            }
+            for record in records
+        }
+    
     def normalize_ingredient_name(
         self,
         raw_text: str
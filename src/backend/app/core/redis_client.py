@@ -3,11 +3,21 @@ Redis client for caching and real-time operations
 """
 import redis.asyncio as redis
 from app.core.config import settings
-from typing import Optional, Any
+from typing import Optional, Any, AsyncIterator, Dict, List
+from contextlib import asynccontextmanager
 import json
 from loguru import logger
 
 
+# GET and DEL in one atomic script, so the key cannot change hands in between
+_DELETE_IF_EQUAL = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
 class RedisClient:
     """Redis client wrapper with helper methods"""
     
@@ -64,12 +74,24 @@ class RedisClient:
         
         return await self.redis.set(key, value, ex=expire)
     
+    async def set_if_absent(self, key: str, value: Any, expire: Optional[int] = None) -> bool:
+        """Set value only if the key does not exist (SET NX); True if set"""
+        if not self.redis:
+            await self.connect()
+        return bool(await self.redis.set(key, value, ex=expire, nx=True))
+    
     async def delete(self, *keys: str) -> int:
         """Delete keys from cache"""
         if not self.redis:
             await self.connect()
         return await self.redis.delete(*keys)
     
+    async def delete_if_equal(self, key: str, value: Any) -> bool:
+        """Delete a key only if it still holds value (lock release); True if deleted"""
+        if not self.redis:
+            await self.connect()
+        return bool(await self.redis.eval(_DELETE_IF_EQUAL, 1, key, value))
+    
     async def exists(self, key: str) -> bool:
         """Check if key exists"""
         if not self.redis:
@@ -100,6 +122,12 @@ class RedisClient:
             await self.connect()
         return await self.redis.smembers(key)
     
+    async def list_length(self, key: str) -> int:
+        """Length of a list (0 if missing)"""
+        if not self.redis:
+            await self.connect()
+        return await self.redis.llen(key)
+    
     async def publish(self, channel: str, message: Any) -> int:
         """Publish message to channel"""
         if not self.redis:
@@ -110,6 +138,20 @@ class RedisClient:
         
         return await self.redis.publish(channel, message)
     
+    @asynccontextmanager
+    async def subscribe(self, *channels: str) -> AsyncIterator[redis.client.PubSub]:
+        """Pub/sub connection subscribed to channels, closed on exit"""
+        if not self.redis:
+            await self.connect()
+        
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(*channels)
+        try:
+            yield pubsub
+        finally:
+            await pubsub.unsubscribe(*channels)
+            await pubsub.aclose()
+    
     async def cache_rfq_matches(
         self, 
         rfq_id: str, 
@@ -125,6 +167,70 @@ class RedisClient:
         key = f"rfq:matches:{rfq_id}"
         return await self.get(key)
     
+    async def clear_rfq_matches(self, *rfq_ids: str):
+        """Drop cached RFQ matches (a new matching run is queued)"""
+        await self.delete(*(f"rfq:matches:{rfq_id}" for rfq_id in rfq_ids))
+    
+    async def publish_match_event(self, rfq_id: str, event: dict) -> int:
+        """Publish a matching progress event on the RFQ's channel"""
+        return await self.publish(f"rfq:matches:events:{rfq_id}", event)
+    
+    def subscribe_match_events(self, rfq_id: str):
+        """Subscription to an RFQ's matching progress events"""
+        return self.subscribe(f"rfq:matches:events:{rfq_id}")
+    
+    async def get_match_cache(self, fingerprint: str) -> Optional[dict]:
+        """Get ranked matches cached for a spec fingerprint"""
+        return await self.get(f"match:cache:{fingerprint}")
+    
+    async def cache_match_result(self, fingerprint: str, entry: dict, expire: int = 21600):
+        """Cache ranked matches for a spec fingerprint"""
+        await self.set(f"match:cache:{fingerprint}", entry, expire=expire)
+    
+    async def get_parsed_spec(self, key: str) -> Optional[dict]:
+        """Get a cached spec parse"""
+        return await self.get(f"spec:parse:{key}")
+    
+    async def cache_parsed_spec(self, key: str, parsed: dict, expire: int = 86400):
+        """Cache a spec parse"""
+        await self.set(f"spec:parse:{key}", parsed, expire=expire)
+    
+    async def get_parsed_specs(self, keys: List[str]) -> Dict[str, dict]:
+        """Get many cached spec parses in one round trip (misses are absent)"""
+        if not self.redis:
+            await self.connect()
+        
+        values = await self.redis.mget([f"spec:parse:{key}" for key in keys])
+        return {key: json.loads(value) for key, value in zip(keys, values) if value}
+    
+    async def cache_parsed_specs(self, entries: Dict[str, dict], expire: int = 86400):
+        """Cache many spec parses in one round trip"""
+        if not self.redis:
+            await self.connect()
+        
+        pipe = self.redis.pipeline(transaction=False)
+        for key, parsed in entries.items():
+            pipe.set(f"spec:parse:{key}", json.dumps(parsed), ex=expire)
+        await pipe.execute()
+    
+    async def get_catalog_versions(self, keys: List[str]) -> Dict[str, int]:
+        """Catalog version counters (0 if never bumped)"""
+        if not self.redis:
+            await self.connect()
+        
+        values = await self.redis.mget([f"catalog:version:{key}" for key in keys])
+        return {key: int(value or 0) for key, value in zip(keys, values)}
+    
+    async def bump_catalog_versions(self, keys: List[str]):
+        """Increment catalog version counters in one round trip"""
+        if not self.redis:
+            await self.connect()
+        
+        pipe = self.redis.pipeline(transaction=False)
+        for key in keys:
+            pipe.incr(f"catalog:version:{key}")
+        await pipe.execute()
+    
     async def cache_seller_score(
         self,
         seller_id: str,
@@ -139,6 +245,32 @@ class RedisClient:
         """Get cached seller score"""
         key = f"seller:score:{seller_id}"
         return await self.get(key)
+    
+    async def cache_seller_scores(
+        self,
+        scores: Dict[str, dict],
+        expire: int = 86400
+    ):
+        """Cache many seller scores in one round trip"""
+        if not self.redis:
+            await self.connect()
+        
+        pipe = self.redis.pipeline(transaction=False)
+        for seller_id, score_data in scores.items():
+            pipe.set(f"seller:score:{seller_id}", json.dumps(score_data), ex=expire)
+        await pipe.execute()
+    
+    async def get_seller_scores(self, seller_ids: List[str]) -> Dict[str, dict]:
+        """Get many cached seller scores in one round trip (misses are absent)"""
+        if not self.redis:
+            await self.connect()
+        
+        values = await self.redis.mget([f"seller:score:{seller_id}" for seller_id in seller_ids])
+        return {
+            seller_id: json.loads(value)
+            for seller_id, value in zip(seller_ids, values)
+            if value
+        }
 
 
 # Global Redis client instance
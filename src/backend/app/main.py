@@ -11,10 +11,18 @@ from loguru import logger
 import time
 
 from app.core.config import settings
-from app.core.database import engine, Base
+from app.core.database import engine, Base, AsyncSessionLocal
 from app.api.v1 import api_router
 from app.core.redis_client import redis_client
 from app.core.neo4j_client import neo4j_driver
+from app.ml.ontology_lookup import ontology_lookup
+from app.ml.parse_cache import parse_cache
+from app.ml.synonym_matcher import synonym_matcher
+from app.services.catalog_index import catalog_index
+from app.services.matching_executor import matching_executor
+from app.services.match_cache import match_cache
+from app.services.matching_queue import matching_queue
+from app.services.seller_feature_store import seller_feature_store
 
 
 @asynccontextmanager
@@ -44,12 +52,47 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"❌ Neo4j connection failed: {e}")
     
+    # Load ontology synonyms for local ingredient detection
+    logger.info("🔤 Loading ontology synonym matcher...")
+    try:
+        await synonym_matcher.start()
+    except Exception as e:
+        logger.error(f"❌ Synonym matcher load failed, ingredients will be resolved through Neo4j: {e}")
+    
+    # Precompute seller features
+    logger.info("🧮 Building seller feature store...")
+    try:
+        await seller_feature_store.start(AsyncSessionLocal)
+    except Exception as e:
+        logger.error(f"❌ Seller feature store build failed, sellers will be loaded on demand: {e}")
+    
+    # Load SKU catalog index
+    if settings.ENABLE_CATALOG_INDEX:
+        logger.info("📚 Loading SKU catalog index...")
+        try:
+            await catalog_index.start(AsyncSessionLocal)
+        except Exception as e:
+            logger.error(f"❌ Catalog index load failed, matching will query PostgreSQL: {e}")
+        
+        # Invalidate cached rankings as SKUs and sellers change
+        if settings.MATCH_CACHE_ENABLED and catalog_index.loaded:
+            catalog_index.add_listener(match_cache.on_catalog_refresh)
+            seller_feature_store.add_listener(match_cache.on_sellers_changed)
+        
+        # Open RFQs are re-matched as SKUs and sellers change by the
+        # rematch_changes job in the matching workers, not here
+    
     logger.info("✨ NutraSense AI started successfully!")
     
     yield
     
     # Shutdown
     logger.info("🛑 Shutting down NutraSense AI...")
+    await catalog_index.stop()
+    await seller_feature_store.stop()
+    await synonym_matcher.stop()
+    matching_executor.shutdown()
+    ontology_lookup.shutdown()
     await redis_client.close()
     neo4j_driver.close()
     await engine.dispose()
@@ -129,11 +172,21 @@ app.include_router(
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
+    try:
+        queue_metrics = await matching_queue.metrics()
+    except Exception as e:
+        queue_metrics = {"error": str(e)}
+    
     return {
         "status": "healthy",
         "service": settings.APP_NAME,
         "version": settings.API_VERSION,
-        "environment": settings.ENV
+        "environment": settings.ENV,
+        "catalog_index": catalog_index.metrics(),
+        "synonym_matcher": synonym_matcher.metrics(),
+        "parse_cache": parse_cache.metrics(),
+        "ontology_lookup": ontology_lookup.metrics(),
+        "matching_queue": queue_metrics
     }
 
 
@@ -0,0 +1,443 @@
+"""
+Batch Scoring Engine
+Columnar (NumPy) scoring of candidate SKUs against an RFQ
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+from decimal import Decimal
+import heapq
+import numpy as np
+
+from app.core.config import settings
+from app.ml.ranker import FEATURE_WEIGHTS, get_ranker
+from app.ml.seller_features import SellerFeatures, cert_vocabulary, mask_words, popcount64
+
+
+# Grades that earn partial credit when the requested grade is not met
+PREMIUM_GRADES = ["USP", "Pharmaceutical Grade"]
+
+AUTO_BID_MIN_SCORE = 0.85
+
+# Decimal places of rfq_matches.match_score (NUMERIC(5,4))
+SCORE_PLACES = 4
+
+
+def score_to_decimal(match_score: float) -> Decimal:
+    """
+    Persisted form of a float match score, rounded to the column scale
+
+    Feature math runs on floats; this is the only place a score becomes
+    a Decimal. Differs from exact Decimal arithmetic by at most half a
+    unit in the last place (0.00005) plus float rounding.
+    """
+    return Decimal(round(match_score * 10 ** SCORE_PLACES)).scaleb(-SCORE_PLACES)
+
+
+def recommended_price(base_price_cents: int, match_score: float) -> Decimal:
+    """
+    Base price plus the match-strength markup (5/10/15%)
+
+    Computed in scaled integers (cents x percent), so the result is
+    exactly the Decimal the per-row pricing produces.
+    """
+    if match_score >= 0.9:
+        markup_pct = 105
+    elif match_score >= 0.8:
+        markup_pct = 110
+    else:
+        markup_pct = 115
+    return Decimal(base_price_cents * markup_pct).scaleb(-4)
+
+
+class CandidateBatch:
+    """
+    Columnar snapshot of candidate SKUs and their sellers
+
+    Every attribute the scorer needs is converted once, at load time,
+    into a NumPy column so that a whole candidate set can be scored
+    without touching ORM objects or Decimal arithmetic.
+    """
+
+    def __init__(
+        self,
+        skus: List,
+        sku_ids: np.ndarray,
+        company_ids: np.ndarray,
+        grade: np.ndarray,
+        form: np.ndarray,
+        assay_min: np.ndarray,
+        base_price: np.ndarray,
+        base_price_cents: np.ndarray,
+        lead_time_days: np.ndarray,
+        has_seller: np.ndarray,
+        rating: np.ndarray,
+        on_time_rate: np.ndarray,
+        cert_masks: np.ndarray,
+        cert_bits: Dict[str, int],
+        score_factor: np.ndarray,
+    ):
+        self.skus = skus
+        self.sku_ids = sku_ids
+        self.company_ids = company_ids
+        self.grade = grade
+        self.form = form
+        self.assay_min = assay_min
+        self.base_price = base_price
+        self.base_price_cents = base_price_cents
+        self.lead_time_days = lead_time_days
+        self.has_seller = has_seller
+        self.rating = rating
+        self.on_time_rate = on_time_rate
+        self.cert_masks = cert_masks
+        self.cert_bits = cert_bits
+        self.score_factor = score_factor
+
+    @classmethod
+    def from_skus(
+        cls,
+        skus: Sequence,
+        sellers: Dict,
+        score_factors: Optional[Dict[str, float]] = None
+    ) -> "CandidateBatch":
+        """
+        Build a batch from SKU rows and an id-keyed map of sellers
+        (SellerFeatures, or Company rows converted once per seller)
+
+        Falsy numerics (None or 0) are stored the way the per-row helpers
+        treat them: missing assay becomes NaN, missing lead time and
+        on-time rate become 0. Base price is also kept in integer cents
+        for exact recommended-price arithmetic. SKU and seller
+        certifications are OR-ed into one interned bitmask per candidate,
+        stored as uint64 words with the name -> bit table they were
+        built with.
+
+        score_factors maps ontology node ids to a multiplier applied to
+        the match score (substitute discount); other SKUs score in full.
+        """
+        skus = list(skus)
+        features = {}
+        for sku in skus:
+            if sku.company_id not in features:
+                features[sku.company_id] = SellerFeatures.of(sellers.get(sku.company_id))
+        seller_rows = [features[sku.company_id] for sku in skus]
+
+        def _float_or_nan(value) -> float:
+            return float(value) if value else np.nan
+
+        return cls(
+            skus=skus,
+            sku_ids=np.array([sku.id for sku in skus], dtype=object),
+            company_ids=np.array([sku.company_id for sku in skus], dtype=object),
+            grade=np.array([sku.grade for sku in skus], dtype=object),
+            form=np.array([(sku.form or "").lower() for sku in skus], dtype=object),
+            assay_min=np.array([_float_or_nan(sku.assay_min) for sku in skus], dtype=np.float64),
+            base_price=np.array(
+                [np.nan if sku.base_price_usd is None else float(sku.base_price_usd) for sku in skus],
+                dtype=np.float64
+            ),
+            base_price_cents=np.array(
+                [int(sku.base_price_usd * 100) if sku.base_price_usd else 0 for sku in skus],
+                dtype=np.int64
+            ),
+            lead_time_days=np.array([sku.lead_time_days or 0 for sku in skus], dtype=np.int64),
+            has_seller=np.array([seller is not None for seller in seller_rows], dtype=bool),
+            rating=np.array(
+                [seller.rating if seller else 0.0 for seller in seller_rows],
+                dtype=np.float64
+            ),
+            on_time_rate=np.array(
+                [seller.on_time_rate if seller else 0.0 for seller in seller_rows],
+                dtype=np.float64
+            ),
+            cert_masks=mask_words(
+                [
+                    cert_vocabulary.mask(sku.certifications) | (seller.cert_mask if seller else 0)
+                    for sku, seller in zip(skus, seller_rows)
+                ],
+                cert_vocabulary.n_words
+            ),
+            cert_bits=cert_vocabulary.bits(),
+            score_factor=np.array(
+                [score_factors.get(sku.ontology_node_id, 1.0) for sku in skus]
+                if score_factors else np.ones(len(skus)),
+                dtype=np.float64
+            ),
+        )
+
+    def __len__(self) -> int:
+        return len(self.base_price)
+
+    def __getstate__(self) -> Dict:
+        """
+        Compact pickled form for worker processes
+
+        Only the numeric and string columns travel; ORM rows and ids stay
+        in the parent, which maps ranked positions back to SKUs.
+        """
+        state = dict(self.__dict__)
+        state["skus"] = state["sku_ids"] = state["company_ids"] = None
+        return state
+
+    def take(self, indices: np.ndarray) -> "CandidateBatch":
+        """Sub-batch holding the given candidate positions"""
+        return CandidateBatch(
+            skus=[self.skus[i] for i in indices] if self.skus is not None else None,
+            sku_ids=self.sku_ids[indices] if self.sku_ids is not None else None,
+            company_ids=self.company_ids[indices] if self.company_ids is not None else None,
+            grade=self.grade[indices],
+            form=self.form[indices],
+            assay_min=self.assay_min[indices],
+            base_price=self.base_price[indices],
+            base_price_cents=self.base_price_cents[indices],
+            lead_time_days=self.lead_time_days[indices],
+            has_seller=self.has_seller[indices],
+            rating=self.rating[indices],
+            on_time_rate=self.on_time_rate[indices],
+            cert_masks=self.cert_masks[indices],
+            cert_bits=self.cert_bits,
+            score_factor=self.score_factor[indices],
+        )
+
+
+class BatchScorer:
+    """
+    Vectorized equivalent of the per-SKU reference scorer (tests/reference_scorer.py)
+
+    Produces the five feature scores, the weighted match score, the
+    threshold mask and auto-bid eligibility for a whole CandidateBatch
+    in one pass.
+    """
+
+    def score(self, rfq, parsed_specs: Dict, batch: CandidateBatch) -> Dict[str, np.ndarray]:
+        """Score every candidate in the batch against an RFQ"""
+        spec_score = self._spec_match(parsed_specs, batch)
+        price_score = self._price_competitiveness(rfq.target_price_usd, batch)
+        cert_score = self._certification_match(parsed_specs, batch)
+        delivery_score = self._delivery_score(batch)
+        quality_score = np.where(batch.has_seller, batch.rating / 5.0, 0.5)
+
+        # One predict call over the whole feature matrix
+        match_score = get_ranker().predict(np.column_stack((
+            spec_score, price_score, cert_score, delivery_score, quality_score
+        ))) * batch.score_factor
+
+        return {
+            "spec_match": spec_score,
+            "price_competitiveness": price_score,
+            "compliance_score": cert_score,
+            "delivery_score": delivery_score,
+            "quality_history": quality_score,
+            "match_score": match_score,
+            "passed": match_score >= settings.MIN_MATCH_SCORE,
+            "auto_bid_eligible": self._auto_bid_eligible(match_score, batch),
+        }
+
+    def rank_top_k(
+        self,
+        rfq,
+        parsed_specs: Dict,
+        batch: CandidateBatch,
+        k: int
+    ) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Best k candidates above the threshold, with bound-based pruning
+
+        Price, certification and quality are computed for every candidate
+        and give an upper bound on the final score (spec and delivery
+        assumed perfect). Candidates are then scored in full in
+        descending bound order, keeping a bounded heap of the k best, and
+        scoring stops once no remaining bound can reach the k-th score.
+
+        Returns the ranked indices and the score columns; rows that were
+        pruned hold NaN and are flagged False in ``evaluated``. Learned
+        rankers cannot be bounded, so they score the whole batch.
+        """
+        if not get_ranker().supports_bounds:
+            scores = self.score(rfq, parsed_specs, batch)
+            scores["evaluated"] = np.ones(len(batch), dtype=bool)
+            return self.rank(scores)[:k], scores
+
+        n = len(batch)
+        price_score = self._price_competitiveness(rfq.target_price_usd, batch)
+        cert_score = self._certification_match(parsed_specs, batch)
+        quality_score = np.where(batch.has_seller, batch.rating / 5.0, 0.5)
+        upper_bound = self._weighted(
+            np.ones(n), price_score, cert_score, np.ones(n), quality_score
+        ) * batch.score_factor
+
+        scores = {
+            "spec_match": np.full(n, np.nan),
+            "price_competitiveness": price_score,
+            "compliance_score": cert_score,
+            "delivery_score": np.full(n, np.nan),
+            "quality_history": quality_score,
+            "match_score": np.full(n, np.nan),
+            "passed": np.zeros(n, dtype=bool),
+            "auto_bid_eligible": np.zeros(n, dtype=bool),
+            "evaluated": np.zeros(n, dtype=bool),
+        }
+
+        viable = np.flatnonzero(upper_bound >= settings.MIN_MATCH_SCORE)
+        viable = viable[np.argsort(-upper_bound[viable], kind="stable")]
+
+        # Min-heap of (score, -index): ties prefer the earlier catalog row
+        heap: List[Tuple[float, int]] = []
+        chunk_size = max(4 * k, 256)
+
+        for start in range(0, len(viable), chunk_size):
+            chunk = viable[start:start + chunk_size]
+            if len(heap) == k:
+                chunk = chunk[upper_bound[chunk] >= heap[0][0]]
+                if len(chunk) == 0:
+                    break
+
+            sub = batch.take(chunk)
+            spec_score = self._spec_match(parsed_specs, sub)
+            delivery_score = self._delivery_score(sub)
+            match_score = self._weighted(
+                spec_score, price_score[chunk], cert_score[chunk],
+                delivery_score, quality_score[chunk]
+            ) * sub.score_factor
+
+            scores["spec_match"][chunk] = spec_score
+            scores["delivery_score"][chunk] = delivery_score
+            scores["match_score"][chunk] = match_score
+            scores["passed"][chunk] = match_score >= settings.MIN_MATCH_SCORE
+            scores["auto_bid_eligible"][chunk] = self._auto_bid_eligible(match_score, sub)
+            scores["evaluated"][chunk] = True
+
+            floor = max(settings.MIN_MATCH_SCORE, heap[0][0] if len(heap) == k else 0.0)
+            for position in np.flatnonzero(match_score >= floor):
+                item = (float(match_score[position]), -int(chunk[position]))
+                if len(heap) < k:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+
+        order = np.array([-neg_index for _, neg_index in sorted(heap, reverse=True)], dtype=np.int64)
+        return order, scores
+
+    def rank(self, scores: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Indices of candidates above the threshold, best first
+
+        Uses a stable sort so ties keep catalog order, like list.sort.
+        """
+        passed = np.flatnonzero(scores["passed"])
+        order = np.argsort(-scores["match_score"][passed], kind="stable")
+        return passed[order]
+
+    def _weighted(
+        self,
+        spec_score: np.ndarray,
+        price_score: np.ndarray,
+        cert_score: np.ndarray,
+        delivery_score: np.ndarray,
+        quality_score: np.ndarray
+    ) -> np.ndarray:
+        """Weighted sum (same evaluation order as the per-row code)"""
+        return (
+            spec_score * FEATURE_WEIGHTS["spec_match"] +
+            price_score * FEATURE_WEIGHTS["price_competitiveness"] +
+            cert_score * FEATURE_WEIGHTS["compliance_score"] +
+            delivery_score * FEATURE_WEIGHTS["delivery_score"] +
+            quality_score * FEATURE_WEIGHTS["quality_history"]
+        )
+
+    def _spec_match(self, parsed_specs: Dict, batch: CandidateBatch) -> np.ndarray:
+        """Grade / assay / form match, averaged over the checks requested"""
+        n = len(batch)
+        score = np.zeros(n, dtype=np.float64)
+        checks = 0
+
+        if parsed_specs.get("grade"):
+            checks += 1
+            exact = batch.grade == parsed_specs["grade"]
+            premium = np.zeros(n, dtype=bool)
+            for grade in PREMIUM_GRADES:
+                premium |= batch.grade == grade
+            score = score + np.where(exact, 1.0, np.where(premium, 0.8, 0.0))
+
+        if parsed_specs.get("assay_min"):
+            checks += 1
+            # Thresholds are derived in Decimal once, as the per-row code does
+            required = Decimal(str(parsed_specs["assay_min"]))
+            full = float(required)
+            relaxed = float(required * Decimal("0.95"))
+            with np.errstate(invalid="ignore"):
+                score = score + np.where(
+                    batch.assay_min >= full, 1.0,
+                    np.where(batch.assay_min >= relaxed, 0.8, 0.0)
+                )
+
+        if parsed_specs.get("form"):
+            checks += 1
+            score = score + np.where(batch.form == parsed_specs["form"].lower(), 1.0, 0.0)
+
+        if checks == 0:
+            return np.full(n, 0.5)
+        return score / checks
+
+    def _price_competitiveness(self, target_price, batch: CandidateBatch) -> np.ndarray:
+        """Reward prices below target, penalize prices above it"""
+        if not target_price:
+            return np.full(len(batch), 0.5)
+
+        target = float(target_price)
+        base = batch.base_price
+        with np.errstate(invalid="ignore"):
+            has_price = base > 0
+            savings_pct = (target - base) / target
+            excess_pct = (base - target) / target
+            score = np.where(
+                base <= target,
+                np.minimum(1.0, 0.7 + savings_pct * 3),
+                np.maximum(0.0, 0.5 - excess_pct * 2)
+            )
+        return np.where(has_price, score, 0.5)
+
+    def _certification_match(self, parsed_specs: Dict, batch: CandidateBatch) -> np.ndarray:
+        """
+        Share of required certifications held by the SKU or its seller
+
+        popcount(required & held) over the candidates' bitmasks; required
+        names no candidate holds have no bit and never match.
+        """
+        required = set(parsed_specs.get("certifications_required", []))
+        n = len(batch)
+
+        if not required:
+            return np.ones(n)
+
+        required_mask = 0
+        for cert in required:
+            if cert in batch.cert_bits:
+                required_mask |= 1 << batch.cert_bits[cert]
+
+        n_words = batch.cert_masks.shape[1]
+        required_words = mask_words([required_mask], n_words)[0]
+        matched = popcount64(batch.cert_masks & required_words).sum(axis=1)
+        return matched / len(required)
+
+    def _delivery_score(self, batch: CandidateBatch) -> np.ndarray:
+        """Lead time plus on-time delivery history"""
+        lead = batch.lead_time_days
+        score = 0.5 + np.where(
+            (lead > 0) & (lead <= 21), 0.3,
+            np.where((lead > 0) & (lead <= 30), 0.2, 0.0)
+        )
+        score = score + np.where(batch.on_time_rate > 0, batch.on_time_rate / 100 * 0.2, 0.0)
+        return np.minimum(1.0, score)
+
+    def _auto_bid_eligible(self, match_score: np.ndarray, batch: CandidateBatch) -> np.ndarray:
+        """
+        Mirror of the per-row rule: score >= 0.85 and the recommended
+        price keeps at least a 10% margin over base price
+        """
+        markup = np.where(match_score >= 0.9, 1.05, np.where(match_score >= 0.8, 1.10, 1.15))
+        with np.errstate(invalid="ignore"):
+            keeps_margin = np.where(batch.base_price > 0, markup >= 1.10, batch.base_price == 0)
+        return (match_score >= AUTO_BID_MIN_SCORE) & keeps_margin
+
+
+# Global batch scorer instance
+batch_scorer = BatchScorer()
@@ -0,0 +1,80 @@
+"""
+Ontology Lookup
+Runs the parser's blocking Neo4j ingredient lookups on a bounded thread
+pool, with a timeout, so they never stall the API event loop
+"""
+from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+
+from loguru import logger
+
+from app.core.config import settings
+from app.core.neo4j_client import neo4j_driver
+
+
+class OntologyUnavailable(Exception):
+    """The ontology did not answer in time (or failed); callers degrade"""
+
+
+class OntologyLookup:
+    """
+    Async front for ``Neo4jClient.normalize_ingredient_name(s)``
+
+    Lookups run on ONTOLOGY_LOOKUP_WORKERS threads, which also caps the
+    Neo4j sessions the parser holds. The timeout covers time queued for
+    a thread, so when Neo4j hangs and the pool is saturated, callers give
+    up after the timeout instead of piling up. A timed-out query keeps
+    its thread until Neo4j answers; the caller does not wait for it.
+    """
+
+    def __init__(self):
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._counters = {"lookups": 0, "timeouts": 0, "errors": 0}
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=settings.ONTOLOGY_LOOKUP_WORKERS,
+                thread_name_prefix="ontology-lookup"
+            )
+            logger.info(f"Ontology lookup pool started with {settings.ONTOLOGY_LOOKUP_WORKERS} threads")
+        return self._pool
+
+    async def normalize(self, text: str) -> Optional[Dict]:
+        """Ontology match for one ingredient term (None if unknown)"""
+        return await self._run(
+            settings.ONTOLOGY_LOOKUP_TIMEOUT_SECONDS, neo4j_driver.normalize_ingredient_name, text
+        )
+
+    async def normalize_many(self, texts: List[str]) -> Dict[str, Optional[Dict]]:
+        """Ontology matches for many terms, in one batched query"""
+        return await self._run(
+            settings.ONTOLOGY_BATCH_LOOKUP_TIMEOUT_SECONDS, neo4j_driver.normalize_ingredient_names, texts
+        )
+
+    async def _run(self, timeout: float, func, *args):
+        self._counters["lookups"] += 1
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(loop.run_in_executor(self._get_pool(), func, *args), timeout)
+        except asyncio.TimeoutError:
+            self._counters["timeouts"] += 1
+            raise OntologyUnavailable(f"no answer within {timeout}s")
+        except Exception as e:
+            self._counters["errors"] += 1
+            raise OntologyUnavailable(str(e)) from e
+
+    def metrics(self) -> Dict:
+        """Lookup, timeout and error counters"""
+        return {"workers": settings.ONTOLOGY_LOOKUP_WORKERS, **self._counters}
+
+    def shutdown(self):
+        """Stop the pool without waiting for hung queries"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# Global ontology lookup instance
+ontology_lookup = OntologyLookup()
@@ -0,0 +1,164 @@
+"""
+Spec Parse Cache
+Parsed specifications keyed by normalized text and parser/ontology
+version, in a per-process LRU in front of Redis
+"""
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import copy
+import hashlib
+import time
+
+from loguru import logger
+
+from app.core.config import settings
+from app.core.redis_client import redis_client
+
+
+class ParseCache:
+    """
+    Two-tier cache of ``SpecParser.parse`` results
+
+    Local tier: an LRU of PARSE_CACHE_LOCAL_SIZE entries, each kept for
+    PARSE_CACHE_LOCAL_SECONDS. Shared tier: Redis, so every API worker
+    reuses a parse, for PARSE_CACHE_SECONDS. The version (parser version
+    plus the ontology version of the synonym matcher) is part of the
+    key, so a reload or a parser change misses both tiers; the local
+    tier is also dropped the first time a new version is seen.
+
+    A Redis failure counts as a miss; parsing never fails on the cache.
+    """
+
+    def __init__(self):
+        self._local: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._version: Optional[str] = None
+        self._counters = {"local_hits": 0, "redis_hits": 0, "misses": 0, "redis_errors": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return settings.PARSE_CACHE_ENABLED
+
+    def key(self, text: str, version: str) -> str:
+        return f"{version}:{hashlib.sha256(text.encode()).hexdigest()}"
+
+    async def get(self, text: str, version: str) -> Optional[Dict]:
+        """Cached parse of normalized ``text`` (a copy), or None"""
+        self._check_version(version)
+
+        key = self.key(text, version)
+        parsed = self._recall(key)
+        if parsed is not None:
+            self._counters["local_hits"] += 1
+            return copy.deepcopy(parsed)
+
+        try:
+            parsed = await redis_client.get_parsed_spec(key)
+        except Exception as e:
+            self._counters["redis_errors"] += 1
+            logger.warning(f"Parse cache lookup failed: {e}")
+            parsed = None
+
+        if parsed is None:
+            self._counters["misses"] += 1
+            return None
+
+        self._counters["redis_hits"] += 1
+        self._remember(key, parsed)
+        return copy.deepcopy(parsed)
+
+    async def put(self, text: str, version: str, parsed: Dict):
+        """Store a parse in both tiers"""
+        key = self.key(text, version)
+        self._remember(key, copy.deepcopy(parsed))
+        try:
+            await redis_client.cache_parsed_spec(key, parsed, expire=settings.PARSE_CACHE_SECONDS)
+        except Exception as e:
+            self._counters["redis_errors"] += 1
+            logger.warning(f"Parse cache write failed: {e}")
+
+    async def get_many(self, texts: List[str], version: str) -> Dict[str, Dict]:
+        """Cached parses of many texts (copies), one Redis round trip for local misses"""
+        self._check_version(version)
+
+        found: Dict[str, Dict] = {}
+        remote: Dict[str, str] = {}
+        for text in texts:
+            key = self.key(text, version)
+            parsed = self._recall(key)
+            if parsed is not None:
+                self._counters["local_hits"] += 1
+                found[text] = copy.deepcopy(parsed)
+            else:
+                remote[key] = text
+
+        if remote:
+            try:
+                cached = await redis_client.get_parsed_specs(list(remote))
+            except Exception as e:
+                self._counters["redis_errors"] += 1
+                logger.warning(f"Parse cache lookup failed: {e}")
+                cached = {}
+            for key, parsed in cached.items():
+                self._remember(key, parsed)
+                found[remote[key]] = copy.deepcopy(parsed)
+            self._counters["redis_hits"] += len(cached)
+            self._counters["misses"] += len(remote) - len(cached)
+        return found
+
+    async def put_many(self, parsed_by_text: Dict[str, Dict], version: str):
+        """Store many parses in both tiers, one Redis round trip"""
+        entries = {self.key(text, version): parsed for text, parsed in parsed_by_text.items()}
+        for key, parsed in entries.items():
+            self._remember(key, copy.deepcopy(parsed))
+        try:
+            await redis_client.cache_parsed_specs(entries, expire=settings.PARSE_CACHE_SECONDS)
+        except Exception as e:
+            self._counters["redis_errors"] += 1
+            logger.warning(f"Parse cache write failed: {e}")
+
+    def _check_version(self, version: str):
+        """Drop the local tier the first time a new version is seen"""
+        if version != self._version:
+            self._local.clear()
+            self._version = version
+
+    def _recall(self, key: str) -> Optional[Dict]:
+        """Unexpired local entry (not copied), refreshed as most recent"""
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        expires_at, parsed = entry
+        if expires_at <= time.monotonic():
+            del self._local[key]
+            return None
+        self._local.move_to_end(key)
+        return parsed
+
+    def _remember(self, key: str, parsed: Dict):
+        self._local[key] = (time.monotonic() + settings.PARSE_CACHE_LOCAL_SECONDS, parsed)
+        self._local.move_to_end(key)
+        while len(self._local) > settings.PARSE_CACHE_LOCAL_SIZE:
+            self._local.popitem(last=False)
+
+    def clear(self):
+        """Drop the local tier and reset counters"""
+        self._local.clear()
+        self._version = None
+        for name in self._counters:
+            self._counters[name] = 0
+
+    def metrics(self) -> Dict:
+        """Hit/miss counters and local tier size"""
+        lookups = self._counters["local_hits"] + self._counters["redis_hits"] + self._counters["misses"]
+        hits = lookups - self._counters["misses"]
+        return {
+            "enabled": self.enabled,
+            "version": self._version,
+            "local_entries": len(self._local),
+            **self._counters,
+            "hit_rate": round(hits / lookups, 4) if lookups else None,
+        }
+
+
+# Global parse cache instance
+parse_cache = ParseCache()
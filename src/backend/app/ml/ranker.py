@@ -0,0 +1,153 @@
+"""
+Match Rankers
+Turn the candidate feature matrix into match scores: the weighted sum by
+default, or a learned XGBoost / LightGBM model from MATCHER_MODEL_PATH
+"""
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple
+import os
+import numpy as np
+from loguru import logger
+
+from app.core.config import settings
+
+
+# Feature weights, in feature-matrix column order
+FEATURE_WEIGHTS = {
+    "spec_match": 0.4,
+    "price_competitiveness": 0.2,
+    "compliance_score": 0.2,
+    "delivery_score": 0.1,
+    "quality_history": 0.1,
+}
+
+FEATURE_NAMES = list(FEATURE_WEIGHTS)
+
+
+class Ranker(ABC):
+    """
+    Scores a candidate feature matrix (one row per SKU, columns in
+    FEATURE_NAMES order) in a single call
+
+    Scores must be match probabilities in [0, 1], so MIN_MATCH_SCORE and
+    the auto-bid thresholds keep their meaning for every ranker.
+    """
+
+    name = "base"
+
+    # Whether a score can be bounded from partial features (top-K pruning)
+    supports_bounds = False
+
+    @abstractmethod
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """Match probability per feature row"""
+
+
+class WeightedRanker(Ranker):
+    """Fixed weighted sum of the five match features"""
+
+    name = "weighted"
+    supports_bounds = True
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        # Column by column, in the per-row code's evaluation order
+        score = features[:, 0] * FEATURE_WEIGHTS["spec_match"]
+        for column, name in enumerate(FEATURE_NAMES[1:], 1):
+            score = score + features[:, column] * FEATURE_WEIGHTS[name]
+        return score
+
+
+class XGBoostRanker(Ranker):
+    """
+    XGBoost booster saved with ``save_model`` (JSON or UBJSON)
+
+    Train with a probability objective (e.g. ``binary:logistic``) on the
+    FEATURE_NAMES columns.
+    """
+
+    name = "xgboost"
+
+    def __init__(self, model_path: str):
+        import xgboost
+
+        self.booster = xgboost.Booster()
+        self.booster.load_model(model_path)
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        if len(features) == 0:
+            return np.zeros(0)
+        scores = self.booster.inplace_predict(features)
+        return np.clip(np.asarray(scores, dtype=np.float64), 0.0, 1.0)
+
+
+class LightGBMRanker(Ranker):
+    """
+    LightGBM booster saved with ``save_model`` (text format)
+
+    Train with a probability objective (e.g. ``binary``) on the
+    FEATURE_NAMES columns.
+    """
+
+    name = "lightgbm"
+
+    def __init__(self, model_path: str):
+        import lightgbm
+
+        self.booster = lightgbm.Booster(model_file=model_path)
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        if len(features) == 0:
+            return np.zeros(0)
+        scores = self.booster.predict(features, num_threads=1)
+        return np.clip(np.asarray(scores, dtype=np.float64), 0.0, 1.0)
+
+
+RANKERS = {
+    "weighted": WeightedRanker,
+    "xgboost": XGBoostRanker,
+    "lightgbm": LightGBMRanker,
+}
+
+# Loaded ranker, keyed by the configuration it was built from
+_loaded: Dict[Tuple[str, str], Ranker] = {}
+
+
+def resolve_model_file(model_path: str, kind: str) -> Optional[str]:
+    """Model file at MATCHER_MODEL_PATH (a file, or a directory holding model.json / model.txt)"""
+    if os.path.isfile(model_path):
+        return model_path
+    filename = "model.json" if kind == "xgboost" else "model.txt"
+    candidate = os.path.join(model_path, filename)
+    return candidate if os.path.isfile(candidate) else None
+
+
+def get_ranker() -> Ranker:
+    """
+    Ranker selected by MATCHER_RANKER, loaded once per process
+
+    Changing MATCHER_RANKER or MATCHER_MODEL_PATH swaps the model on the
+    next call. A learned model that cannot be loaded falls back to the
+    weighted ranker rather than failing matching.
+    """
+    kind = settings.MATCHER_RANKER
+    key = (kind, settings.MATCHER_MODEL_PATH)
+    ranker = _loaded.get(key)
+    if ranker is not None:
+        return ranker
+
+    ranker = WeightedRanker()
+    if kind != "weighted":
+        try:
+            if kind not in RANKERS:
+                raise ValueError(f"unknown ranker '{kind}'")
+            model_file = resolve_model_file(settings.MATCHER_MODEL_PATH, kind)
+            if model_file is None:
+                raise FileNotFoundError(f"no model at {settings.MATCHER_MODEL_PATH}")
+            ranker = RANKERS[kind](model_file)
+            logger.info(f"✅ Loaded {kind} match ranker from {model_file}")
+        except Exception as e:
+            logger.error(f"❌ Failed to load {kind} match ranker, using weighted sum: {e}")
+
+    _loaded.clear()
+    _loaded[key] = ranker
+    return ranker
@@ -0,0 +1,154 @@
+"""
+Seller Features
+Compact per-seller scoring inputs, the certification interning table and
+bitmask helpers for certification coverage
+"""
+from typing import Dict, Iterable, NamedTuple, Optional, Sequence
+from functools import lru_cache
+import threading
+import numpy as np
+
+
+WORD_BITS = 64
+
+# Distinct certification sets (and masks) memoized per vocabulary
+VOCABULARY_MEMO_SIZE = 4096
+
+# SWAR popcount constants (NumPy 1.26 has no bitwise_count)
+_M1 = np.uint64(0x5555555555555555)
+_M2 = np.uint64(0x3333333333333333)
+_M4 = np.uint64(0x0F0F0F0F0F0F0F0F)
+_H01 = np.uint64(0x0101010101010101)
+
+
+def popcount64(words: np.ndarray) -> np.ndarray:
+    """Set bits per element of a uint64 array"""
+    x = words - ((words >> np.uint64(1)) & _M1)
+    x = (x & _M2) + ((x >> np.uint64(2)) & _M2)
+    x = (x + (x >> np.uint64(4))) & _M4
+    return (x * _H01) >> np.uint64(56)
+
+
+def mask_words(masks: Sequence[int], n_words: int) -> np.ndarray:
+    """Python int bitmasks as an (n, n_words) uint64 array, low word first"""
+    if n_words == 1:
+        return np.array(masks, dtype=np.uint64).reshape(-1, 1)
+    low = (1 << WORD_BITS) - 1
+    return np.array(
+        [[(mask >> (WORD_BITS * w)) & low for w in range(n_words)] for mask in masks],
+        dtype=np.uint64
+    ).reshape(-1, n_words)
+
+
+class CertificationVocabulary:
+    """
+    Interns certification names as bit positions
+
+    Bits are assigned on first sight and never reused, so a mask decodes
+    to the same names for the life of the process. Bit positions are
+    process-local: anything shared (Redis) stores names.
+    """
+
+    def __init__(self):
+        self._bits: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        # Bounded, and lru_cache serializes its own updates across threads
+        self._mask = lru_cache(maxsize=VOCABULARY_MEMO_SIZE)(self._build_mask)
+        self._names = lru_cache(maxsize=VOCABULARY_MEMO_SIZE)(self._decode)
+
+    def __len__(self) -> int:
+        return len(self._bits)
+
+    @property
+    def n_words(self) -> int:
+        """uint64 words needed to hold every assigned bit"""
+        return max(1, -(-len(self._bits) // WORD_BITS))
+
+    def bits(self) -> Dict[str, int]:
+        """Snapshot of name -> bit, for decoding masks in another process"""
+        return dict(self._bits)
+
+    def bit(self, name: str) -> int:
+        """Bit position of a certification name, assigned if new"""
+        bit = self._bits.get(name)
+        if bit is None:
+            with self._lock:
+                bit = self._bits.setdefault(name, len(self._bits))
+        return bit
+
+    def mask(self, names: Optional[Iterable[str]]) -> int:
+        """Bitmask of a set of certification names (memoized per set)"""
+        return self._mask(frozenset(names or ()))
+
+    def names(self, mask: int) -> frozenset:
+        """Certification names of a bitmask (memoized per mask)"""
+        return self._names(mask)
+
+    def _build_mask(self, names: frozenset) -> int:
+        mask = 0
+        for name in names:
+            mask |= 1 << self.bit(name)
+        return mask
+
+    def _decode(self, mask: int) -> frozenset:
+        return frozenset(name for name, bit in list(self._bits.items()) if mask >> bit & 1)
+
+
+class SellerFeatures(NamedTuple):
+    """
+    Seller-level scoring inputs, precomputed once per company
+
+    Holds what matching reads from a seller; ``certifications`` decodes
+    the mask, so features can stand in for a Company row wherever the
+    scorer and candidate filter take a seller.
+    """
+    rating: float
+    on_time_rate: float
+    quality_score: float
+    cert_mask: int
+    verified: bool
+
+    @classmethod
+    def from_company(cls, company) -> "SellerFeatures":
+        return cls(
+            rating=float(company.rating or 0),
+            on_time_rate=float(company.on_time_delivery_rate or 0),
+            quality_score=float(company.quality_score or 0),
+            cert_mask=cert_vocabulary.mask(company.certifications),
+            verified=bool(company.verified),
+        )
+
+    @classmethod
+    def of(cls, seller) -> Optional["SellerFeatures"]:
+        """Features for a Company row (or features, passed through)"""
+        if seller is None or isinstance(seller, cls):
+            return seller
+        return cls.from_company(seller)
+
+    @classmethod
+    def from_cache(cls, data: Dict) -> "SellerFeatures":
+        return cls(
+            rating=data["rating"],
+            on_time_rate=data["on_time_rate"],
+            quality_score=data["quality_score"],
+            cert_mask=cert_vocabulary.mask(data["certifications"]),
+            verified=data["verified"],
+        )
+
+    def to_cache(self) -> Dict:
+        """JSON form for Redis, with certification names instead of the mask"""
+        return {
+            "rating": self.rating,
+            "on_time_rate": self.on_time_rate,
+            "quality_score": self.quality_score,
+            "certifications": sorted(self.certifications),
+            "verified": self.verified,
+        }
+
+    @property
+    def certifications(self) -> frozenset:
+        return cert_vocabulary.names(self.cert_mask)
+
+
+# Global certification vocabulary instance
+cert_vocabulary = CertificationVocabulary()
@@ -0,0 +1,193 @@
+"""
+Specification Extractor
+Compiled single-pass extraction of the rule-based RFQ spec fields
+"""
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import re
+
+
+class Rule(NamedTuple):
+    """
+    One extraction pattern
+
+    ``value`` is the canonical name the rule emits; rules whose pattern
+    has a ``(?P<v>...)`` group emit the captured text instead.
+    """
+    field: str
+    pattern: str
+    value: Optional[str] = None
+
+
+NUMBER = r"\d+(?:\.\d+)?"
+
+# Rules per field in priority order: the first rule (not the first
+# position) that matches wins, exactly as the per-field searches did
+RULES: List[Rule] = [
+    # Ingredient surface forms, resolved against the ontology by the parser
+    Rule("ingredient", r"(?:curcumin|turmeric)"),
+    Rule("ingredient", r"(?:ashwagandha|withania)"),
+    Rule("ingredient", r"(?:vitamin\s*c|ascorbic\s*acid)"),
+    Rule("ingredient", r"(?:omega[- ]?3|fish\s*oil)"),
+    Rule("ingredient", r"(?:whey\s*protein|wpi)"),
+
+    # Assay / purity (leftmost match of each rule, kept if 50-100)
+    Rule("assay", rf"(?P<v>{NUMBER})\s*%"),
+    Rule("assay", rf"(?P<v>{NUMBER})\s*percent"),
+    Rule("assay", rf"purity\s*[:-]?\s*(?P<v>{NUMBER})"),
+    Rule("assay", rf"assay\s*[:-]?\s*(?P<v>{NUMBER})"),
+
+    Rule("grade", r"\busp\b", "USP"),
+    Rule("grade", r"\bbp\b", "BP"),
+    Rule("grade", r"\bep\b", "EP"),
+    Rule("grade", r"\bjp\b", "JP"),
+    Rule("grade", r"food\s*grade", "Food Grade"),
+    Rule("grade", r"pharmaceutical\s*grade", "Pharmaceutical Grade"),
+    Rule("grade", r"cosmetic\s*grade", "Cosmetic Grade"),
+    Rule("grade", r"technical\s*grade", "Technical Grade"),
+
+    Rule("form", r"\bpowder\b", "Powder"),
+    Rule("form", r"\bextract\b", "Extract"),
+    Rule("form", r"\boil\b", "Oil"),
+    Rule("form", r"\bliquid\b", "Liquid"),
+    Rule("form", r"\bgranules?\b", "Granules"),
+    Rule("form", r"\bcrystals?\b", "Crystals"),
+    Rule("form", r"\bpellets?\b", "Pellets"),
+
+    # Certifications: every rule that matches, in this order
+    Rule("certification", r"\bgmp\b", "GMP"),
+    Rule("certification", r"\biso\s*9001\b", "ISO9001"),
+    Rule("certification", r"\biso\s*22000\b", "ISO22000"),
+    Rule("certification", r"\bhaccp\b", "HACCP"),
+    Rule("certification", r"\bhalal\b", "Halal"),
+    Rule("certification", r"\bkosher\b", "Kosher"),
+    Rule("certification", r"\borganic\b", "Organic"),
+    Rule("certification", r"\busda\s*organic\b", "USDA Organic"),
+    Rule("certification", r"\beu\s*organic\b", "EU Organic"),
+    Rule("certification", r"\bnon[- ]?gmo\b", "Non-GMO"),
+
+    *(
+        Rule("incoterm", rf"\b{term.lower()}\b", term)
+        for term in ["EXW", "FCA", "CPT", "CIP", "DAP", "DPU", "DDP", "FAS", "FOB", "CFR", "CIF"]
+    ),
+
+    Rule("moq", rf"moq\s*[:-]?\s*(?P<v>{NUMBER})\s*(?:kg|kgs)?"),
+    Rule("moq", rf"minimum\s*(?:order)?\s*(?:quantity)?\s*[:-]?\s*(?P<v>{NUMBER})\s*(?:kg|kgs)?"),
+
+    Rule("mesh", r"(?P<v>\d+)\s*mesh"),
+]
+
+
+def _triggers(pattern: str) -> List[str]:
+    """
+    Literal text every match of a rule starts with: one per top-level
+    alternative, or ``\\d`` for rules that start with a number
+    """
+    body = pattern[2:] if pattern.startswith(r"\b") else pattern
+    if body.startswith("(?:"):
+        alternatives = body[3:body.index(")")].split("|")
+    else:
+        alternatives = [body]
+
+    triggers = []
+    for alternative in alternatives:
+        if alternative.startswith(("(?P<v>\\d", "\\d")):
+            triggers.append("\\d")
+            continue
+        literal = re.match(r"[a-z]+", alternative).group()
+        if alternative[len(literal):].startswith("?"):
+            literal = literal[:-1]  # granules? -> granule
+        triggers.append(literal)
+    return triggers
+
+
+class SpecExtractor:
+    """
+    Scans a specification once for every rule
+
+    The leading literal of every rule (``usp``, ``iso``, ``curcumin``, a
+    digit, ...) is compiled into one alternation that consumes a single
+    character per hit, so one ``finditer`` reports every position where
+    some rule can start, overlapping hits (``usda organic`` and
+    ``organic``) included. Only the rules keyed by that character are
+    then tried there, each until its first hit: the leftmost match, which
+    is what a per-rule ``re.search`` returns.
+    """
+
+    def __init__(self):
+        self._patterns = [re.compile(rule.pattern, re.IGNORECASE) for rule in RULES]
+        self._values = ["(?P<v>" in rule.pattern for rule in RULES]
+        self._all = range(len(RULES))
+
+        # Rule indices by the first character of their triggers, in rule order
+        self._candidates: Dict[str, List[int]] = {}
+        suffixes: Dict[str, set] = {}
+        for index, rule in enumerate(RULES):
+            for trigger in _triggers(rule.pattern):
+                chars = "0123456789" if trigger == "\\d" else trigger[0]
+                for char in chars:
+                    if index not in self._candidates.setdefault(char, []):
+                        self._candidates[char].append(index)
+                if trigger != "\\d":
+                    suffixes.setdefault(trigger[0], set()).add(re.escape(trigger[1:]))
+
+        # A digit run is one trigger: a number rule that matches inside a
+        # run also matches from its first digit
+        self._scan = re.compile(
+            "|".join(
+                [f"{char}(?={'|'.join(sorted(rest))})" for char, rest in sorted(suffixes.items())] + [r"\d+"]
+            ),
+            re.IGNORECASE,
+        )
+
+    def hits(self, text: str) -> Dict[int, Tuple[str, Optional[str]]]:
+        """Leftmost (matched text, value group) of every rule that matches"""
+        found = {}
+        patterns, values, candidates = self._patterns, self._values, self._candidates
+        for trigger in self._scan.finditer(text):
+            position = trigger.start()
+            # Case folding and Unicode digits can reach chars with no entry
+            for index in candidates.get(text[position].lower(), self._all):
+                if index in found:
+                    continue
+                match = patterns[index].match(text, position)
+                if match is not None:
+                    found[index] = (match.group(), match.group("v") if values[index] else None)
+        return found
+
+    def extract(self, text: str) -> Dict:
+        """
+        Spec fields other than the ingredient, plus the ingredient
+        surface forms found (in rule order) under ``ingredient_terms``
+        """
+        found = self.hits(text)
+        first = {}
+        fields = {"ingredient_terms": [], "certifications_required": []}
+
+        for index in sorted(found):
+            rule = RULES[index]
+            matched, value = found[index]
+            if rule.field == "ingredient":
+                fields["ingredient_terms"].append(matched)
+            elif rule.field == "certification":
+                fields["certifications_required"].append(rule.value)
+            elif rule.field == "assay":
+                if "assay_min" not in fields and 50 <= float(value) <= 100:
+                    fields["assay_min"] = float(value)
+            elif rule.field not in first:
+                first[rule.field] = rule.value or value
+
+        if "grade" in first:
+            fields["grade"] = first["grade"]
+        if "form" in first:
+            fields["form"] = first["form"]
+        if "incoterm" in first:
+            fields["incoterm"] = first["incoterm"]
+        if "moq" in first:
+            fields["moq_kg"] = float(first["moq"])
+        if "mesh" in first:
+            fields["mesh_size"] = f"{first['mesh']} mesh"
+        return fields
+
+
+# Global spec extractor instance
+spec_extractor = SpecExtractor()
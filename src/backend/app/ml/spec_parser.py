@@ -2,15 +2,31 @@
 NLP-based Specification Parser
 Uses transformer models to extract structured data from raw RFQ text
 """
-import re
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Tuple
 from loguru import logger
 import asyncio
+import copy
 
 # For production: use transformers
 # from transformers import pipeline, AutoTokenizer, AutoModelForTokenClassification
 
-from app.core.neo4j_client import neo4j_driver
+from app.ml.ontology_lookup import OntologyUnavailable, ontology_lookup
+from app.ml.parse_cache import parse_cache
+from app.ml.seller_features import cert_vocabulary
+from app.ml.spec_extractor import RULES, spec_extractor
+from app.ml.synonym_matcher import synonym_matcher
+
+
+# Reserve bits for the certifications the parser recognizes
+cert_vocabulary.mask(rule.value for rule in RULES if rule.field == "certification")
+
+# Bump when a change to the rules or the parse logic changes parse output
+PARSER_VERSION = 2
+
+# Fields copied from the extractor, in output order
+EXTRACTED_FIELDS = [
+    "assay_min", "grade", "form", "certifications_required", "incoterm", "moq_kg", "mesh_size"
+]
 
 
 class SpecParser:
@@ -54,81 +70,135 @@ class SpecParser:
         """
         
         # Normalize text
-        text = raw_text.lower().strip()
+        text = self.normalize(raw_text)
         
-        parsed = {}
+        if parse_cache.enabled:
+            version = self.version()
+            cached = await parse_cache.get(text, version)
+            if cached is not None:
+                return cached
         
-        # Extract ingredient name using ontology
-        ingredient_match = await self._extract_ingredient(text)
-        if ingredient_match:
-            parsed.update(ingredient_match)
+        # One scan for every rule-based field
+        extracted = spec_extractor.extract(text)
         
-        # Extract assay/purity
-        assay = self._extract_assay(text)
-        if assay:
-            parsed["assay_min"] = assay
-        
-        # Extract grade
-        grade = self._extract_grade(text)
-        if grade:
-            parsed["grade"] = grade
+        # Extract ingredient name using ontology
+        ingredient_match, resolved = await self._extract_ingredient(text, extracted["ingredient_terms"])
+        parsed = self._assemble(ingredient_match, extracted)
         
-        # Extract form
-        form = self._extract_form(text)
-        if form:
-            parsed["form"] = form
+        logger.info(f"Parsed specification: {parsed}")
         
-        # Extract certifications
-        certs = self._extract_certifications(text)
-        if certs:
-            parsed["certifications_required"] = certs
+        # A degraded parse is not cached, so the next submission retries the ontology
+        if parse_cache.enabled and resolved:
+            await parse_cache.put(text, version, parsed)
         
-        # Extract incoterm
-        incoterm = self._extract_incoterm(text)
-        if incoterm:
-            parsed["incoterm"] = incoterm
+        return parsed
+    
+    async def parse_many(self, raw_texts: List[str]) -> List[Dict]:
+        """
+        Parse many specifications (e.g. a spreadsheet of RFQ lines)
         
-        # Extract MOQ
-        moq = self._extract_moq(text)
-        if moq:
-            parsed["moq_kg"] = moq
+        Identical texts (after normalization) are parsed once, cached
+        parses come from one cache round trip, and the ingredient terms of
+        all remaining texts are resolved in one batched ontology query.
+        Results are in input order, each a separate dict.
+        """
+        texts = [self.normalize(raw_text) for raw_text in raw_texts]
+        distinct = list(dict.fromkeys(texts))
+        
+        parsed_by_text: Dict[str, Dict] = {}
+        if parse_cache.enabled:
+            version = self.version()
+            parsed_by_text = await parse_cache.get_many(distinct, version)
+        
+        pending = [text for text in distinct if text not in parsed_by_text]
+        extracted = {text: spec_extractor.extract(text) for text in pending}
+        
+        lookups: Dict[str, Optional[Dict]] = {}
+        resolved = True
+        if not synonym_matcher.loaded:
+            terms = list(dict.fromkeys(
+                term for text in pending for term in extracted[text]["ingredient_terms"]
+            ))
+            if terms:
+                try:
+                    lookups = await ontology_lookup.normalize_many(terms)
+                except OntologyUnavailable as e:
+                    logger.warning(f"Ontology lookup failed, parsing {len(pending)} specs without it: {e}")
+                    resolved = False
+        
+        for text in pending:
+            if synonym_matcher.loaded:
+                result = synonym_matcher.find(text)
+            else:
+                result = next(
+                    (lookups[term] for term in extracted[text]["ingredient_terms"] if lookups.get(term)),
+                    None
+                )
+            parsed_by_text[text] = self._assemble(self._ingredient_fields(result, text), extracted[text])
+        
+        logger.info(
+            f"Parsed {len(texts)} specifications: {len(distinct)} distinct, "
+            f"{len(pending)} not cached"
+        )
         
-        # Extract mesh size
-        mesh = self._extract_mesh(text)
-        if mesh:
-            parsed["mesh_size"] = mesh
+        if parse_cache.enabled and pending and resolved:
+            await parse_cache.put_many({text: parsed_by_text[text] for text in pending}, version)
         
-        logger.info(f"Parsed specification: {parsed}")
+        return [copy.deepcopy(parsed_by_text[text]) for text in texts]
+    
+    def normalize(self, raw_text: str) -> str:
+        """Lowercase, trim and collapse whitespace (variants parse, and cache, alike)"""
+        return " ".join(raw_text.lower().split())
+    
+    def version(self) -> str:
+        """
+        Parser and ontology version a parse depends on
         
-        return parsed
+        Without the synonym matcher, ingredients are resolved live in
+        Neo4j and cached parses only expire with their TTL.
+        """
+        ontology = synonym_matcher.version if synonym_matcher.loaded else "live"
+        return f"p{PARSER_VERSION}:o{ontology}"
     
-    async def _extract_ingredient(self, text: str) -> Optional[Dict]:
-        """Extract ingredient name using Neo4j ontology"""
+    async def _extract_ingredient(self, text: str, terms: List[str]) -> Tuple[Optional[Dict], bool]:
+        """
+        Extract ingredient name using Neo4j ontology
         
-        # Common ingredient patterns
-        patterns = [
-            r"(?:curcumin|turmeric)",
-            r"(?:ashwagandha|withania)",
-            r"(?:vitamin\s*c|ascorbic\s*acid)",
-            r"(?:omega[- ]?3|fish\s*oil)",
-            r"(?:whey\s*protein|wpi)",
-        ]
+        With the synonym matcher loaded this is a local scan of the whole
+        text. Otherwise ``terms`` (the ingredient surface forms the
+        extractor found, in rule order) are looked up in Neo4j off the
+        event loop and the first one the ontology resolves wins.
         
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                ingredient_text = match.group(0)
-                
+        Returns the ingredient fields and whether the ontology answered;
+        if it timed out or failed, the first-word fallback is used.
+        """
+        result = None
+        if synonym_matcher.loaded:
+            result = synonym_matcher.find(text)
+        else:
+            for ingredient_text in terms:
                 # Look up in ontology
-                result = neo4j_driver.normalize_ingredient_name(ingredient_text)
+                try:
+                    result = await ontology_lookup.normalize(ingredient_text)
+                except OntologyUnavailable as e:
+                    logger.warning(f"Ontology lookup for '{ingredient_text}' failed, parsing without it: {e}")
+                    return self._ingredient_fields(None, text), False
                 if result:
-                    ing = result["ingredient"]
-                    return {
-                        "ingredient": ing["name"],
-                        "botanical_name": ing.get("botanical_name"),
-                        "cas_number": ing.get("cas_number"),
-                        "ontology_confidence": result["confidence"]
-                    }
+                    break
+        
+        return self._ingredient_fields(result, text), True
+    
+    def _ingredient_fields(self, result: Optional[Dict], text: str) -> Optional[Dict]:
+        """Parsed ingredient fields from an ontology match, else the first word"""
+        if result:
+            ing = result["ingredient"]
+            return {
+                "ingredient": ing["name"],
+                "botanical_name": ing.get("botanical_name"),
+                "cas_number": ing.get("cas_number"),
+                "ontology_node_id": ing.get("id"),
+                "ontology_confidence": result["confidence"]
+            }
         
         # Fallback: extract first noun phrase
         # In production, use spaCy or similar
@@ -138,116 +208,17 @@ class SpecParser:
         
         return None
     
-    def _extract_assay(self, text: str) -> Optional[float]:
-        """Extract assay/purity percentage"""
-        patterns = [
-            r"(\d+(?:\.\d+)?)\s*%",  # 95%
-            r"(\d+(?:\.\d+)?)\s*percent",  # 95 percent
-            r"purity\s*[:-]?\s*(\d+(?:\.\d+)?)",  # purity: 95
-            r"assay\s*[:-]?\s*(\d+(?:\.\d+)?)",  # assay: 95
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                value = float(match.group(1))
-                if 50 <= value <= 100:  # Reasonable range
-                    return value
-        
-        return None
-    
-    def _extract_grade(self, text: str) -> Optional[str]:
-        """Extract grade (USP, BP, EP, Food Grade, etc.)"""
-        grades = {
-            r"\busp\b": "USP",
-            r"\bbp\b": "BP",
-            r"\bep\b": "EP",
-            r"\bjp\b": "JP",
-            r"food\s*grade": "Food Grade",
-            r"pharmaceutical\s*grade": "Pharmaceutical Grade",
-            r"cosmetic\s*grade": "Cosmetic Grade",
-            r"technical\s*grade": "Technical Grade",
-        }
-        
-        for pattern, grade_name in grades.items():
-            if re.search(pattern, text, re.IGNORECASE):
-                return grade_name
-        
-        return None
-    
-    def _extract_form(self, text: str) -> Optional[str]:
-        """Extract physical form"""
-        forms = {
-            r"\bpowder\b": "Powder",
-            r"\bextract\b": "Extract",
-            r"\boil\b": "Oil",
-            r"\bliquid\b": "Liquid",
-            r"\bgranules?\b": "Granules",
-            r"\bcrystals?\b": "Crystals",
-            r"\bpellets?\b": "Pellets",
-        }
-        
-        for pattern, form_name in forms.items():
-            if re.search(pattern, text, re.IGNORECASE):
-                return form_name
-        
-        return None
-    
-    def _extract_certifications(self, text: str) -> List[str]:
-        """Extract required certifications"""
-        certs = []
-        
-        cert_patterns = {
-            r"\bgmp\b": "GMP",
-            r"\biso\s*9001\b": "ISO9001",
-            r"\biso\s*22000\b": "ISO22000",
-            r"\bhaccp\b": "HACCP",
-            r"\bhalal\b": "Halal",
-            r"\bkosher\b": "Kosher",
-            r"\borganic\b": "Organic",
-            r"\busda\s*organic\b": "USDA Organic",
-            r"\beu\s*organic\b": "EU Organic",
-            r"\bnon[- ]?gmo\b": "Non-GMO",
-        }
-        
-        for pattern, cert_name in cert_patterns.items():
-            if re.search(pattern, text, re.IGNORECASE):
-                certs.append(cert_name)
-        
-        return certs
-    
-    def _extract_incoterm(self, text: str) -> Optional[str]:
-        """Extract Incoterm"""
-        incoterms = ["EXW", "FCA", "CPT", "CIP", "DAP", "DPU", "DDP", "FAS", "FOB", "CFR", "CIF"]
-        
-        for term in incoterms:
-            if re.search(rf"\b{term}\b", text, re.IGNORECASE):
-                return term.upper()
-        
-        return None
-    
-    def _extract_moq(self, text: str) -> Optional[float]:
-        """Extract Minimum Order Quantity in kg"""
-        patterns = [
-            r"moq\s*[:-]?\s*(\d+(?:\.\d+)?)\s*(?:kg|kgs)?",
-            r"minimum\s*(?:order)?\s*(?:quantity)?\s*[:-]?\s*(\d+(?:\.\d+)?)\s*(?:kg|kgs)?",
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                return float(match.group(1))
-        
-        return None
-    
-    def _extract_mesh(self, text: str) -> Optional[str]:
-        """Extract mesh size"""
-        pattern = r"(\d+)\s*mesh"
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            return f"{match.group(1)} mesh"
+    def _assemble(self, ingredient_match: Optional[Dict], extracted: Dict) -> Dict:
+        """Parsed specs in output order: ingredient fields, then extracted fields"""
+        parsed = {}
+        if ingredient_match:
+            parsed.update(ingredient_match)
         
-        return None
+        # Assay, grade, form, certifications, incoterm, MOQ, mesh size
+        for field in EXTRACTED_FIELDS:
+            if extracted.get(field):
+                parsed[field] = extracted[field]
+        return parsed
 
 
 # For production transformer-based NER:
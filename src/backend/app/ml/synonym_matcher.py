@@ -0,0 +1,173 @@
+"""
+Ontology Synonym Matcher
+In-memory multi-pattern matcher over every ingredient name and synonym
+in the Neo4j ontology, so ingredient detection needs no network calls
+"""
+from typing import Dict, Iterable, List, Optional
+import asyncio
+import re
+import time
+
+from starlette.concurrency import run_in_threadpool
+from loguru import logger
+
+from app.core.config import settings
+from app.core.neo4j_client import neo4j_driver
+
+
+TOKEN = re.compile(r"[a-z0-9]+")
+
+# Trie key holding the entry of a phrase ending at that node (tokens are never empty)
+_END = ""
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased alphanumeric words; the form Synonym.normalized is stored in"""
+    return TOKEN.findall(text.lower())
+
+
+def build_trie(ingredients: Iterable[Dict], synonyms: Iterable[Dict]) -> Dict:
+    """
+    Word trie over ingredient names and synonym phrases
+
+    A phrase claimed by several ingredients keeps the most confident
+    entry; an ingredient's own name (confidence 1.0, "exact") wins ties.
+    """
+    trie: Dict = {}
+
+    def insert(phrase: str, entry: Dict):
+        tokens = tokenize(phrase or "")
+        if not tokens:
+            return
+        node = trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+        current = node.get(_END)
+        if current is None or entry["confidence"] > current["confidence"]:
+            node[_END] = entry
+
+    for ingredient in ingredients:
+        insert(ingredient.get("name"), {
+            "ingredient": ingredient,
+            "confidence": 1.0,
+            "match_type": "exact",
+            "matched_text": ingredient.get("name"),
+        })
+    for synonym in synonyms:
+        insert(synonym["normalized"], {
+            "ingredient": synonym["i"],
+            "confidence": synonym["confidence"],
+            "match_type": "synonym",
+            "matched_text": synonym["matched_synonym"],
+        })
+    return trie
+
+
+class SynonymMatcher:
+    """
+    Longest-match ingredient detection over the ontology vocabulary
+
+    Loaded from Neo4j at startup and reloaded when the ontology version
+    changes. A reload builds a new trie and swaps it in with a single
+    assignment, so a scan always sees one complete snapshot.
+    """
+
+    def __init__(self):
+        self._trie: Dict = {}
+        self._version: Optional[int] = None
+        self._phrases = 0
+        self._loaded_at: Optional[float] = None
+        self._reload_failures = 0
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the matcher holds an ontology snapshot"""
+        return self._loaded_at is not None
+
+    @property
+    def version(self) -> Optional[int]:
+        return self._version
+
+    def load(self) -> int:
+        """Full load from Neo4j (blocking), swapped in atomically"""
+        started = time.perf_counter()
+        # Read the version first: a write racing the load bumps it again
+        version = neo4j_driver.get_ontology_version()
+        ingredients = neo4j_driver.get_all_ingredients()
+        synonyms = neo4j_driver.get_synonym_mappings(settings.ONTOLOGY_MIN_SYNONYM_CONFIDENCE)
+
+        self._trie = build_trie(ingredients, synonyms)
+        self._version = version
+        self._phrases = len(ingredients) + len(synonyms)
+        self._loaded_at = time.time()
+
+        logger.info(
+            f"🔤 Synonym matcher loaded: ontology v{version}, {self._phrases} phrases "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+        return self._phrases
+
+    def find(self, text: str) -> Optional[Dict]:
+        """
+        First ingredient mentioned in the text
+
+        Scans left to right and takes the longest phrase starting at the
+        first word where any phrase starts, so "turmeric extract 95%"
+        resolves through "turmeric extract" rather than a shorter
+        "turmeric". Returns the same shape as
+        ``Neo4jClient.normalize_ingredient_name``.
+        """
+        trie = self._trie
+        tokens = tokenize(text)
+        for start in range(len(tokens)):
+            node, entry = trie, None
+            for token in tokens[start:]:
+                node = node.get(token)
+                if node is None:
+                    break
+                entry = node.get(_END, entry)
+            if entry is not None:
+                return entry
+        return None
+
+    def metrics(self) -> Dict:
+        """Snapshot version, size and age"""
+        return {
+            "loaded": self.loaded,
+            "ontology_version": self._version,
+            "phrases": self._phrases,
+            "seconds_since_load": round(time.time() - self._loaded_at, 3) if self._loaded_at else None,
+            "reload_failures": self._reload_failures,
+        }
+
+    async def start(self):
+        """Load the ontology and start polling its version"""
+        await run_in_threadpool(self.load)
+        self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        """Stop the version poll"""
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    async def _refresh_loop(self):
+        """Reload when the ontology version moves"""
+        while True:
+            await asyncio.sleep(settings.ONTOLOGY_REFRESH_SECONDS)
+            try:
+                version = await run_in_threadpool(neo4j_driver.get_ontology_version)
+                if version != self._version:
+                    await run_in_threadpool(self.load)
+            except Exception as e:
+                self._reload_failures += 1
+                logger.error(f"❌ Synonym matcher reload failed, keeping ontology v{self._version}: {e}")
+
+
+# Global synonym matcher instance
+synonym_matcher = SynonymMatcher()
@@ -1,8 +1,8 @@
 """
 Company SQLAlchemy model
 """
-from sqlalchemy import Column, String, Boolean, Numeric, Integer, DateTime, JSON, CheckConstraint
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Boolean, Numeric, Integer, DateTime, CheckConstraint
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
 import uuid
 
@@ -27,7 +27,7 @@ class Company(Base):
     # Verification
     verified = Column(Boolean, default=False)
     verification_date = Column(DateTime)
-    certifications = Column(JSON, default=[])
+    certifications = Column(JSONB, default=[])
     
     # Ratings
     rating = Column(Numeric(3, 2), default=0)
@@ -97,7 +97,7 @@ class SKU(Base):
     moq_kg = Column(Numeric(10, 2))
     
     # Certifications
-    certifications = Column(JSON, default=[])
+    certifications = Column(JSONB, default=[])
     
     # Availability
     is_active = Column(Boolean, default=True)
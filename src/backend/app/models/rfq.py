@@ -1,7 +1,7 @@
 """
 RFQ (Request for Quotation) SQLAlchemy models
 """
-from sqlalchemy import Column, String, Text, Numeric, Integer, DateTime, Boolean, ForeignKey, Enum as SQLEnum, JSON
+from sqlalchemy import Column, String, Text, Numeric, Integer, DateTime, Boolean, ForeignKey, Enum as SQLEnum, JSON, UniqueConstraint, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -22,6 +22,15 @@ class RFQStatus(str, enum.Enum):
     EXPIRED = "expired"
 
 
+class BidStatus(str, enum.Enum):
+    DRAFT = "draft"
+    SUBMITTED = "submitted"
+    UNDER_REVIEW = "under_review"
+    ACCEPTED = "accepted"
+    REJECTED = "rejected"
+    WITHDRAWN = "withdrawn"
+
+
 class RFQ(Base):
     __tablename__ = "rfqs"
     
@@ -93,7 +102,75 @@ class RFQMatch(Base):
     
     created_at = Column(DateTime, default=func.now())
     
+    __table_args__ = (
+        UniqueConstraint('rfq_id', 'sku_id', name='rfq_matches_rfq_id_sku_id_key'),
+    )
+    
     # Relationships
     rfq = relationship("RFQ", back_populates="matches")
     seller = relationship("Company", foreign_keys=[seller_company_id])
     sku = relationship("SKU")
+
+
+class Bid(Base):
+    __tablename__ = "bids"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    bid_number = Column(String(50), unique=True, nullable=False)
+    rfq_id = Column(UUID(as_uuid=True), ForeignKey("rfqs.id", ondelete="CASCADE"), nullable=False)
+    seller_company_id = Column(UUID(as_uuid=True), ForeignKey("companies.id"), nullable=False)
+    submitted_by_user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))
+    sku_id = Column(UUID(as_uuid=True), ForeignKey("skus.id"))
+    
+    # Pricing
+    unit_price_usd = Column(Numeric(10, 2), nullable=False)
+    total_price_usd = Column(Numeric(12, 2), nullable=False)
+    currency = Column(String(3), default='USD')
+    
+    # Quantity & delivery
+    quantity_offered_kg = Column(Numeric(10, 2), nullable=False)
+    lead_time_days = Column(Integer, nullable=False)
+    delivery_date = Column(DateTime)
+    
+    # Terms
+    incoterm = Column(String(10))
+    payment_terms = Column(String(100))
+    validity_days = Column(Integer, default=30)
+    valid_until = Column(DateTime)
+    
+    # Specifications offered
+    offered_specs = Column(JSON, default={})
+    
+    # Auto-bid metadata
+    is_auto_bid = Column(Boolean, default=False)
+    auto_bid_params = Column(JSON)
+    
+    # Status (the bid_status type of db/schema.sql, stored by value)
+    status = Column(
+        SQLEnum(BidStatus, name="bid_status", values_callable=lambda statuses: [s.value for s in statuses]),
+        default=BidStatus.DRAFT
+    )
+    submitted_at = Column(DateTime)
+    reviewed_at = Column(DateTime)
+    
+    # Ranking in this RFQ
+    rank = Column(Integer)
+    score = Column(Numeric(5, 4))
+    
+    # Award
+    is_awarded = Column(Boolean, default=False)
+    awarded_at = Column(DateTime)
+    
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        # At most one auto-bid per seller and RFQ
+        Index('bids_auto_bid_rfq_seller_key', 'rfq_id', 'seller_company_id',
+              unique=True, postgresql_where=text('is_auto_bid')),
+    )
+    
+    # Relationships
+    rfq = relationship("RFQ", back_populates="bids")
+    seller = relationship("Company", foreign_keys=[seller_company_id])
+    sku = relationship("SKU")
@@ -83,6 +83,30 @@ class RFQResponse(BaseModel):
         from_attributes = True
 
 
+class RFQBatchMatchRequest(BaseModel):
+    """Schema for matching many RFQs at once"""
+    rfq_ids: List[UUID] = Field(..., min_length=1, max_length=500)
+
+
+class RFQBatchMatchResponse(BaseModel):
+    """Schema for a queued batch matching job"""
+    task_id: Optional[str] = None  # None when every RFQ already had a pending job
+    total_rfqs: int
+    queued_rfq_ids: List[UUID]
+    already_queued_rfq_ids: List[UUID]
+
+
+class SpecParseBatchRequest(BaseModel):
+    """Schema for parsing many specifications at once (bulk RFQ import)"""
+    specifications: List[str] = Field(..., min_length=1, max_length=1000)
+
+
+class SpecParseBatchResponse(BaseModel):
+    """Parsed specs in request order"""
+    total_specs: int
+    results: List[Dict]
+
+
 class MatchExplanation(BaseModel):
     """Explanation for a seller match"""
     spec_match: float = Field(..., ge=0, le=1)
@@ -0,0 +1,218 @@
+"""
+Auto-bid Service
+Turns auto-bid eligible matches into submitted bids right after matching
+"""
+from typing import Dict, List, Optional
+from uuid import UUID
+from decimal import Decimal, ROUND_DOWN
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+import uuid
+from loguru import logger
+
+from app.models.company import SKU
+from app.models.rfq import RFQ, Bid, BidStatus
+from app.core.config import settings
+from app.services.catalog_index import catalog_index
+
+
+CENTS = Decimal("0.01")
+VALIDITY_DAYS = 30
+
+# Offer columns rewritten when a pending auto-bid is refreshed by a re-match
+REFRESHED_COLUMNS = (
+    "sku_id",
+    "unit_price_usd",
+    "total_price_usd",
+    "quantity_offered_kg",
+    "lead_time_days",
+    "delivery_date",
+    "incoterm",
+    "payment_terms",
+    "valid_until",
+    "offered_specs",
+    "auto_bid_params",
+    "score",
+    "updated_at",
+)
+
+
+class AutoBidService:
+    """
+    Writes bids on behalf of sellers for their auto-bid eligible matches
+
+    One bid per seller and RFQ, for the seller's best-ranked eligible
+    SKU, priced at the match's recommended price capped at
+    MAX_AUTO_BID_MARGIN over the SKU's base price. All bids of a
+    matching run are written with one multi-row upsert on the seller's
+    auto-bid for the RFQ, so re-running matching (or running the stage
+    twice) never duplicates bids. An auto-bid still pending review
+    (submitted) is refreshed with the new offer; one the buyer has
+    reviewed, accepted or rejected, or the seller withdrew, is kept.
+    """
+
+    async def generate_bids(
+        self,
+        rfqs: List[RFQ],
+        matches_by_rfq: Dict[UUID, List[Dict]],
+        db: AsyncSession,
+        skus: Optional[Dict[UUID, SKU]] = None
+    ) -> List[Dict]:
+        """
+        Write auto-bids for eligible matches in the caller's transaction
+
+        ``skus`` are the candidate SKUs already loaded by matching; any
+        other matched SKU is read from the catalog index or with one
+        IN-list query. Runs in a savepoint, so a failure is logged and
+        rolls back the bids only, never the matches written before them.
+        Returns the bid rows built (including any that an earlier run
+        already wrote).
+        """
+        if not settings.ENABLE_AUTO_BIDDING:
+            return []
+
+        eligible = {
+            rfq.id: self._best_per_seller(matches_by_rfq.get(rfq.id, []))
+            for rfq in rfqs
+        }
+        sku_ids = {m["sku_id"] for matches in eligible.values() for m in matches}
+        if not sku_ids:
+            return []
+
+        try:
+            async with db.begin_nested():
+                return await self._write_bids(rfqs, eligible, sku_ids, skus or {}, db)
+        except Exception as e:
+            logger.error(f"❌ Auto-bid generation failed, matches kept without bids: {e}")
+            return []
+
+    async def _write_bids(
+        self,
+        rfqs: List[RFQ],
+        eligible: Dict[UUID, List[Dict]],
+        sku_ids: set,
+        loaded: Dict[UUID, SKU],
+        db: AsyncSession
+    ) -> List[Dict]:
+        """Build and upsert the bid rows of all RFQs in one statement"""
+        skus = await self._load_skus(sku_ids, loaded, db)
+
+        now = datetime.utcnow()
+        rows = []
+        for rfq in rfqs:
+            for m in eligible[rfq.id]:
+                row = self._build_bid(rfq, m, skus.get(m["sku_id"]), now)
+                if row is not None:
+                    rows.append(row)
+        if not rows:
+            return []
+
+        statement = insert(Bid).values(rows)
+        excluded = statement.excluded
+        statement = statement.on_conflict_do_update(
+            index_elements=[Bid.rfq_id, Bid.seller_company_id],
+            index_where=Bid.is_auto_bid,
+            set_={column: getattr(excluded, column) for column in REFRESHED_COLUMNS},
+            where=and_(
+                Bid.status == BidStatus.SUBMITTED,
+                or_(
+                    Bid.sku_id.is_distinct_from(excluded.sku_id),
+                    Bid.unit_price_usd.is_distinct_from(excluded.unit_price_usd),
+                    Bid.quantity_offered_kg.is_distinct_from(excluded.quantity_offered_kg),
+                    Bid.score.is_distinct_from(excluded.score),
+                ),
+            ),
+        )
+        await db.execute(statement)
+
+        logger.info(f"🤖 Auto-bids written: {len(rows)} bids for {len(rfqs)} RFQs")
+        return rows
+
+    def _best_per_seller(self, matches: List[Dict]) -> List[Dict]:
+        """Each seller's best-ranked eligible match"""
+        best = {}
+        for m in sorted(matches, key=lambda m: m["rank"]):
+            if m["auto_bid_eligible"]:
+                best.setdefault(m["seller_company_id"], m)
+        return list(best.values())
+
+    async def _load_skus(
+        self,
+        sku_ids: set,
+        loaded: Dict[UUID, SKU],
+        db: AsyncSession
+    ) -> Dict[UUID, SKU]:
+        """Matched SKUs, from the given map, the catalog index or PostgreSQL"""
+        skus = {sku_id: loaded[sku_id] for sku_id in sku_ids if sku_id in loaded}
+        missing = sku_ids - skus.keys()
+        if missing and catalog_index.loaded:
+            skus.update(catalog_index.get_many(missing))
+            missing = sku_ids - skus.keys()
+        if missing:
+            result = await db.execute(select(SKU).where(SKU.id.in_(missing)))
+            skus.update({sku.id: sku for sku in result.scalars().all()})
+        return skus
+
+    def _build_bid(
+        self,
+        rfq: RFQ,
+        match: Dict,
+        sku: Optional[SKU],
+        now: datetime
+    ) -> Optional[Dict]:
+        """
+        Bid row for one eligible match
+
+        Skipped when the SKU lacks the base price the margin guardrail
+        needs or the lead time a bid must state.
+        """
+        if sku is None or not sku.base_price_usd or not sku.lead_time_days:
+            return None
+
+        max_price = (sku.base_price_usd * (1 + Decimal(str(settings.MAX_AUTO_BID_MARGIN)))).quantize(
+            CENTS, ROUND_DOWN
+        )
+        unit_price = min(match["recommended_price_usd"], max_price).quantize(CENTS)
+
+        return {
+            "id": uuid.uuid4(),
+            "bid_number": f"BID-{now.strftime('%Y%m%d')}-{uuid.uuid4().hex[:8].upper()}",
+            "rfq_id": rfq.id,
+            "seller_company_id": match["seller_company_id"],
+            "sku_id": sku.id,
+            "unit_price_usd": unit_price,
+            "total_price_usd": (unit_price * rfq.quantity_required_kg).quantize(CENTS),
+            "currency": "USD",
+            "quantity_offered_kg": rfq.quantity_required_kg,
+            "lead_time_days": sku.lead_time_days,
+            "delivery_date": now + timedelta(days=sku.lead_time_days),
+            "incoterm": rfq.incoterm,
+            "payment_terms": rfq.payment_terms,
+            "validity_days": VALIDITY_DAYS,
+            "valid_until": now + timedelta(days=VALIDITY_DAYS),
+            "offered_specs": {
+                "grade": sku.grade,
+                "assay_min": float(sku.assay_min) if sku.assay_min is not None else None,
+                "form": sku.form,
+                "certifications": sku.certifications or [],
+            },
+            "is_auto_bid": True,
+            "auto_bid_params": {
+                "match_score": float(match["match_score"]),
+                "match_rank": match["rank"],
+                "base_price_usd": float(sku.base_price_usd),
+                "recommended_price_usd": float(match["recommended_price_usd"]),
+                "max_margin": settings.MAX_AUTO_BID_MARGIN,
+            },
+            "status": BidStatus.SUBMITTED,
+            "submitted_at": now,
+            "score": match["match_score"],
+            "created_at": now,
+            "updated_at": now,
+        }
+
+
+# Global auto-bid service instance
+auto_bid_service = AutoBidService()
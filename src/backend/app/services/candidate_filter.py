@@ -0,0 +1,225 @@
+"""
+Candidate Filter
+Spec constraints pushed into candidate retrieval, as a PostgreSQL query
+and as the equivalent in-memory check for the catalog index
+"""
+from typing import Dict, Optional, Tuple
+from decimal import Decimal
+from sqlalchemy import select, exists, case, and_, or_, literal, Float
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.core.config import settings
+from app.ml.ranker import FEATURE_WEIGHTS, get_ranker
+from app.ml.seller_features import SellerFeatures
+from app.models.company import Company, SKU
+from app.services.substitute_expander import substitute_expander
+
+
+# Assay credit as BatchScorer._spec_match gives it: full at the required
+# minimum, partial down to 95% of it, none below
+ASSAY_RELAXATION = Decimal("0.95")
+RELAXED_ASSAY_CREDIT = 0.8
+
+# Slack for float rounding in the weighted sum, so a candidate whose
+# bound sits exactly on MIN_MATCH_SCORE is never dropped
+BOUND_TOLERANCE = 1e-9
+
+
+class CandidateFilter:
+    """
+    Candidate constraints derived from an RFQ
+
+    The candidate set is selected by ontology node (indexed equality on
+    skus.ontology_node_id, including substitutes) when the RFQ resolved
+    to a node, plus SKUs without a node by ingredient substring;
+    otherwise by ingredient substring alone. Then by grade.
+
+    With MATCH_SPEC_PREFILTER, candidates that cannot reach
+    MIN_MATCH_SCORE are also excluded: the score lost to assay and
+    certification shortfalls is computed per SKU, every other term is
+    taken at its maximum, and the SKU is dropped only when that upper
+    bound is below the threshold. Matches are therefore identical with
+    and without the prefilter. It is skipped for learned rankers (no
+    bound) and when no shortfall could rule a candidate out.
+    """
+
+    def __init__(
+        self,
+        ingredient: Optional[str] = None,
+        grade: Optional[str] = None,
+        assay_min: Optional[Decimal] = None,
+        spec_checks: int = 0,
+        certifications: Tuple[str, ...] = (),
+        max_shortfall: Optional[float] = None,
+        ontology_factors: Optional[Dict[str, float]] = None
+    ):
+        self.ingredient = ingredient
+        self.grade = grade
+        self.assay_min = assay_min
+        self.spec_checks = spec_checks
+        self.certifications = certifications
+        self.max_shortfall = max_shortfall
+        self.ontology_factors = ontology_factors or {}
+
+    @classmethod
+    def from_rfq(cls, rfq) -> "CandidateFilter":
+        parsed_specs = rfq.parsed_specs or {}
+        candidate_filter = cls(
+            ingredient=parsed_specs.get("ingredient"),
+            grade=parsed_specs.get("grade")
+        )
+        if not settings.MATCH_SPEC_PREFILTER or not get_ranker().supports_bounds:
+            return candidate_filter
+
+        bounded = cls(
+            ingredient=candidate_filter.ingredient,
+            grade=candidate_filter.grade,
+            assay_min=Decimal(str(parsed_specs["assay_min"])) if parsed_specs.get("assay_min") else None,
+            # Checks the spec score averages over, as BatchScorer._spec_match counts them
+            spec_checks=sum(1 for field in ("grade", "assay_min", "form") if parsed_specs.get(field)),
+            certifications=tuple(sorted(set(parsed_specs.get("certifications_required") or []))),
+            max_shortfall=sum(FEATURE_WEIGHTS.values()) - settings.MIN_MATCH_SCORE + BOUND_TOLERANCE
+        )
+        # Worst case still reaches the threshold: nothing to exclude
+        worst = bounded._assay_shortfall(0.0) + bounded._certification_shortfall(len(bounded.certifications))
+        if worst <= bounded.max_shortfall:
+            return candidate_filter
+        return bounded
+
+    @classmethod
+    async def resolve(cls, rfq) -> "CandidateFilter":
+        """from_rfq plus the ontology nodes (and substitutes) to retrieve"""
+        candidate_filter = cls.from_rfq(rfq)
+        if settings.MATCH_BY_ONTOLOGY:
+            candidate_filter.ontology_factors = await substitute_expander.score_factors(
+                rfq.parsed_specs or {}
+            )
+        return candidate_filter
+
+    @property
+    def key(self) -> Tuple:
+        """Identifies the candidate set (RFQs with equal keys share one load)"""
+        return (
+            (self.ingredient or "").lower(),
+            self.grade,
+            self.assay_min,
+            self.spec_checks,
+            self.certifications,
+            self.max_shortfall,
+            tuple(sorted(self.ontology_factors.items())),
+        )
+
+    @property
+    def parsed_specs(self) -> Dict:
+        """Ingredient or ontology nodes and grade, in the shape the catalog index resolves"""
+        return {
+            "ingredient": self.ingredient,
+            "grade": self.grade,
+            "ontology_node_ids": list(self.ontology_factors),
+        }
+
+    def query(self):
+        """Candidate SKU query with every constraint evaluated by PostgreSQL"""
+        query = select(SKU).where(SKU.is_active == True)
+
+        # Filter by ontology node (b-tree equality), else ingredient substring
+        if self.ontology_factors:
+            by_node = SKU.ontology_node_id.in_(list(self.ontology_factors))
+            if self.ingredient:
+                # SKUs not mapped to a node yet are still matched by name
+                by_node = or_(by_node, and_(
+                    SKU.ontology_node_id.is_(None),
+                    SKU.ingredient_name.ilike(f"%{self.ingredient}%")
+                ))
+            query = query.where(by_node)
+        elif self.ingredient:
+            query = query.where(SKU.ingredient_name.ilike(f"%{self.ingredient}%"))
+
+        # Filter by grade
+        if self.grade:
+            query = query.where(SKU.grade == self.grade)
+
+        if self.max_shortfall is not None:
+            query = query.where(self._shortfall_expression() <= literal(self.max_shortfall, Float()))
+
+        return query
+
+    def selects(self, sku: SKU) -> bool:
+        """Whether the SKU belongs to the candidate set (ignoring the prefilter)"""
+        if not sku.is_active:
+            return False
+        if self.ontology_factors and sku.ontology_node_id is not None:
+            if sku.ontology_node_id not in self.ontology_factors:
+                return False
+        elif self.ontology_factors and not self.ingredient:
+            return False
+        elif self.ingredient and self.ingredient.lower() not in (sku.ingredient_name or "").lower():
+            return False
+        return not self.grade or sku.grade == self.grade
+
+    def admits(self, sku: SKU, seller: Optional[SellerFeatures]) -> bool:
+        """In-memory equivalent of the prefilter's score bound"""
+        if self.max_shortfall is None:
+            return True
+
+        shortfall = 0.0
+        if self.assay_min is not None:
+            shortfall += self._assay_shortfall(self._assay_credit(sku.assay_min))
+
+        if self.certifications:
+            held = set(sku.certifications or [])
+            if seller is not None:
+                held.update(seller.certifications or [])
+            shortfall += self._certification_shortfall(len(set(self.certifications) - held))
+
+        return shortfall <= self.max_shortfall
+
+    def _assay_thresholds(self) -> Tuple[float, float]:
+        """Full and relaxed assay bounds, in floats as the batch scorer compares them"""
+        return float(self.assay_min), float(self.assay_min * ASSAY_RELAXATION)
+
+    def _assay_credit(self, assay_min: Optional[Decimal]) -> float:
+        if assay_min is None:
+            return 0.0
+        full, relaxed = self._assay_thresholds()
+        if float(assay_min) >= full:
+            return 1.0
+        return RELAXED_ASSAY_CREDIT if float(assay_min) >= relaxed else 0.0
+
+    def _assay_shortfall(self, credit: float) -> float:
+        """Weighted score lost to an assay credit below 1"""
+        if self.assay_min is None:
+            return 0.0
+        return FEATURE_WEIGHTS["spec_match"] * (1.0 - credit) / self.spec_checks
+
+    def _certification_shortfall(self, missing: int) -> float:
+        """Weighted score lost to missing required certifications"""
+        if not self.certifications:
+            return 0.0
+        return FEATURE_WEIGHTS["compliance_score"] * missing / len(self.certifications)
+
+    def _shortfall_expression(self) -> ColumnElement:
+        """SQL form of the shortfall summed by admits()"""
+        shortfall = literal(0.0, Float())
+        if self.assay_min is not None:
+            full, relaxed = self._assay_thresholds()
+            # Against float8, so NUMERIC assays compare as the batch scorer's floats do
+            shortfall = shortfall + case(
+                (SKU.assay_min >= literal(full, Float()), 0.0),
+                (SKU.assay_min >= literal(relaxed, Float()), self._assay_shortfall(RELAXED_ASSAY_CREDIT)),
+                else_=self._assay_shortfall(0.0)
+            )
+
+        # Each required certification on the SKU or its seller (GIN indexed ? on both)
+        for cert in self.certifications:
+            shortfall = shortfall + case(
+                (or_(
+                    SKU.certifications.has_key(cert),
+                    exists().where(and_(
+                        Company.id == SKU.company_id,
+                        Company.certifications.has_key(cert)
+                    ))
+                ), 0.0),
+                else_=self._certification_shortfall(1)
+            )
+        return shortfall
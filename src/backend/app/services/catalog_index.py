@@ -0,0 +1,340 @@
+"""
+In-process SKU Catalog Index
+Resident index of active SKUs used to resolve matching candidates
+without a round trip to PostgreSQL
+"""
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set
+from uuid import UUID
+from datetime import datetime, timedelta
+from collections import defaultdict
+import asyncio
+import sys
+import time
+
+from sqlalchemy import select
+from loguru import logger
+
+from app.core.config import settings
+from app.models.company import SKU
+
+
+# Re-read rows touched shortly before the last high-water mark, so rows whose
+# transaction committed after a poll began are not missed
+REFRESH_OVERLAP = timedelta(seconds=60)
+
+
+def normalize_ingredient(name: Optional[str]) -> str:
+    """Normalization key for ingredient names (case-insensitive, like ILIKE)"""
+    return (name or "").lower()
+
+
+class _Postings:
+    """Primary and secondary postings over a set of SKUs"""
+
+    def __init__(self):
+        self.skus: Dict[UUID, SKU] = {}
+        self.by_ingredient: Dict[str, Set[UUID]] = defaultdict(set)
+        self.by_ontology: Dict[str, Set[UUID]] = defaultdict(set)
+        self.unmapped: Set[UUID] = set()
+        self.by_grade: Dict[str, Set[UUID]] = defaultdict(set)
+        self.by_form: Dict[str, Set[UUID]] = defaultdict(set)
+        self.by_certification: Dict[str, Set[UUID]] = defaultdict(set)
+        self.by_company: Dict[UUID, Set[UUID]] = defaultdict(set)
+        self.approx_bytes = 0
+
+    def add(self, sku: SKU):
+        self.skus[sku.id] = sku
+        self.by_ingredient[normalize_ingredient(sku.ingredient_name)].add(sku.id)
+        if sku.ontology_node_id:
+            self.by_ontology[sku.ontology_node_id].add(sku.id)
+        else:
+            self.unmapped.add(sku.id)
+        if sku.grade:
+            self.by_grade[sku.grade].add(sku.id)
+        if sku.form:
+            self.by_form[sku.form.lower()].add(sku.id)
+        for cert in sku.certifications or []:
+            self.by_certification[cert].add(sku.id)
+        self.by_company[sku.company_id].add(sku.id)
+        self.approx_bytes += _record_size(sku)
+
+    def remove(self, sku_id: UUID) -> bool:
+        sku = self.skus.pop(sku_id, None)
+        if sku is None:
+            return False
+        _discard(self.by_ingredient, normalize_ingredient(sku.ingredient_name), sku_id)
+        _discard(self.by_ontology, sku.ontology_node_id, sku_id)
+        self.unmapped.discard(sku_id)
+        _discard(self.by_grade, sku.grade, sku_id)
+        _discard(self.by_form, sku.form.lower() if sku.form else None, sku_id)
+        for cert in sku.certifications or []:
+            _discard(self.by_certification, cert, sku_id)
+        _discard(self.by_company, sku.company_id, sku_id)
+        self.approx_bytes -= _record_size(sku)
+        return True
+
+
+def _discard(postings: Dict, key, sku_id: UUID):
+    """Remove an id from a posting list, dropping the list when empty"""
+    if key is None or key not in postings:
+        return
+    postings[key].discard(sku_id)
+    if not postings[key]:
+        del postings[key]
+
+
+def _record_size(sku: SKU) -> int:
+    """Approximate resident size of one indexed SKU in bytes"""
+    size = sys.getsizeof(sku)
+    for column in SKU.__table__.columns.keys():
+        size += sys.getsizeof(getattr(sku, column, None))
+    # One slot in the id map plus roughly six posting-set entries
+    return size + 7 * 64
+
+
+class CatalogIndex:
+    """
+    Resident index of active SKUs
+
+    Keyed by normalized ingredient name and ontology node id, with
+    secondary postings by grade, form, certification and seller. Loaded
+    once at startup and kept fresh by polling ``skus.updated_at``.
+    """
+
+    def __init__(self):
+        self._postings = _Postings()
+        self._ingredient_keys_cache: Dict[str, List[str]] = {}
+        self._high_water: Optional[datetime] = None
+        # updated_at of inactive rows already applied, while still inside the overlap window
+        self._retired: Dict[UUID, datetime] = {}
+        self._loaded_at: Optional[float] = None
+        self._refreshed_at: Optional[float] = None
+        self._refresh_failures = 0
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[List[SKU], object], Awaitable]] = []
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the index holds a full catalog snapshot"""
+        return self._loaded_at is not None
+
+    async def load(self, db) -> int:
+        """Full load of all active SKUs, swapped in atomically"""
+        started = time.perf_counter()
+        result = await db.execute(select(SKU).where(SKU.is_active == True))
+        skus = result.scalars().all()
+
+        postings = _Postings()
+        high_water = None
+        for sku in skus:
+            postings.add(sku)
+            if sku.updated_at and (high_water is None or sku.updated_at > high_water):
+                high_water = sku.updated_at
+
+        self._postings = postings
+        self._ingredient_keys_cache = {}
+        self._high_water = high_water
+        self._loaded_at = self._refreshed_at = time.time()
+
+        logger.info(
+            f"📚 Catalog index loaded: {len(skus)} SKUs "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+        return len(skus)
+
+    async def reload(self, db) -> List[SKU]:
+        """
+        Full load, returning the SKUs that differ from the previous snapshot
+
+        SKUs no longer active (deactivated or deleted) are returned as
+        their last indexed row, marked inactive.
+        """
+        previous = self._postings.skus
+        await self.load(db)
+        current = self._postings.skus
+
+        changed = [
+            sku for sku_id, sku in current.items()
+            if sku_id not in previous or previous[sku_id].updated_at != sku.updated_at
+        ]
+        for sku_id, sku in previous.items():
+            if sku_id not in current:
+                sku.is_active = False
+                changed.append(sku)
+        self._prune_retired()
+        return changed
+
+    async def refresh(self, db) -> List[SKU]:
+        """
+        Apply SKUs changed since the last poll
+
+        The poll re-reads an overlap window before the high-water mark, so
+        rows whose ``(id, updated_at)`` was already applied are skipped.
+        Returns only the newly applied rows (including deactivated ones).
+        """
+        query = select(SKU)
+        if self._high_water:
+            query = query.where(SKU.updated_at >= self._high_water - REFRESH_OVERLAP)
+
+        result = await db.execute(query)
+
+        changed = []
+        for sku in result.scalars().all():
+            if sku.updated_at is not None and self._applied_at(sku.id) == sku.updated_at:
+                continue
+            changed.append(sku)
+            self._postings.remove(sku.id)
+            if sku.is_active:
+                self._postings.add(sku)
+                self._retired.pop(sku.id, None)
+            else:
+                self._retired[sku.id] = sku.updated_at
+            if sku.updated_at and (self._high_water is None or sku.updated_at > self._high_water):
+                self._high_water = sku.updated_at
+
+        if changed:
+            self._ingredient_keys_cache = {}
+        self._prune_retired()
+
+        self._refreshed_at = time.time()
+        return changed
+
+    def _applied_at(self, sku_id: UUID) -> Optional[datetime]:
+        """updated_at of the row last applied for a SKU, if known"""
+        sku = self._postings.skus.get(sku_id)
+        if sku is not None:
+            return sku.updated_at
+        return self._retired.get(sku_id)
+
+    def _prune_retired(self):
+        """Forget inactive rows the overlap window can no longer return"""
+        if self._high_water is None:
+            return
+        cutoff = self._high_water - REFRESH_OVERLAP
+        self._retired = {
+            sku_id: updated_at
+            for sku_id, updated_at in self._retired.items()
+            if updated_at is not None and updated_at >= cutoff
+        }
+
+    def add_listener(self, callback: Callable[[List[SKU], object], Awaitable]):
+        """
+        Register a coroutine called after each refresh or full reload
+
+        Called as ``callback(changed_skus, db)`` with the SKUs not yet
+        reported, inside the refresh session, which is committed once all
+        listeners have run.
+        """
+        self._listeners.append(callback)
+
+    def candidates(self, parsed_specs: Dict) -> List[SKU]:
+        """
+        Resolve the active SKUs matching an RFQ's parsed specs
+
+        Same semantics as the SQL candidate query: ontology node ids when
+        given (plus SKUs not mapped to a node, by ingredient substring),
+        otherwise ingredient substring match, and exact grade.
+        """
+        postings = self._postings
+
+        if parsed_specs.get("ontology_node_ids"):
+            ids = set()
+            for node_id in parsed_specs["ontology_node_ids"]:
+                ids |= postings.by_ontology.get(node_id, set())
+            if parsed_specs.get("ingredient"):
+                ids |= self._ingredient_ids(parsed_specs["ingredient"]) & postings.unmapped
+        elif parsed_specs.get("ingredient"):
+            ids = self._ingredient_ids(parsed_specs["ingredient"])
+        else:
+            ids = set(postings.skus)
+
+        if parsed_specs.get("grade"):
+            ids &= postings.by_grade.get(parsed_specs["grade"], set())
+
+        return [postings.skus[sku_id] for sku_id in ids]
+
+    def get_many(self, sku_ids: Iterable[UUID]) -> Dict[UUID, SKU]:
+        """Indexed SKUs by id (inactive or unknown ids are absent)"""
+        skus = self._postings.skus
+        return {sku_id: skus[sku_id] for sku_id in sku_ids if sku_id in skus}
+
+    def skus_of_companies(self, company_ids: Set[UUID]) -> List[SKU]:
+        """Active SKUs offered by the given sellers"""
+        postings = self._postings
+        return [
+            postings.skus[sku_id]
+            for company_id in company_ids
+            for sku_id in postings.by_company.get(company_id, ())
+        ]
+
+    def _ingredient_ids(self, ingredient: str) -> Set[UUID]:
+        """Ids of SKUs whose ingredient name contains the term"""
+        ids = set()
+        for key in self._ingredient_keys(ingredient):
+            ids |= self._postings.by_ingredient.get(key, set())
+        return ids
+
+    def _ingredient_keys(self, ingredient: str) -> List[str]:
+        """Ingredient keys containing the term, memoized per term"""
+        term = normalize_ingredient(ingredient)
+        keys = self._ingredient_keys_cache.get(term)
+        if keys is None:
+            keys = [key for key in self._postings.by_ingredient if term in key]
+            self._ingredient_keys_cache[term] = keys
+        return keys
+
+    def metrics(self) -> Dict:
+        """Size, memory and staleness metrics"""
+        postings = self._postings
+        now = time.time()
+        return {
+            "loaded": self.loaded,
+            "sku_count": len(postings.skus),
+            "ingredient_keys": len(postings.by_ingredient),
+            "ontology_keys": len(postings.by_ontology),
+            "unmapped_skus": len(postings.unmapped),
+            "approx_memory_bytes": postings.approx_bytes,
+            "high_water_updated_at": self._high_water.isoformat() if self._high_water else None,
+            "seconds_since_refresh": round(now - self._refreshed_at, 3) if self._refreshed_at else None,
+            "seconds_since_full_load": round(now - self._loaded_at, 3) if self._loaded_at else None,
+            "refresh_failures": self._refresh_failures,
+        }
+
+    async def start(self, session_factory):
+        """Load the catalog and start the background refresh loop"""
+        async with session_factory() as db:
+            await self.load(db)
+        self._refresh_task = asyncio.create_task(self._refresh_loop(session_factory))
+
+    async def stop(self):
+        """Stop the background refresh loop"""
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    async def _refresh_loop(self, session_factory):
+        """Poll for changed SKUs, with a periodic full reload to drop deleted rows"""
+        while True:
+            await asyncio.sleep(settings.CATALOG_INDEX_REFRESH_SECONDS)
+            try:
+                async with session_factory() as db:
+                    if time.time() - self._loaded_at >= settings.CATALOG_INDEX_FULL_RELOAD_SECONDS:
+                        changed = await self.reload(db)
+                    else:
+                        changed = await self.refresh(db)
+                    if changed:
+                        logger.info(f"Catalog index refreshed: {len(changed)} SKUs changed")
+                    for callback in self._listeners:
+                        await callback(changed, db)
+                    await db.commit()
+            except Exception as e:
+                self._refresh_failures += 1
+                logger.error(f"❌ Catalog index refresh failed: {e}")
+
+
+# Global catalog index instance
+catalog_index = CatalogIndex()
@@ -0,0 +1,434 @@
+"""
+Incremental Re-matching
+Keeps open RFQ matches current when SKUs or sellers change, rescoring
+only the changed SKUs against the RFQs they can match
+"""
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID, uuid4
+from datetime import datetime
+from collections import defaultdict
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+from loguru import logger
+
+from app.models.company import Company, SKU
+from app.models.rfq import RFQ, RFQMatch, RFQStatus
+from app.core.config import settings
+from app.core.redis_client import redis_client
+from app.ml.batch_scorer import CandidateBatch, batch_scorer
+from app.ml.seller_features import SellerFeatures
+from app.services.catalog_index import REFRESH_OVERLAP, normalize_ingredient
+from app.services.candidate_filter import CandidateFilter
+from app.services.matching_service import MatchingService
+from app.services.seller_feature_store import seller_feature_store
+from app.services.auto_bid_service import auto_bid_service
+
+
+# RFQs whose matches are still used to invite and rank sellers
+OPEN_STATUSES = (RFQStatus.PUBLISHED, RFQStatus.MATCHING, RFQStatus.BIDDING)
+
+# Change cursors shared by every matching worker, and the lock held during a pass
+CURSOR_KEY = "matching:rematch:cursor"
+LOCK_KEY = "matching:rematch:lock"
+
+
+class ChangeCursor:
+    """
+    Position in a table's ``updated_at`` change stream
+
+    Polls re-read REFRESH_OVERLAP before the high-water mark, so rows
+    whose transaction committed after a poll began are not missed. Rows
+    already applied at the same ``updated_at`` are remembered until they
+    leave that window, so they are reported once.
+    """
+
+    def __init__(self, high_water: Optional[datetime] = None, applied: Optional[Dict[str, datetime]] = None):
+        self.high_water = high_water
+        self.applied = applied or {}
+
+    @property
+    def since(self) -> Optional[datetime]:
+        """Lower bound of the next poll"""
+        return self.high_water - REFRESH_OVERLAP if self.high_water else None
+
+    def advance(self, rows: Iterable[Tuple[UUID, Optional[datetime]]]) -> Set[UUID]:
+        """Ids of the polled ``(id, updated_at)`` rows not applied yet"""
+        new = set()
+        for row_id, updated_at in rows:
+            if updated_at is not None and self.applied.get(str(row_id)) == updated_at:
+                continue
+            new.add(row_id)
+            if updated_at is None:
+                continue
+            self.applied[str(row_id)] = updated_at
+            if self.high_water is None or updated_at > self.high_water:
+                self.high_water = updated_at
+
+        if self.high_water is not None:
+            self.applied = {
+                row_id: updated_at
+                for row_id, updated_at in self.applied.items()
+                if updated_at >= self.since
+            }
+        return new
+
+    def to_dict(self) -> Dict:
+        return {
+            "high_water": self.high_water.isoformat() if self.high_water else None,
+            "applied": {row_id: updated_at.isoformat() for row_id, updated_at in self.applied.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ChangeCursor":
+        return cls(
+            high_water=datetime.fromisoformat(data["high_water"]) if data.get("high_water") else None,
+            applied={row_id: datetime.fromisoformat(value) for row_id, value in data.get("applied", {}).items()},
+        )
+
+
+class IncrementalMatcher:
+    """
+    Reverse index from ingredient term and grade to open RFQ ids
+
+    A changed SKU can only enter or leave the candidate set of RFQs whose
+    ingredient term it contains and whose grade (if any) it has, so only
+    those RFQs are touched. Their stored rows are patched with the SKU's
+    new score and re-ranked, then written back with the same bulk upsert
+    and cache format as a full match.
+
+    Runs as a periodic job in one matching worker at a time (see
+    ``run``), not in the API processes.
+    """
+
+    def __init__(self, matching_service: Optional[MatchingService] = None):
+        self.matching_service = matching_service or MatchingService()
+        self._rfqs_by_term: Dict[str, Dict[Optional[str], Set[UUID]]] = defaultdict(lambda: defaultdict(set))
+        self._key_by_rfq: Dict[UUID, Tuple[str, Optional[str]]] = {}
+        self._longest_term = 0
+        self._rfqs_by_node: Dict[str, Set[UUID]] = defaultdict(set)
+        self._node_by_rfq: Dict[UUID, str] = {}
+        self._rfq_high_water: Optional[datetime] = None
+        self._loaded = False
+
+    def track(self, rfq: RFQ):
+        """Index an open RFQ (or drop it once it is no longer open)"""
+        self.untrack(rfq.id)
+        if rfq.status not in OPEN_STATUSES:
+            return
+        parsed_specs = rfq.parsed_specs or {}
+        term, grade = normalize_ingredient(parsed_specs.get("ingredient")), parsed_specs.get("grade")
+        self._rfqs_by_term[term][grade].add(rfq.id)
+        self._key_by_rfq[rfq.id] = (term, grade)
+        self._longest_term = max(self._longest_term, len(term))
+        node_id = parsed_specs.get("ontology_node_id")
+        if node_id:
+            self._rfqs_by_node[node_id].add(rfq.id)
+            self._node_by_rfq[rfq.id] = node_id
+
+    def untrack(self, rfq_id: UUID):
+        """Remove an RFQ from the reverse index"""
+        node_id = self._node_by_rfq.pop(rfq_id, None)
+        if node_id is not None:
+            self._rfqs_by_node[node_id].discard(rfq_id)
+            if not self._rfqs_by_node[node_id]:
+                del self._rfqs_by_node[node_id]
+
+        key = self._key_by_rfq.pop(rfq_id, None)
+        if key is None:
+            return
+        term, grade = key
+        by_grade = self._rfqs_by_term[term]
+        by_grade[grade].discard(rfq_id)
+        if not by_grade[grade]:
+            del by_grade[grade]
+        if not by_grade:
+            del self._rfqs_by_term[term]
+
+    def affected_rfqs(self, sku: SKU) -> Set[UUID]:
+        """
+        Open RFQs whose candidate set can contain the SKU
+
+        By ingredient term and grade, plus RFQs resolved to the SKU's
+        ontology node (substitute targets are not tracked).
+        """
+        rfq_ids = set(self._rfqs_by_node.get(sku.ontology_node_id, ()))
+        for term in self._terms_in(normalize_ingredient(sku.ingredient_name)):
+            by_grade = self._rfqs_by_term[term]
+            rfq_ids |= by_grade.get(None, set())
+            if sku.grade is not None:
+                rfq_ids |= by_grade.get(sku.grade, set())
+        return rfq_ids
+
+    def _terms_in(self, name: str) -> Set[str]:
+        """Tracked ingredient terms contained in a SKU's ingredient name"""
+        terms = self._rfqs_by_term
+        # RFQs without an ingredient match every SKU
+        found = {""} if "" in terms else set()
+        for start in range(len(name)):
+            for end in range(start + 1, min(len(name), start + self._longest_term) + 1):
+                if name[start:end] in terms:
+                    found.add(name[start:end])
+        return found
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    async def load(self, db: AsyncSession) -> int:
+        """Index all open RFQs"""
+        result = await db.execute(select(RFQ).where(RFQ.status.in_(OPEN_STATUSES)))
+        rfqs = result.scalars().all()
+
+        self._rfqs_by_term = defaultdict(lambda: defaultdict(set))
+        self._key_by_rfq = {}
+        self._longest_term = 0
+        self._rfqs_by_node = defaultdict(set)
+        self._node_by_rfq = {}
+        for rfq in rfqs:
+            self.track(rfq)
+            if rfq.updated_at and (self._rfq_high_water is None or rfq.updated_at > self._rfq_high_water):
+                self._rfq_high_water = rfq.updated_at
+        self._loaded = True
+
+        logger.info(f"🔁 Incremental matcher tracking {len(self._key_by_rfq)} open RFQs")
+        return len(self._key_by_rfq)
+
+    async def run(self, db: AsyncSession) -> Dict[UUID, List[Dict]]:
+        """
+        One re-match pass over SKUs and sellers changed since the last pass
+
+        Called periodically by a matching worker. The change cursors live
+        in Redis, so whichever worker process runs the next pass resumes
+        where this one stopped, and a Redis lock keeps passes from
+        overlapping. Commits before the cursors advance, so a failed pass
+        is retried by the next one.
+        """
+        # Released only by its holder, so an expired pass cannot drop the next one's lock
+        token = uuid4().hex
+        if not await redis_client.set_if_absent(LOCK_KEY, token, expire=settings.MATCHING_JOB_TIME_LIMIT):
+            logger.info("Incremental re-match already running")
+            return {}
+
+        try:
+            if self._loaded:
+                await self._refresh_rfqs(db)
+            else:
+                await self.load(db)
+
+            state = await redis_client.get(CURSOR_KEY)
+            if state:
+                sku_cursor = ChangeCursor.from_dict(state["skus"])
+                company_cursor = ChangeCursor.from_dict(state["companies"])
+            else:
+                # First pass: start from the current catalog, which full matches already saw
+                sku_cursor = await self._start_cursor(SKU, db)
+                company_cursor = await self._start_cursor(Company, db)
+
+            skus = {sku.id: sku for sku in await self._changed_skus(sku_cursor, db)}
+            for sku in await self._skus_of_changed_sellers(company_cursor, db):
+                skus.setdefault(sku.id, sku)
+
+            results = await self.apply_changes(list(skus.values()), db) if skus else {}
+            await db.commit()
+            await self.matching_service.publish_matches(results)
+            await redis_client.set(
+                CURSOR_KEY, {"skus": sku_cursor.to_dict(), "companies": company_cursor.to_dict()}
+            )
+            return results
+        finally:
+            await redis_client.delete_if_equal(LOCK_KEY, token)
+
+    async def apply_changes(
+        self,
+        skus: List[SKU],
+        db: AsyncSession
+    ) -> Dict[UUID, List[Dict]]:
+        """
+        Patch stored matches of affected open RFQs for changed SKUs
+
+        Inactive SKUs are removed from the rankings; active ones are
+        rescored and inserted, moved or dropped. Returns the new matches
+        keyed by RFQ id.
+        """
+        changed_by_rfq = defaultdict(list)
+        for sku in skus:
+            for rfq_id in self.affected_rfqs(sku):
+                changed_by_rfq[rfq_id].append(sku)
+        if not changed_by_rfq:
+            return {}
+
+        service = self.matching_service
+
+        result = await db.execute(
+            select(RFQ).where(
+                RFQ.id.in_(set(changed_by_rfq)),
+                RFQ.status.in_(OPEN_STATUSES)
+            )
+        )
+        rfqs = result.scalars().all()
+        if not rfqs:
+            return {}
+
+        # In rank order, so ties stay where the last ranking put them
+        result = await db.execute(
+            select(RFQMatch)
+            .where(RFQMatch.rfq_id.in_({rfq.id for rfq in rfqs}))
+            .order_by(RFQMatch.rank, RFQMatch.sku_id)
+        )
+        stored = defaultdict(list)
+        for row in result.scalars().all():
+            stored[row.rfq_id].append(row)
+
+        sellers = await service._load_sellers(
+            [sku for sku in skus if sku.is_active], db
+        )
+
+        results = {}
+        rematch = []
+        for rfq in rfqs:
+            candidate_filter = await CandidateFilter.resolve(rfq)
+            matches = self._patch(
+                rfq, candidate_filter, changed_by_rfq[rfq.id], stored[rfq.id], sellers
+            )
+            if matches is None:
+                rematch.append(rfq)
+            else:
+                results[rfq.id] = matches
+
+        if results:
+            await service._persist_matches(results, db)
+            await auto_bid_service.generate_bids(
+                [rfq for rfq in rfqs if rfq.id in results], results, db, {sku.id: sku for sku in skus}
+            )
+        if rematch:
+            # A top-K list lost a member; the replacement is outside the stored rows
+            results.update(await service._match_rfqs(rematch, db))
+
+        logger.info(
+            f"🔁 Incremental re-match: {len(skus)} changed SKUs, "
+            f"{len(results)} RFQs updated ({len(rematch)} fully re-matched)"
+        )
+        return results
+
+    def _patch(
+        self,
+        rfq: RFQ,
+        candidate_filter: CandidateFilter,
+        changed: List[SKU],
+        stored: List[RFQMatch],
+        sellers: Dict[UUID, SellerFeatures]
+    ) -> Optional[List[Dict]]:
+        """
+        Stored matches of one RFQ with the changed SKUs rescored
+
+        Returns None when the result cannot be derived from the stored
+        rows (a full top-K list lost or demoted a member).
+        """
+        changed_ids = {sku.id for sku in changed}
+        previous = {row.sku_id: row.match_score for row in stored}
+        position = {row.sku_id: i for i, row in enumerate(stored)}
+        matches = [
+            {
+                "seller_company_id": row.seller_company_id,
+                "sku_id": row.sku_id,
+                "match_score": row.match_score,
+                "rank": row.rank,
+                "explanation": row.explanation,
+                "recommended_price_usd": row.recommended_price_usd,
+                "auto_bid_eligible": row.auto_bid_eligible,
+            }
+            for row in stored
+            if row.sku_id not in changed_ids
+        ]
+
+        active = [
+            sku for sku in changed
+            if candidate_filter.selects(sku)
+            and candidate_filter.admits(sku, sellers.get(sku.company_id))
+        ]
+        batch = CandidateBatch.from_skus(active, sellers, candidate_filter.ontology_factors)
+        scores = batch_scorer.score(rfq, rfq.parsed_specs, batch)
+
+        demoted = False
+        rescored = set()
+        for idx, sku in enumerate(active):
+            if scores["passed"][idx]:
+                match = self.matching_service._build_match(rfq, batch, scores, idx, 0)
+                matches.append(match)
+                rescored.add(sku.id)
+                if sku.id in previous and match["match_score"] < previous[sku.id]:
+                    demoted = True
+        # Previously ranked SKUs that were deactivated, filtered out or fell below threshold
+        if any(sku.id in previous and sku.id not in rescored for sku in changed):
+            demoted = True
+
+        top_k = settings.MATCH_TOP_K
+        if top_k and demoted and len(stored) >= top_k:
+            return None
+
+        # As BatchScorer.rank: score descending, ties in the stored order
+        # (rescored SKUs keep their slot, new ones follow)
+        matches.sort(key=lambda m: (-m["match_score"], position.get(m["sku_id"], len(position))))
+        if top_k:
+            matches = matches[:top_k]
+        for rank, match in enumerate(matches, 1):
+            match["rank"] = rank
+        return matches
+
+    async def _refresh_rfqs(self, db: AsyncSession):
+        """Track RFQs that were published, re-specified or closed since the last poll"""
+        query = select(RFQ)
+        if self._rfq_high_water:
+            query = query.where(RFQ.updated_at >= self._rfq_high_water - REFRESH_OVERLAP)
+
+        result = await db.execute(query)
+        for rfq in result.scalars().all():
+            self.track(rfq)
+            if rfq.updated_at and (self._rfq_high_water is None or rfq.updated_at > self._rfq_high_water):
+                self._rfq_high_water = rfq.updated_at
+
+    async def _start_cursor(self, table, db: AsyncSession) -> ChangeCursor:
+        """Cursor at a table's latest change, with the overlap window already applied"""
+        result = await db.execute(select(func.max(table.updated_at)))
+        high_water = result.scalar()
+        cursor = ChangeCursor()
+        if high_water is not None:
+            result = await db.execute(
+                select(table.id, table.updated_at).where(table.updated_at >= high_water - REFRESH_OVERLAP)
+            )
+            cursor.advance(result.all())
+        return cursor
+
+    async def _changed_skus(self, cursor: ChangeCursor, db: AsyncSession) -> List[SKU]:
+        """SKUs changed since the cursor (including deactivated ones)"""
+        query = select(SKU)
+        if cursor.since:
+            query = query.where(SKU.updated_at >= cursor.since)
+
+        result = await db.execute(query)
+        skus = result.scalars().all()
+        new = cursor.advance((sku.id, sku.updated_at) for sku in skus)
+        return [sku for sku in skus if sku.id in new]
+
+    async def _skus_of_changed_sellers(self, cursor: ChangeCursor, db: AsyncSession) -> List[SKU]:
+        """Active SKUs of sellers updated since the cursor"""
+        query = select(Company.id, Company.updated_at)
+        if cursor.since:
+            query = query.where(Company.updated_at >= cursor.since)
+
+        result = await db.execute(query)
+        company_ids = cursor.advance(result.all())
+        if not company_ids:
+            return []
+
+        # Rescoring reads the feature store, which may not have polled yet
+        await seller_feature_store.refresh_companies(company_ids, db)
+
+        result = await db.execute(
+            select(SKU).where(SKU.company_id.in_(company_ids), SKU.is_active == True)
+        )
+        return result.scalars().all()
+
+
+# Global incremental matcher instance
+incremental_matcher = IncrementalMatcher()
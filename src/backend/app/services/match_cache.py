@@ -0,0 +1,190 @@
+"""
+Spec-fingerprint Match Cache
+Reuses the ranked matches of an earlier RFQ with the same specs, target
+price bucket and catalog version
+"""
+from typing import Dict, List, Optional, Set, Tuple
+from uuid import UUID
+from decimal import Decimal, ROUND_FLOOR
+import hashlib
+import json
+from loguru import logger
+
+from app.core.config import settings
+from app.core.redis_client import redis_client
+from app.models.company import SKU
+from app.services.candidate_filter import CandidateFilter
+from app.services.catalog_index import catalog_index, normalize_ingredient
+
+
+# Redis set of the ingredient terms cached entries depend on
+TERMS_KEY = "catalog:version:terms"
+
+
+def _canonical(value) -> str:
+    """String form that ignores Decimal exponents (95.0 == 95)"""
+    if isinstance(value, Decimal):
+        return str(value.normalize())
+    return str(value)
+
+
+class MatchCache:
+    """
+    Ranked matches keyed by a canonical fingerprint of an RFQ
+
+    The fingerprint covers everything scoring reads from the RFQ: the
+    normalized parsed specs, the candidate filter (prefilter bound,
+    ontology nodes), the target price bucket and the matching settings.
+    Each entry records the catalog versions of the ingredient terms or
+    ontology nodes its candidates came from; a hit requires those
+    versions to be unchanged. Versions are Redis counters bumped when
+    SKUs or their sellers change, so every API worker sees them.
+
+    Only used while the catalog index is loaded, since version bumps come
+    from its refresh loop and the seller feature store's.
+    """
+
+    @property
+    def enabled(self) -> bool:
+        return settings.MATCH_CACHE_ENABLED and catalog_index.loaded
+
+    def fingerprint(self, rfq, candidate_filter: CandidateFilter) -> str:
+        """Canonical hash of the RFQ inputs that determine its ranking"""
+        parsed_specs = rfq.parsed_specs or {}
+        assay_min = parsed_specs.get("assay_min")
+        canonical = {
+            "ingredient": normalize_ingredient(parsed_specs.get("ingredient")),
+            "grade": parsed_specs.get("grade"),
+            "assay_min": _canonical(Decimal(str(assay_min))) if assay_min else None,
+            "form": (parsed_specs.get("form") or "").lower() or None,
+            "certifications": sorted(set(parsed_specs.get("certifications_required") or [])),
+            "filter": [_canonical(part) for part in candidate_filter.key],
+            "price_bucket": self.price_bucket(rfq.target_price_usd),
+            "settings": [
+                settings.MIN_MATCH_SCORE,
+                settings.MATCH_TOP_K,
+                settings.MATCHER_RANKER,
+                settings.MATCHER_MODEL_PATH,
+            ],
+        }
+        return hashlib.sha256(json.dumps(canonical, sort_keys=True).encode()).hexdigest()
+
+    def price_bucket(self, target_price) -> Optional[int]:
+        if not target_price:
+            return None
+        width = Decimal(str(settings.MATCH_CACHE_PRICE_BUCKET_USD))
+        return int((Decimal(target_price) / width).to_integral_value(ROUND_FLOOR))
+
+    def catalog_keys(self, candidate_filter: CandidateFilter) -> List[str]:
+        """Version counters covering the candidate set"""
+        term = [f"term:{normalize_ingredient(candidate_filter.ingredient)}"]
+        if candidate_filter.ontology_factors:
+            # SKUs not mapped to a node join the candidates by ingredient term
+            nodes = sorted(f"node:{node_id}" for node_id in candidate_filter.ontology_factors)
+            return nodes + term if candidate_filter.ingredient else nodes
+        return term
+
+    async def lookup(self, rfq, candidate_filter: CandidateFilter) -> Tuple[Optional[List[Dict]], Dict[str, int]]:
+        """
+        Cached matches for an RFQ (None on a miss) and the current catalog
+        versions, to be passed to store() after a miss is computed
+        """
+        try:
+            versions = await redis_client.get_catalog_versions(self.catalog_keys(candidate_filter))
+            entry = await redis_client.get_match_cache(self.fingerprint(rfq, candidate_filter))
+        except Exception as e:
+            logger.warning(f"Match cache lookup failed: {e}")
+            return None, {}
+
+        if not entry or entry["versions"] != versions:
+            return None, versions
+        return [self._to_match(rfq, cached) for cached in entry["matches"]], versions
+
+    async def store(
+        self,
+        rfq,
+        candidate_filter: CandidateFilter,
+        versions: Dict[str, int],
+        matches: List[Dict],
+        skus: List[SKU]
+    ):
+        """
+        Cache freshly ranked matches under the versions read before ranking
+
+        Recommended prices of SKUs without a base price fall back to the
+        RFQ's target price, so they are recomputed on a hit rather than
+        cached.
+        """
+        if not versions:
+            return
+        unpriced = {sku.id for sku in skus if not sku.base_price_usd}
+        entry = {
+            "versions": versions,
+            "matches": [
+                {
+                    "seller_company_id": str(m["seller_company_id"]),
+                    "sku_id": str(m["sku_id"]),
+                    "match_score": str(m["match_score"]),
+                    "rank": m["rank"],
+                    "explanation": m["explanation"],
+                    "recommended_price_usd": (
+                        None if m["sku_id"] in unpriced else str(m["recommended_price_usd"])
+                    ),
+                    "auto_bid_eligible": m["auto_bid_eligible"],
+                }
+                for m in matches
+            ],
+        }
+        try:
+            terms = [key[len("term:"):] for key in versions if key.startswith("term:")]
+            if terms:
+                await redis_client.add_to_set(TERMS_KEY, *terms)
+            await redis_client.cache_match_result(
+                self.fingerprint(rfq, candidate_filter), entry, expire=settings.MATCH_CACHE_SECONDS
+            )
+        except Exception as e:
+            logger.warning(f"Match cache write failed: {e}")
+
+    def _to_match(self, rfq, cached: Dict) -> Dict:
+        """Match record for an RFQ from a cached entry"""
+        price = cached["recommended_price_usd"]
+        return {
+            "seller_company_id": UUID(cached["seller_company_id"]),
+            "sku_id": UUID(cached["sku_id"]),
+            "match_score": Decimal(cached["match_score"]),
+            "rank": cached["rank"],
+            "explanation": cached["explanation"],
+            "recommended_price_usd": (
+                Decimal(price) if price is not None else rfq.target_price_usd or Decimal("0")
+            ),
+            "auto_bid_eligible": cached["auto_bid_eligible"],
+        }
+
+    async def invalidate(self, skus: List[SKU]):
+        """Bump the catalog versions of every term and node the SKUs belong to"""
+        if not skus:
+            return
+        try:
+            terms = await redis_client.get_set_members(TERMS_KEY)
+            keys = set()
+            for sku in skus:
+                if sku.ontology_node_id:
+                    keys.add(f"node:{sku.ontology_node_id}")
+                name = normalize_ingredient(sku.ingredient_name)
+                keys.update(f"term:{term}" for term in terms if term in name)
+            if keys:
+                await redis_client.bump_catalog_versions(sorted(keys))
+        except Exception as e:
+            logger.warning(f"Catalog version bump failed: {e}")
+
+    async def on_catalog_refresh(self, changed_skus: List[SKU], db):
+        """Catalog index listener: changed SKUs invalidate their ingredients"""
+        await self.invalidate(changed_skus)
+
+    async def on_sellers_changed(self, company_ids: Set[UUID], db):
+        """Seller feature store listener: invalidate the sellers' ingredients"""
+        await self.invalidate(catalog_index.skus_of_companies(company_ids))
+
+
+# Global match cache instance
+match_cache = MatchCache()
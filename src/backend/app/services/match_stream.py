@@ -0,0 +1,64 @@
+"""
+Match Streaming
+Server-Sent Events for an RFQ's matching progress, relayed from Redis
+pub/sub so any API worker can serve a stream
+"""
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional
+from uuid import UUID
+import asyncio
+import json
+
+from app.core.config import settings
+from app.core.redis_client import redis_client
+
+
+def format_event(event: str, data: Dict) -> str:
+    """One SSE frame"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def match_events(
+    rfq_id: UUID,
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None
+) -> AsyncIterator[str]:
+    """
+    SSE frames for an RFQ until its matches are complete
+
+    Relays "partial" events (running top matches as shards finish) and
+    ends with the "complete" event carrying the final ranks. The channel
+    is subscribed before the match cache is read, so a run finishing in
+    between is not missed; if matches are already cached they are sent
+    as "complete" straight away (queuing a new run drops them). Sends keep-alive comments while idle
+    and a "timeout" event after MATCH_STREAM_TIMEOUT_SECONDS.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.MATCH_STREAM_TIMEOUT_SECONDS
+
+    async with redis_client.subscribe_match_events(str(rfq_id)) as pubsub:
+        cached = await redis_client.get_rfq_matches(str(rfq_id))
+        if cached is not None:
+            yield format_event("complete", {
+                "event": "complete",
+                "rfq_id": str(rfq_id),
+                "total_matches": len(cached),
+                "matches": cached,
+            })
+            return
+
+        last_sent = loop.time()
+        while loop.time() < deadline:
+            if is_disconnected and await is_disconnected():
+                return
+
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            if message is not None:
+                event = json.loads(message["data"])
+                yield format_event(event["event"], event)
+                if event["event"] == "complete":
+                    return
+                last_sent = loop.time()
+            elif loop.time() - last_sent >= settings.MATCH_STREAM_HEARTBEAT_SECONDS:
+                yield ": keep-alive\n\n"
+                last_sent = loop.time()
+
+        yield format_event("timeout", {"event": "timeout", "rfq_id": str(rfq_id)})
@@ -0,0 +1,169 @@
+"""
+Matching Executor
+Scores large candidate sets in a process pool so CPU-bound ranking does
+not stall the API event loop
+"""
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+import asyncio
+import multiprocessing
+import numpy as np
+from loguru import logger
+
+from app.core.config import settings
+from app.ml.batch_scorer import CandidateBatch, batch_scorer
+
+
+# Called as on_progress(order, scores, shards_done, shards_total) with the
+# ranking merged from the shards finished so far
+ProgressCallback = Callable[[np.ndarray, Dict[str, np.ndarray], int, int], Awaitable]
+
+# Columns returned by a shard for each ranked candidate
+RESULT_COLUMNS = [
+    "spec_match",
+    "price_competitiveness",
+    "compliance_score",
+    "delivery_score",
+    "quality_history",
+    "match_score",
+    "auto_bid_eligible",
+]
+
+
+def _score_shard(
+    shard: CandidateBatch,
+    offset: int,
+    target_price,
+    parsed_specs: Dict,
+    k: int
+) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Rank one shard (runs in a worker process)
+
+    Returns global candidate positions of the shard's ranked matches
+    (its top k, or all above threshold when k is 0) and their scores.
+    """
+    rfq = SimpleNamespace(target_price_usd=target_price)
+    if k:
+        order, scores = batch_scorer.rank_top_k(rfq, parsed_specs, shard, k)
+    else:
+        scores = batch_scorer.score(rfq, parsed_specs, shard)
+        order = batch_scorer.rank(scores)
+    return order + offset, {name: scores[name][order] for name in RESULT_COLUMNS}
+
+
+class MatchingExecutor:
+    """
+    Shards candidate batches across a ProcessPoolExecutor
+
+    Each shard is ranked independently and the per-shard top-K lists are
+    merged, giving the same ranking as scoring the batch in one piece.
+    Batches below MATCHING_PARALLEL_MIN_CANDIDATES are scored in-process,
+    where pickling and IPC would cost more than they save.
+
+    Workers are spawned rather than forked, since the API and Celery
+    processes run threads (event loops, driver pools) that a fork would
+    copy mid-operation. Matching workers use Celery's thread pool for this
+    reason: daemonic processes (prefork children) cannot start children at
+    all, so they always score in-process.
+    """
+
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def workers(self) -> int:
+        return settings.MATCHING_WORKERS
+
+    @property
+    def parallel(self) -> bool:
+        return self.workers > 1 and not multiprocessing.current_process().daemon
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info(f"Matching process pool started with {self.workers} workers")
+        return self._pool
+
+    async def rank(
+        self,
+        rfq,
+        parsed_specs: Dict,
+        batch: CandidateBatch,
+        k: int = 0,
+        on_progress: Optional[ProgressCallback] = None
+    ) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Ranked candidate positions and score columns for an RFQ
+
+        k limits the result to the best k matches (0 = all above threshold).
+        When sharded, on_progress is awaited as each shard but the last
+        finishes, with the ranking of the shards finished so far.
+        """
+        if not self.parallel or len(batch) < settings.MATCHING_PARALLEL_MIN_CANDIDATES:
+            if k:
+                return batch_scorer.rank_top_k(rfq, parsed_specs, batch, k)
+            scores = batch_scorer.score(rfq, parsed_specs, batch)
+            return batch_scorer.rank(scores), scores
+
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        bounds = np.linspace(0, len(batch), self.workers + 1, dtype=np.int64)
+
+        futures = [
+            loop.run_in_executor(
+                pool, _score_shard,
+                batch.take(np.arange(start, stop)), int(start),
+                rfq.target_price_usd, parsed_specs, k
+            )
+            for start, stop in zip(bounds[:-1], bounds[1:])
+            if stop > start
+        ]
+        shard_results = []
+        for future in asyncio.as_completed(futures):
+            shard_results.append(await future)
+            if on_progress and len(shard_results) < len(futures):
+                order, scores = self._merge(shard_results, len(batch), k)
+                await on_progress(order, scores, len(shard_results), len(futures))
+
+        return self._merge(shard_results, len(batch), k)
+
+    def _merge(
+        self,
+        shard_results: List[Tuple[np.ndarray, Dict[str, np.ndarray]]],
+        n: int,
+        k: int
+    ) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Merge per-shard rankings into one (score desc, catalog order)"""
+        positions = np.concatenate([order for order, _ in shard_results])
+        columns = {
+            name: np.concatenate([scores[name] for _, scores in shard_results])
+            for name in RESULT_COLUMNS
+        }
+
+        merged = np.lexsort((positions, -columns["match_score"]))
+        if k:
+            merged = merged[:k]
+        order = positions[merged]
+
+        scores = {
+            name: np.zeros(n, dtype=bool) if name == "auto_bid_eligible" else np.full(n, np.nan)
+            for name in RESULT_COLUMNS
+        }
+        for name in RESULT_COLUMNS:
+            scores[name][positions] = columns[name]
+        return order, scores
+
+    def shutdown(self):
+        """Stop worker processes"""
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+
+# Global matching executor instance
+matching_executor = MatchingExecutor()
@@ -0,0 +1,83 @@
+"""
+Matching Queue
+Enqueues RFQ matching jobs for the Celery workers, one pending job per RFQ
+"""
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+from starlette.concurrency import run_in_threadpool
+from loguru import logger
+
+from app.core.config import settings
+from app.core.redis_client import redis_client
+from app.workers.matching_tasks import dedup_key, match_rfq, match_rfq_batch
+
+
+class MatchingQueue:
+    """
+    Producer side of the matching job queue
+
+    An RFQ is enqueued only if no job for it is pending: a Redis key is
+    set with NX when the job is sent and deleted when a worker starts it.
+    The key expires after MATCHING_JOB_DEDUP_SECONDS, so a lost job does
+    not block the RFQ for good. Queuing drops the RFQ's cached ranks, so
+    match streams opened meanwhile wait for the new run's "complete".
+    """
+
+    async def enqueue(self, rfq_id: UUID) -> bool:
+        """
+        Queue matching for an RFQ; returns False if a job is already pending
+
+        Call after the RFQ is committed: the worker reads it in its own
+        session.
+        """
+        key = dedup_key(str(rfq_id))
+        if not await redis_client.set_if_absent(key, 1, expire=settings.MATCHING_JOB_DEDUP_SECONDS):
+            logger.info(f"Matching already queued for RFQ {rfq_id}")
+            return False
+
+        try:
+            # Streams wait for this run instead of serving the previous ranks
+            await redis_client.clear_rfq_matches(str(rfq_id))
+            # Publishing through kombu is blocking I/O; keep it off the event loop
+            await run_in_threadpool(match_rfq.apply_async, args=[str(rfq_id)])
+        except Exception:
+            await redis_client.delete(key)
+            raise
+        return True
+
+    async def enqueue_batch(self, rfq_ids: List[UUID]) -> Tuple[Optional[str], List[UUID]]:
+        """
+        Queue one job matching many RFQs together
+
+        RFQs that already have a pending job are left to it. Returns the
+        task id (None if every RFQ was pending) and the RFQs it covers.
+        """
+        queued = []
+        for rfq_id in dict.fromkeys(rfq_ids):
+            if await redis_client.set_if_absent(
+                dedup_key(str(rfq_id)), 1, expire=settings.MATCHING_JOB_DEDUP_SECONDS
+            ):
+                queued.append(rfq_id)
+        if not queued:
+            return None, []
+
+        try:
+            await redis_client.clear_rfq_matches(*(str(rfq_id) for rfq_id in queued))
+            result = await run_in_threadpool(
+                match_rfq_batch.apply_async, args=[[str(rfq_id) for rfq_id in queued]]
+            )
+        except Exception:
+            await redis_client.delete(*(dedup_key(str(rfq_id)) for rfq_id in queued))
+            raise
+        return result.id, queued
+
+    async def metrics(self) -> Dict:
+        """Queue depth: jobs waiting in the broker list for a worker"""
+        return {
+            "queue": settings.MATCHING_QUEUE,
+            "queued_jobs": await redis_client.list_length(settings.MATCHING_QUEUE),
+        }
+
+
+# Global matching queue instance
+matching_queue = MatchingQueue()
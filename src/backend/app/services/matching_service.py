@@ -2,16 +2,132 @@
 Seller Matching Service
 ML-powered matching and ranking of sellers for RFQs
 """
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 from uuid import UUID
 from decimal import Decimal
+from collections import defaultdict
+from functools import lru_cache
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, text
+import json
+import uuid
 from loguru import logger
 
 from app.models.company import Company, SKU
 from app.models.rfq import RFQ, RFQMatch
+from app.core.config import settings
 from app.core.redis_client import redis_client
+from app.ml.batch_scorer import CandidateBatch, recommended_price, score_to_decimal
+from app.ml.seller_features import SellerFeatures
+from app.services.matching_executor import matching_executor
+from app.services.catalog_index import catalog_index
+from app.services.candidate_filter import CandidateFilter
+from app.services.match_cache import match_cache
+from app.services.auto_bid_service import auto_bid_service
+from app.services.seller_feature_store import seller_feature_store
+
+
+# Replace the matches of one or more RFQs in one statement: rows are passed
+# as parallel arrays and unnested, matches for SKUs no longer ranked are
+# deleted, and the rest are upserted on (rfq_id, sku_id)
+UPSERT_MATCHES_SQL = text("""
+WITH incoming AS (
+    SELECT *
+    FROM unnest(
+        CAST(:ids AS uuid[]),
+        CAST(:rfq_ids AS uuid[]),
+        CAST(:seller_company_ids AS uuid[]),
+        CAST(:sku_ids AS uuid[]),
+        CAST(:match_scores AS numeric[]),
+        CAST(:ranks AS integer[]),
+        CAST(:explanations AS jsonb[]),
+        CAST(:recommended_prices AS numeric[]),
+        CAST(:auto_bid_eligible AS boolean[])
+    ) AS m(id, rfq_id, seller_company_id, sku_id, match_score, rank, explanation,
+           recommended_price_usd, auto_bid_eligible)
+),
+stale AS (
+    DELETE FROM rfq_matches r
+    WHERE r.rfq_id = ANY(CAST(:matched_rfq_ids AS uuid[]))
+      AND NOT EXISTS (
+          SELECT 1 FROM incoming i
+          WHERE i.rfq_id = r.rfq_id AND i.sku_id = r.sku_id
+      )
+)
+INSERT INTO rfq_matches (
+    id, rfq_id, seller_company_id, sku_id, match_score, rank, explanation,
+    recommended_price_usd, auto_bid_eligible, created_at
+)
+SELECT id, rfq_id, seller_company_id, sku_id, match_score, rank,
+       explanation, recommended_price_usd, auto_bid_eligible, NOW()
+FROM incoming
+ON CONFLICT (rfq_id, sku_id) DO UPDATE SET
+    seller_company_id = EXCLUDED.seller_company_id,
+    match_score = EXCLUDED.match_score,
+    rank = EXCLUDED.rank,
+    explanation = EXCLUDED.explanation,
+    recommended_price_usd = EXCLUDED.recommended_price_usd,
+    auto_bid_eligible = EXCLUDED.auto_bid_eligible
+""")
+
+
+@lru_cache(maxsize=4096)
+def match_reasons(
+    spec_score: float,
+    cert_score: float,
+    target_price: Optional[Decimal],
+    base_price: Optional[Decimal],
+    lead_time_days: Optional[int],
+    rating: Optional[Decimal],
+    on_time_rate: Optional[Decimal],
+    substitute_factor: float = 1.0
+) -> Tuple[str, ...]:
+    """Human-readable match reasons (memoized on the values they depend on)"""
+    
+    reasons = []
+    
+    # Substitute ingredient (score discounted)
+    if substitute_factor < 1.0:
+        reasons.append(f"~ Substitute ingredient (score x{substitute_factor:.2f})")
+    
+    # Spec match
+    if spec_score >= 0.95:
+        reasons.append("✓ Exact specification match")
+    elif spec_score >= 0.8:
+        reasons.append("✓ Very good specification match")
+    else:
+        reasons.append("~ Partial specification match")
+    
+    # Certifications
+    if cert_score >= 0.95:
+        reasons.append("✓ All required certifications met")
+    elif cert_score >= 0.7:
+        reasons.append("~ Most certifications met")
+    else:
+        reasons.append("⚠ Missing some certifications")
+    
+    # Price
+    if base_price and target_price:
+        savings_pct = float((target_price - base_price) / target_price * 100)
+        if savings_pct > 10:
+            reasons.append(f"✓ {abs(savings_pct):.0f}% below target price (${base_price}/kg)")
+        elif savings_pct > 0:
+            reasons.append(f"✓ {abs(savings_pct):.0f}% below target price")
+        else:
+            reasons.append(f"~ At or above target price")
+    
+    # Delivery
+    if lead_time_days and lead_time_days <= 21:
+        reasons.append("✓ Fast delivery capability")
+    
+    # Quality
+    if rating is not None and rating >= Decimal("4.5"):
+        reasons.append(f"✓ {rating}★ supplier rating")
+    
+    if on_time_rate is not None and on_time_rate >= Decimal("95"):
+        reasons.append(f"✓ {on_time_rate}% on-time delivery")
+    
+    return tuple(reasons)
 
 
 class MatchingService:
@@ -32,7 +148,8 @@ class MatchingService:
         2. Find SKUs matching specification
         3. Calculate match scores (ML model)
         4. Generate explanations
-        5. Store matches in database
+        5. Store matches in database (pass them to publish_matches once
+           the caller's transaction is committed)
         """
         
         logger.info(f"Starting matching for RFQ {rfq_id}")
@@ -45,63 +162,108 @@ class MatchingService:
             logger.error(f"RFQ {rfq_id} not found")
             return []
         
-        parsed_specs = rfq.parsed_specs
-        
-        # Find matching SKUs
-        query = select(SKU).where(SKU.is_active == True)
+        results = await self._match_rfqs([rfq], db)
+        return results[rfq.id]
+    
+    async def find_and_rank_sellers_batch(
+        self,
+        rfq_ids: List[UUID],
+        db: AsyncSession
+    ) -> Dict[UUID, List[Dict]]:
+        """
+        Find and rank sellers for many RFQs at once
         
-        # Filter by ingredient
-        if parsed_specs.get("ingredient"):
-            query = query.where(
-                SKU.ingredient_name.ilike(f"%{parsed_specs['ingredient']}%")
-            )
+        RFQs are grouped by candidate set (ingredient and grade), so each
+        set of candidate SKUs and their sellers is loaded once and scored
+        against every RFQ of the group. All matches are written with a
+        single statement in the caller's transaction; pass them to
+        publish_matches once it is committed.
         
-        # Filter by grade
-        if parsed_specs.get("grade"):
-            query = query.where(SKU.grade == parsed_specs["grade"])
+        Returns matches keyed by RFQ id; ids that were not found are absent.
+        """
         
-        result = await db.execute(query)
-        matching_skus = result.scalars().all()
+        logger.info(f"Starting batch matching for {len(rfq_ids)} RFQs")
         
-        logger.info(f"Found {len(matching_skus)} matching SKUs")
+        result = await db.execute(select(RFQ).where(RFQ.id.in_(set(rfq_ids))))
+        rfqs = result.scalars().all()
         
-        # Calculate match scores for each SKU
-        matches = []
-        for sku in matching_skus:
-            match_data = await self._calculate_match_score(
-                rfq, sku, parsed_specs, db
-            )
-            
-            if match_data["match_score"] >= 0.6:  # Threshold
-                matches.append(match_data)
-        
-        # Sort by match score
-        matches.sort(key=lambda x: x["match_score"], reverse=True)
-        
-        # Assign ranks
-        for i, match in enumerate(matches, 1):
-            match["rank"] = i
-        
-        # Store in database
-        for match_data in matches:
-            rfq_match = RFQMatch(
-                rfq_id=rfq_id,
-                seller_company_id=match_data["seller_company_id"],
-                sku_id=match_data["sku_id"],
-                match_score=match_data["match_score"],
-                rank=match_data["rank"],
-                explanation=match_data["explanation"],
-                recommended_price_usd=match_data["recommended_price_usd"],
-                auto_bid_eligible=match_data["auto_bid_eligible"]
-            )
-            db.add(rfq_match)
+        missing = set(rfq_ids) - {rfq.id for rfq in rfqs}
+        if missing:
+            logger.warning(f"{len(missing)} RFQs not found for batch matching")
         
-        await db.flush()
+        return await self._match_rfqs(rfqs, db)
+    
+    async def _match_rfqs(
+        self,
+        rfqs: List[RFQ],
+        db: AsyncSession
+    ) -> Dict[UUID, List[Dict]]:
+        """Score and persist matches for a set of loaded RFQs (publish_matches announces them)"""
+        
+        # Reuse cached rankings, then group the rest by candidate set
+        results = {}
+        versions = {}
+        groups = defaultdict(list)
+        filters = {}
+        for rfq in rfqs:
+            candidate_filter = await CandidateFilter.resolve(rfq)
+            if match_cache.enabled:
+                cached, versions[rfq.id] = await match_cache.lookup(rfq, candidate_filter)
+                if cached is not None:
+                    logger.info(f"Match cache hit for RFQ {rfq.id}")
+                    results[rfq.id] = cached
+                    continue
+            filters[candidate_filter.key] = candidate_filter
+            groups[candidate_filter.key].append(rfq)
+        
+        # Find matching SKUs, once per group
+        candidates = {}
+        for key, group in groups.items():
+            candidates[key] = await self._find_candidate_skus(filters[key], db)
+            logger.info(f"Found {len(candidates[key])} matching SKUs for {len(group)} RFQs")
+        
+        # Load sellers for every candidate with one query
+        all_skus = list({sku.id: sku for skus in candidates.values() for sku in skus}.values())
+        sellers = await self._load_sellers(all_skus, db)
+        
+        # Score each group's candidate batch against all of its RFQs
+        for key, group in groups.items():
+            skus = candidates[key]
+            if catalog_index.loaded:
+                # The index resolves ingredient and grade; apply the spec prefilter here
+                skus = [
+                    sku for sku in skus
+                    if filters[key].admits(sku, sellers.get(sku.company_id))
+                ]
+            batch = CandidateBatch.from_skus(skus, sellers, filters[key].ontology_factors)
+            for rfq in group:
+                results[rfq.id] = await self._rank_matches(rfq, batch)
+                if rfq.id in versions:
+                    await match_cache.store(rfq, filters[key], versions[rfq.id], results[rfq.id], skus)
+        
+        # Store in database (single round trip, replaces previous matches)
+        await self._persist_matches(results, db)
+        
+        # Submit auto-bids for eligible matches (single multi-row insert)
+        await auto_bid_service.generate_bids(rfqs, results, db, {sku.id: sku for sku in all_skus})
+        
+        # Cached and announced by the caller once committed (publish_matches)
+        for rfq_id, matches in results.items():
+            logger.info(f"✅ Matching complete for RFQ {rfq_id}: {len(matches)} sellers ranked")
+        
+        return results
+    
+    async def publish_matches(self, matches_by_rfq: Dict[UUID, List[Dict]]):
+        """
+        Write ranked matches to the rfq:matches:* cache and announce them
+        to match streams with a "complete" event
         
-        # Cache results
-        await redis_client.cache_rfq_matches(
-            str(rfq_id),
-            [
+        Call after the matches are committed, so listeners never see ranks
+        that are not (or never will be) in rfq_matches. Best-effort: the
+        matches are already stored.
+        """
+        for rfq_id, matches in matches_by_rfq.items():
+            summaries = [
                 {
                     "seller_id": str(m["seller_company_id"]),
                     "match_score": float(m["match_score"]),
@@ -109,241 +271,248 @@ class MatchingService:
                 }
                 for m in matches
             ]
-        )
-        
-        logger.info(f"✅ Matching complete: {len(matches)} sellers ranked")
-        
-        return matches
+            try:
+                await redis_client.cache_rfq_matches(str(rfq_id), summaries)
+            except Exception as e:
+                logger.warning(f"Match cache write failed for RFQ {rfq_id}: {e}")
+            await self._publish_match_event(rfq_id, "complete", summaries, len(summaries))
+    
+    async def _publish_match_event(
+        self,
+        rfq_id: UUID,
+        event: str,
+        matches: List[Dict],
+        total_matches: int,
+        **fields
+    ):
+        """Best-effort publish on the RFQ's match stream channel"""
+        try:
+            await redis_client.publish_match_event(str(rfq_id), {
+                "event": event,
+                "rfq_id": str(rfq_id),
+                "total_matches": total_matches,
+                "matches": matches,
+                **fields
+            })
+        except Exception as e:
+            logger.warning(f"Match event publish failed for RFQ {rfq_id}: {e}")
     
-    async def _calculate_match_score(
+    async def _rank_matches(
         self,
         rfq: RFQ,
-        sku: SKU,
-        parsed_specs: Dict,
-        db: AsyncSession
-    ) -> Dict:
-        """
-        Calculate match score using ML features
-        
-        Features:
-        - Spec similarity (40%)
-        - Price competitiveness (20%)
-        - Certification compliance (20%)
-        - Delivery capability (10%)
-        - Quality history (10%)
+        batch: CandidateBatch
+    ) -> List[Dict]:
         """
+        Score a candidate batch and build ranked match records
         
-        # Load seller company
-        result = await db.execute(
-            select(Company).where(Company.id == sku.company_id)
-        )
-        seller = result.scalar_one_or_none()
-        
-        # Calculate feature scores
-        spec_score = self._calculate_spec_match(parsed_specs, sku)
-        price_score = self._calculate_price_competitiveness(rfq, sku)
-        cert_score = self._calculate_certification_match(parsed_specs, sku, seller)
-        delivery_score = self._calculate_delivery_score(sku, seller)
-        quality_score = float(seller.rating) / 5.0 if seller else 0.5
-        
-        # Weighted sum (can be replaced with XGBoost model)
-        match_score = (
-            spec_score * 0.4 +
-            price_score * 0.2 +
-            cert_score * 0.2 +
-            delivery_score * 0.1 +
-            quality_score * 0.1
-        )
+        When the batch is sharded, the running top matches are published
+        as "partial" events as shards finish.
+        """
+        async def publish_partial(ranked, scores, shards_done, shards_total):
+            await self._publish_match_event(
+                rfq.id, "partial",
+                [
+                    {
+                        "seller_id": str(batch.company_ids[idx]),
+                        "sku_id": str(batch.sku_ids[idx]),
+                        "match_score": float(score_to_decimal(float(scores["match_score"][idx]))),
+                        "rank": rank
+                    }
+                    for rank, idx in enumerate(ranked[:settings.MATCH_STREAM_PARTIAL_LIMIT], 1)
+                ],
+                len(ranked),
+                shards_done=shards_done,
+                shards_total=shards_total
+            )
         
-        # Generate explanation
-        explanation = self._generate_explanation(
-            spec_score, price_score, cert_score, 
-            delivery_score, quality_score,
-            rfq, sku, seller
+        ranked, scores = await matching_executor.rank(
+            rfq, rfq.parsed_specs, batch, settings.MATCH_TOP_K, on_progress=publish_partial
         )
         
-        # Calculate recommended price
-        recommended_price = self._calculate_recommended_price(
-            sku, rfq, match_score
-        )
+        # Build match records for candidates above threshold, best first
+        return [
+            self._build_match(rfq, batch, scores, idx, rank)
+            for rank, idx in enumerate(ranked, 1)
+        ]
+    
+    def _build_match(
+        self,
+        rfq: RFQ,
+        batch: CandidateBatch,
+        scores: Dict,
+        idx: int,
+        rank: int
+    ) -> Dict:
+        """
+        Match record for one scored candidate
         
-        # Check auto-bid eligibility
-        auto_bid_eligible = (
-            match_score >= 0.85 and
-            recommended_price >= sku.base_price_usd * Decimal("1.10")  # Min 10% margin
+        Scores stay floats until here; only the persisted match score and
+        recommended price are converted to Decimal.
+        """
+        sku = batch.skus[idx]
+        match_score = float(scores["match_score"][idx])
+        base_price_cents = int(batch.base_price_cents[idx])
+        
+        # Reasons are built when matches are served (get_ranked_matches)
+        explanation = self._feature_scores(
+            float(scores["spec_match"][idx]),
+            float(scores["price_competitiveness"][idx]),
+            float(scores["compliance_score"][idx]),
+            float(scores["delivery_score"][idx]),
+            float(scores["quality_history"][idx])
         )
+        if batch.score_factor[idx] != 1.0:
+            explanation["substitute_factor"] = float(batch.score_factor[idx])
         
         return {
             "seller_company_id": sku.company_id,
             "sku_id": sku.id,
-            "match_score": Decimal(str(match_score)),
-            "rank": 0,  # Will be set later
+            "match_score": score_to_decimal(match_score),
+            "rank": rank,
             "explanation": explanation,
-            "recommended_price_usd": recommended_price,
-            "auto_bid_eligible": auto_bid_eligible
+            "recommended_price_usd": (
+                recommended_price(base_price_cents, match_score)
+                if base_price_cents else rfq.target_price_usd or Decimal("0")
+            ),
+            "auto_bid_eligible": bool(scores["auto_bid_eligible"][idx])
         }
     
-    def _calculate_spec_match(self, parsed_specs: Dict, sku: SKU) -> float:
-        """Calculate specification match score"""
-        score = 0.0
-        checks = 0
-        
-        # Grade match
-        if parsed_specs.get("grade"):
-            checks += 1
-            if sku.grade == parsed_specs["grade"]:
-                score += 1.0
-            elif sku.grade in ["USP", "Pharmaceutical Grade"]:
-                score += 0.8  # Premium grade
-        
-        # Assay match
-        if parsed_specs.get("assay_min"):
-            checks += 1
-            if sku.assay_min and sku.assay_min >= Decimal(str(parsed_specs["assay_min"])):
-                score += 1.0
-            elif sku.assay_min and sku.assay_min >= Decimal(str(parsed_specs["assay_min"])) * Decimal("0.95"):
-                score += 0.8
-        
-        # Form match
-        if parsed_specs.get("form"):
-            checks += 1
-            if sku.form and sku.form.lower() == parsed_specs["form"].lower():
-                score += 1.0
-        
-        return score / checks if checks > 0 else 0.5
-    
-    def _calculate_price_competitiveness(self, rfq: RFQ, sku: SKU) -> float:
-        """Calculate price competitiveness score"""
-        if not rfq.target_price_usd or not sku.base_price_usd:
-            return 0.5
-        
-        # Score based on how much below target price
-        if sku.base_price_usd <= rfq.target_price_usd:
-            # Below or at target - excellent
-            savings_pct = float((rfq.target_price_usd - sku.base_price_usd) / rfq.target_price_usd)
-            return min(1.0, 0.7 + savings_pct * 3)  # Reward savings
-        else:
-            # Above target - penalize
-            excess_pct = float((sku.base_price_usd - rfq.target_price_usd) / rfq.target_price_usd)
-            return max(0.0, 0.5 - excess_pct * 2)
-    
-    def _calculate_certification_match(
-        self, 
-        parsed_specs: Dict, 
-        sku: SKU,
-        seller: Company
-    ) -> float:
-        """Calculate certification compliance score"""
-        required_certs = set(parsed_specs.get("certifications_required", []))
+    async def _find_candidate_skus(
+        self,
+        candidate_filter: CandidateFilter,
+        db: AsyncSession
+    ) -> List[SKU]:
+        """
+        Resolve candidate SKUs for a candidate filter
         
-        if not required_certs:
-            return 1.0  # No requirements
+        Served from the resident catalog index when it is loaded (the
+        caller applies the spec prefilter once sellers are known),
+        otherwise queried from PostgreSQL with every constraint pushed
+        into the query.
+        """
+        if catalog_index.loaded:
+            return catalog_index.candidates(candidate_filter.parsed_specs)
         
-        # Combine SKU and company certifications
-        sku_certs = set(sku.certifications or [])
-        company_certs = set(seller.certifications or [])
-        available_certs = sku_certs | company_certs
+        result = await db.execute(candidate_filter.query())
+        return result.scalars().all()
+    
+    async def _load_sellers(
+        self,
+        skus: List[SKU],
+        db: AsyncSession
+    ) -> Dict[UUID, SellerFeatures]:
+        """
+        Seller features of all candidate SKUs, from the seller feature store
         
-        # Calculate match
-        matched = required_certs & available_certs
-        return len(matched) / len(required_certs) if required_certs else 1.0
+        Returns an id-keyed map used by the candidate filter and batch
+        scorer. Only sellers missing from both store tiers are read from
+        PostgreSQL, with a single IN-list query.
+        """
+        return await seller_feature_store.get_many({sku.company_id for sku in skus}, db)
     
-    def _calculate_delivery_score(self, sku: SKU, seller: Company) -> float:
-        """Calculate delivery capability score"""
-        score = 0.5
-        
-        # Lead time
-        if sku.lead_time_days:
-            if sku.lead_time_days <= 21:
-                score += 0.3
-            elif sku.lead_time_days <= 30:
-                score += 0.2
-        
-        # On-time delivery history
-        if seller.on_time_delivery_rate:
-            score += float(seller.on_time_delivery_rate) / 100 * 0.2
-        
-        return min(1.0, score)
+    async def _persist_matches(
+        self,
+        matches_by_rfq: Dict[UUID, List[Dict]],
+        db: AsyncSession
+    ):
+        """
+        Bulk, idempotent write of RFQ matches
+        
+        One INSERT ... ON CONFLICT statement regardless of match count.
+        Re-matching an RFQ (e.g. after a publish retry) replaces its rows
+        instead of appending duplicates.
+        """
+        rows = [
+            (rfq_id, m)
+            for rfq_id, matches in matches_by_rfq.items()
+            for m in matches
+        ]
+        await db.execute(UPSERT_MATCHES_SQL, {
+            "matched_rfq_ids": list(matches_by_rfq),
+            "ids": [uuid.uuid4() for _ in rows],
+            "rfq_ids": [rfq_id for rfq_id, _ in rows],
+            "seller_company_ids": [m["seller_company_id"] for _, m in rows],
+            "sku_ids": [m["sku_id"] for _, m in rows],
+            "match_scores": [m["match_score"] for _, m in rows],
+            "ranks": [m["rank"] for _, m in rows],
+            "explanations": [json.dumps(m["explanation"]) for _, m in rows],
+            "recommended_prices": [m["recommended_price_usd"] for _, m in rows],
+            "auto_bid_eligible": [m["auto_bid_eligible"] for _, m in rows],
+        })
     
-    def _generate_explanation(
+    def _feature_scores(
         self,
         spec_score: float,
         price_score: float,
         cert_score: float,
         delivery_score: float,
-        quality_score: float,
-        rfq: RFQ,
-        sku: SKU,
-        seller: Company
+        quality_score: float
     ) -> Dict:
-        """Generate human-readable explanation"""
-        
-        reasons = []
-        
-        # Spec match
-        if spec_score >= 0.95:
-            reasons.append("✓ Exact specification match")
-        elif spec_score >= 0.8:
-            reasons.append("✓ Very good specification match")
-        else:
-            reasons.append("~ Partial specification match")
-        
-        # Certifications
-        if cert_score >= 0.95:
-            reasons.append("✓ All required certifications met")
-        elif cert_score >= 0.7:
-            reasons.append("~ Most certifications met")
-        else:
-            reasons.append("⚠ Missing some certifications")
-        
-        # Price
-        if sku.base_price_usd and rfq.target_price_usd:
-            savings_pct = float((rfq.target_price_usd - sku.base_price_usd) / rfq.target_price_usd * 100)
-            if savings_pct > 10:
-                reasons.append(f"✓ {abs(savings_pct):.0f}% below target price (${sku.base_price_usd}/kg)")
-            elif savings_pct > 0:
-                reasons.append(f"✓ {abs(savings_pct):.0f}% below target price")
-            else:
-                reasons.append(f"~ At or above target price")
-        
-        # Delivery
-        if sku.lead_time_days and sku.lead_time_days <= 21:
-            reasons.append("✓ Fast delivery capability")
-        
-        # Quality
-        if seller.rating >= Decimal("4.5"):
-            reasons.append(f"✓ {seller.rating}★ supplier rating")
-        
-        if seller.on_time_delivery_rate >= Decimal("95"):
-            reasons.append(f"✓ {seller.on_time_delivery_rate}% on-time delivery")
-        
+        """Compact persisted explanation: the numeric feature scores only"""
         return {
             "spec_match": spec_score,
             "price_competitiveness": price_score,
             "compliance_score": cert_score,
             "delivery_score": delivery_score,
-            "quality_history": quality_score,
-            "reasons": reasons
+            "quality_history": quality_score
         }
     
-    def _calculate_recommended_price(
+    async def get_ranked_matches(
+        self,
+        rfq_id: UUID,
+        min_score: float,
+        limit: int,
+        db: AsyncSession
+    ) -> List[Dict]:
+        """
+        One page of stored matches, with explanations
+        
+        Reasons are not stored; they are built here for the returned rows
+        only, from the feature scores and the SKU, seller and RFQ fields
+        loaded in the same query.
+        """
+        result = await db.execute(
+            select(RFQMatch, RFQ.target_price_usd, SKU, Company)
+            .join(RFQ, RFQ.id == RFQMatch.rfq_id)
+            .outerjoin(SKU, SKU.id == RFQMatch.sku_id)
+            .outerjoin(Company, Company.id == RFQMatch.seller_company_id)
+            .where(RFQMatch.rfq_id == rfq_id)
+            .where(RFQMatch.match_score >= min_score)
+            .order_by(RFQMatch.rank)
+            .limit(limit)
+        )
+        
+        return [
+            {
+                "seller_id": str(m.seller_company_id),
+                "sku_id": str(m.sku_id) if m.sku_id else None,
+                "match_score": float(m.match_score),
+                "rank": m.rank,
+                "explanation": self._explain(m.explanation, target_price, sku, seller),
+                "recommended_price_usd": float(m.recommended_price_usd) if m.recommended_price_usd else None,
+                "auto_bid_eligible": m.auto_bid_eligible
+            }
+            for m, target_price, sku, seller in result.all()
+        ]
+    
+    def _explain(
         self,
+        features: Dict,
+        target_price: Decimal,
         sku: SKU,
-        rfq: RFQ,
-        match_score: float
-    ) -> Decimal:
-        """Calculate recommended bid price"""
-        
-        if not sku.base_price_usd:
-            return rfq.target_price_usd or Decimal("0")
-        
-        # Strategy: High match score = more aggressive pricing
-        if match_score >= 0.9:
-            # Very strong match - can be aggressive
-            return sku.base_price_usd * Decimal("1.05")  # 5% markup
-        elif match_score >= 0.8:
-            # Good match - moderate pricing
-            return sku.base_price_usd * Decimal("1.10")  # 10% markup
-        else:
-            # Weaker match - conservative pricing
-            return sku.base_price_usd * Decimal("1.15")  # 15% markup
+        seller: Company
+    ) -> Dict:
+        """Stored feature scores plus reasons (rows written with reasons are served as-is)"""
+        features = dict(features or {})
+        if "reasons" in features or "spec_match" not in features:
+            return features
+        features["reasons"] = list(match_reasons(
+            features["spec_match"], features["compliance_score"],
+            target_price,
+            sku.base_price_usd if sku else None,
+            sku.lead_time_days if sku else None,
+            seller.rating if seller else None,
+            seller.on_time_delivery_rate if seller else None,
+            features.get("substitute_factor", 1.0)
+        ))
+        return features
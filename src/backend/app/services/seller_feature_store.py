@@ -0,0 +1,242 @@
+"""
+Seller Feature Store
+Precomputed seller scoring inputs, held in-process and in Redis, so
+matching does not load Company rows
+"""
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set
+from uuid import UUID
+from datetime import datetime, timedelta
+import asyncio
+import time
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from loguru import logger
+
+from app.core.config import settings
+from app.core.redis_client import redis_client
+from app.ml.seller_features import SellerFeatures
+from app.models.company import Company
+from app.services.catalog_index import REFRESH_OVERLAP
+
+
+SELLER_TYPES = ("supplier", "both")
+
+# Keys per Redis pipeline during a bulk rebuild
+REDIS_CHUNK = 1000
+
+
+class SellerFeatureStore:
+    """
+    One SellerFeatures vector per company
+
+    Reads go in-process first, then Redis (shared by every API process),
+    then PostgreSQL; misses are written back to both tiers. The whole
+    store is rebuilt in bulk nightly, and in between companies are
+    re-read when their row changes. Features come from company columns
+    only, so freshness follows companies.updated_at: a scorecard or
+    certification record reaches matching once it updates the company.
+    Redis is a cache tier: if it is down, reads fall through to
+    PostgreSQL.
+    """
+
+    def __init__(self):
+        self._features: Dict[UUID, SellerFeatures] = {}
+        self._high_water: Optional[datetime] = None
+        self._rebuilt_at: Optional[datetime] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[Set[UUID], AsyncSession], Awaitable]] = []
+
+    def __len__(self) -> int:
+        return len(self._features)
+
+    async def get_many(self, company_ids: Iterable[UUID], db: AsyncSession) -> Dict[UUID, SellerFeatures]:
+        """Features of the given companies (unknown companies are absent)"""
+        features = {}
+        missing = []
+        for company_id in set(company_ids):
+            cached = self._features.get(company_id)
+            if cached is None:
+                missing.append(company_id)
+            else:
+                features[company_id] = cached
+        if not missing:
+            return features
+
+        for seller_id, data in (await self._read_redis(missing)).items():
+            company_id = UUID(seller_id)
+            features[company_id] = self._features[company_id] = SellerFeatures.from_cache(data)
+
+        missing = [company_id for company_id in missing if company_id not in features]
+        if missing:
+            features.update(await self.refresh_companies(missing, db))
+        return features
+
+    async def refresh_companies(self, company_ids: Iterable[UUID], db: AsyncSession) -> Dict[UUID, SellerFeatures]:
+        """Recompute companies from PostgreSQL and write them to both tiers"""
+        company_ids = set(company_ids)
+        if not company_ids:
+            return {}
+
+        result = await db.execute(select(Company).where(Company.id.in_(company_ids)))
+        features = {
+            company.id: SellerFeatures.from_company(company)
+            for company in result.scalars().all()
+        }
+        for company_id in company_ids - features.keys():
+            self._features.pop(company_id, None)
+
+        self._features.update(features)
+        await self._write_redis(features)
+        return features
+
+    async def rebuild(self, db: AsyncSession) -> Set[UUID]:
+        """
+        Bulk recompute of every seller, swapped in atomically
+
+        Returns the ids whose features differ from the previous build
+        (none on the first build).
+        """
+        started = time.perf_counter()
+        high_water = await self._current_high_water(db)
+
+        result = await db.execute(
+            select(Company).where(Company.company_type.in_(SELLER_TYPES))
+        )
+        features = {
+            company.id: SellerFeatures.from_company(company)
+            for company in result.scalars().all()
+        }
+
+        previous = self._features
+        changed = set()
+        if previous:
+            changed = {company_id for company_id, vector in features.items() if previous.get(company_id) != vector}
+            changed |= previous.keys() - features.keys()
+
+        self._features = features
+        self._high_water = high_water
+        self._rebuilt_at = datetime.utcnow()
+        await self._write_redis(features)
+
+        logger.info(
+            f"🧮 Seller feature store rebuilt: {len(features)} sellers "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+        return changed
+
+    async def refresh(self, db: AsyncSession) -> Set[UUID]:
+        """
+        Recompute sellers changed since the last poll
+
+        Sellers whose company row was updated are re-read. Returns the
+        ids whose features actually changed.
+        """
+        query = select(Company.id, Company.updated_at)
+        high_water = self._high_water
+        if high_water:
+            query = query.where(Company.updated_at >= high_water - REFRESH_OVERLAP)
+
+        polled = set()
+        result = await db.execute(query)
+        for company_id, updated_at in result.all():
+            polled.add(company_id)
+            if updated_at and (high_water is None or updated_at > high_water):
+                high_water = updated_at
+        self._high_water = high_water
+
+        previous = {company_id: self._features.get(company_id) for company_id in polled}
+        features = await self.refresh_companies(polled, db)
+        return {company_id for company_id in polled if features.get(company_id) != previous[company_id]}
+
+    def add_listener(self, callback: Callable[[Set[UUID], AsyncSession], Awaitable]):
+        """
+        Register a coroutine called when sellers' features change
+
+        Called as ``callback(changed_company_ids, db)`` after each refresh
+        or rebuild of the background loop that changed any features.
+        """
+        self._listeners.append(callback)
+
+    def clear(self):
+        """Drop the in-process tier (Redis entries expire on their own)"""
+        self._features = {}
+        self._high_water = None
+        self._rebuilt_at = None
+
+    async def start(self, session_factory):
+        """
+        Start the background refresh loop and rebuild the store
+
+        The loop is started first, so a failed initial rebuild is retried
+        on its next tick.
+        """
+        self._refresh_task = asyncio.create_task(self._refresh_loop(session_factory))
+        async with session_factory() as db:
+            await self.rebuild(db)
+
+    async def stop(self):
+        """Stop the background refresh loop"""
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    def next_rebuild_at(self) -> datetime:
+        """First SELLER_FEATURES_REBUILD_HOUR (UTC) after the last rebuild"""
+        if self._rebuilt_at is None:
+            return datetime.min
+        rebuilt_at = self._rebuilt_at
+        rebuild_at = rebuilt_at.replace(
+            hour=settings.SELLER_FEATURES_REBUILD_HOUR, minute=0, second=0, microsecond=0
+        )
+        if rebuild_at <= rebuilt_at:
+            rebuild_at += timedelta(days=1)
+        return rebuild_at
+
+    async def _refresh_loop(self, session_factory):
+        """Poll for changed sellers, with the nightly bulk rebuild"""
+        while True:
+            await asyncio.sleep(settings.SELLER_FEATURES_REFRESH_SECONDS)
+            try:
+                async with session_factory() as db:
+                    if datetime.utcnow() >= self.next_rebuild_at():
+                        changed = await self.rebuild(db)
+                    else:
+                        changed = await self.refresh(db)
+                        if changed:
+                            logger.info(f"Seller feature store refreshed: {len(changed)} sellers changed")
+                    if changed:
+                        for callback in self._listeners:
+                            await callback(changed, db)
+            except Exception as e:
+                logger.error(f"❌ Seller feature store refresh failed: {e}")
+
+    async def _current_high_water(self, db: AsyncSession) -> Optional[datetime]:
+        """Latest company change, taken before a rebuild reads"""
+        return (await db.execute(select(func.max(Company.updated_at)))).scalar()
+
+    async def _read_redis(self, company_ids: List[UUID]) -> Dict[str, Dict]:
+        try:
+            return await redis_client.get_seller_scores([str(company_id) for company_id in company_ids])
+        except Exception as e:
+            logger.warning(f"Seller feature read from Redis failed: {e}")
+            return {}
+
+    async def _write_redis(self, features: Dict[UUID, SellerFeatures]):
+        items = [(str(company_id), vector.to_cache()) for company_id, vector in features.items()]
+        try:
+            for start in range(0, len(items), REDIS_CHUNK):
+                await redis_client.cache_seller_scores(
+                    dict(items[start:start + REDIS_CHUNK]),
+                    expire=settings.SELLER_FEATURES_CACHE_SECONDS
+                )
+        except Exception as e:
+            logger.warning(f"Seller feature write to Redis failed: {e}")
+
+
+# Global seller feature store instance
+seller_feature_store = SellerFeatureStore()
@@ -0,0 +1,68 @@
+"""
+Substitute Expander
+Resolves the ontology nodes an RFQ retrieves candidates from: its own node
+and, optionally, CAN_SUBSTITUTE targets with a score discount
+"""
+from typing import Dict, List, Tuple
+import asyncio
+import time
+from loguru import logger
+
+from app.core.config import settings
+from app.core.neo4j_client import neo4j_driver
+
+
+class SubstituteExpander:
+    """
+    Ontology node id -> score factor for an RFQ's parsed specs
+
+    The RFQ's own node scores in full (1.0); substitutes score
+    similarity x SUBSTITUTE_SCORE_FACTOR. Neo4j lookups run off the event
+    loop and are cached per ingredient; if Neo4j is unavailable matching
+    proceeds without substitutes.
+    """
+
+    def __init__(self):
+        self._cache: Dict[Tuple[str, float], Tuple[float, List[Tuple[str, float]]]] = {}
+
+    async def score_factors(self, parsed_specs: Dict) -> Dict[str, float]:
+        """Node ids to retrieve, with the factor applied to their scores"""
+        node_id = parsed_specs.get("ontology_node_id")
+        if not node_id:
+            return {}
+
+        factors = {node_id: 1.0}
+        if settings.MATCH_SUBSTITUTES and parsed_specs.get("ingredient"):
+            for substitute_id, similarity in await self.substitutes(parsed_specs["ingredient"]):
+                factors.setdefault(substitute_id, similarity * settings.SUBSTITUTE_SCORE_FACTOR)
+        return factors
+
+    async def substitutes(self, ingredient_name: str) -> List[Tuple[str, float]]:
+        """(node id, similarity) of substitutes above SUBSTITUTE_MIN_SIMILARITY"""
+        key = (ingredient_name, settings.SUBSTITUTE_MIN_SIMILARITY)
+        cached = self._cache.get(key)
+        if cached and time.monotonic() - cached[0] < settings.SUBSTITUTE_CACHE_SECONDS:
+            return cached[1]
+
+        try:
+            rows = await asyncio.to_thread(
+                neo4j_driver.find_substitutes, ingredient_name, settings.SUBSTITUTE_MIN_SIMILARITY
+            )
+        except Exception as e:
+            logger.warning(f"Substitute lookup failed for {ingredient_name}: {e}")
+            return []
+
+        substitutes = [
+            (row["sub"]["id"], float(row["r.similarity"]))
+            for row in rows
+            if row["sub"].get("id")
+        ]
+        self._cache[key] = (time.monotonic(), substitutes)
+        return substitutes
+
+    def clear(self):
+        self._cache = {}
+
+
+# Global substitute expander instance
+substitute_expander = SubstituteExpander()
@@ -0,0 +1,140 @@
+"""
+Celery application for background jobs
+Redis is the broker; matching runs in worker processes, not the API
+"""
+from typing import Awaitable, Optional, TypeVar
+import asyncio
+import threading
+from celery import Celery
+from celery.signals import worker_init, worker_shutdown
+from loguru import logger
+
+from app.core.config import settings
+
+
+T = TypeVar("T")
+
+
+celery_app = Celery(
+    "nutrasense",
+    broker=settings.REDIS_URL,
+    include=["app.workers.matching_tasks"],
+)
+
+celery_app.conf.update(
+    task_default_queue=settings.MATCHING_QUEUE,
+    task_routes={"app.workers.matching_tasks.*": {"queue": settings.MATCHING_QUEUE}},
+    task_serializer="json",
+    accept_content=["json"],
+    task_ignore_result=True,
+    # A job is acknowledged once it finishes, so a crashed worker's job is redelivered
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    # Jobs run on threads of one non-daemon process: they share its catalog
+    # index and seller feature store (one copy per worker), and the matching
+    # executor can spawn its scoring processes, which prefork children
+    # (daemonic) cannot. The thread pool does not enforce task_time_limit,
+    # so jobs are bounded by WorkerLoop.run instead.
+    worker_pool="threads",
+    worker_concurrency=settings.MATCHING_QUEUE_CONCURRENCY,
+    worker_prefetch_multiplier=1,
+    broker_transport_options={"visibility_timeout": settings.MATCHING_JOB_TIME_LIMIT * 2},
+)
+
+if settings.ENABLE_REAL_TIME_MATCHING:
+    # Incremental re-matching runs in one worker at a time, never in the API
+    celery_app.conf.beat_schedule = {
+        "rematch-changed-catalog": {
+            "task": "app.workers.matching_tasks.rematch_changes",
+            "schedule": settings.CATALOG_INDEX_REFRESH_SECONDS,
+            # A pass still queued when the next is due is dropped
+            "options": {"expires": settings.CATALOG_INDEX_REFRESH_SECONDS},
+        },
+    }
+
+
+class WorkerLoop:
+    """
+    One asyncio event loop per worker process, run in a daemon thread
+
+    Jobs submit coroutines to it, so the engine's connection pool, the
+    seller feature store and the catalog index (with their refresh
+    tasks) live across jobs instead of being rebuilt by asyncio.run().
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="worker-loop", daemon=True).start()
+            return self._loop
+
+    def run(self, coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+        """
+        Run a coroutine on the process loop and wait for its result
+
+        With a timeout, the coroutine is cancelled on the loop once it
+        runs longer and asyncio.TimeoutError is raised.
+        """
+        if timeout is not None:
+            coro = asyncio.wait_for(coro, timeout)
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def stop(self):
+        with self._lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._loop = None
+
+
+# Global worker loop instance
+worker_loop = WorkerLoop()
+
+
+@worker_init.connect
+def init_worker(**kwargs):
+    """Warm the matching caches before the worker consumes jobs"""
+    from app.core.database import AsyncSessionLocal
+    from app.services.catalog_index import catalog_index
+    from app.services.match_cache import match_cache
+    from app.services.seller_feature_store import seller_feature_store
+
+    try:
+        worker_loop.run(seller_feature_store.start(AsyncSessionLocal))
+    except Exception as e:
+        logger.error(f"❌ Seller feature store build failed in worker, sellers will be loaded on demand: {e}")
+
+    if settings.ENABLE_CATALOG_INDEX:
+        try:
+            worker_loop.run(catalog_index.start(AsyncSessionLocal))
+        except Exception as e:
+            logger.error(f"❌ Catalog index load failed in worker, matching will query PostgreSQL: {e}")
+
+        # Rankings are cached from this process's index, which can lag the
+        # API's: its own refreshes bump the versions of what it caught up on
+        if settings.MATCH_CACHE_ENABLED and catalog_index.loaded:
+            catalog_index.add_listener(match_cache.on_catalog_refresh)
+            seller_feature_store.add_listener(match_cache.on_sellers_changed)
+
+    logger.info("👷 Matching worker process ready")
+
+
+@worker_shutdown.connect
+def shutdown_worker(**kwargs):
+    from app.core.database import engine
+    from app.services.catalog_index import catalog_index
+    from app.services.matching_executor import matching_executor
+    from app.services.seller_feature_store import seller_feature_store
+
+    try:
+        worker_loop.run(catalog_index.stop())
+        worker_loop.run(seller_feature_store.stop())
+        worker_loop.run(engine.dispose())
+    finally:
+        matching_executor.shutdown()
+        worker_loop.stop()
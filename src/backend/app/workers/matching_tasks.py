@@ -0,0 +1,102 @@
+"""
+Matching jobs
+Each job matches one RFQ (or one batch of RFQs) in its own database
+session and transaction; a periodic job re-matches open RFQs against
+changed SKUs and sellers
+"""
+from typing import List
+from uuid import UUID
+from loguru import logger
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.redis_client import redis_client
+from app.services.incremental_matcher import incremental_matcher
+from app.services.matching_service import MatchingService
+from app.workers.celery_app import celery_app, worker_loop
+
+
+matching_service = MatchingService()
+
+
+def dedup_key(rfq_id: str) -> str:
+    """Redis key held while an RFQ's matching job is queued"""
+    return f"matching:job:{rfq_id}"
+
+
+async def run_matching(rfq_id: UUID) -> int:
+    """Match an RFQ and commit; returns the number of matches"""
+    # Released before matching, so a change published mid-run queues a fresh job
+    await redis_client.delete(dedup_key(str(rfq_id)))
+
+    async with AsyncSessionLocal() as db:
+        try:
+            matches = await matching_service.find_and_rank_sellers(rfq_id, db)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+    await matching_service.publish_matches({rfq_id: matches})
+    return len(matches)
+
+
+@celery_app.task(
+    name="app.workers.matching_tasks.match_rfq",
+    autoretry_for=(Exception,),
+    retry_backoff=True,
+    retry_backoff_max=settings.MATCHING_JOB_RETRY_BACKOFF_MAX,
+    retry_jitter=True,
+    max_retries=settings.MATCHING_JOB_MAX_RETRIES,
+)
+def match_rfq(rfq_id: str) -> int:
+    """Find and rank sellers for an RFQ (retried with exponential backoff)"""
+    logger.info(f"👷 Matching job started for RFQ {rfq_id}")
+    return worker_loop.run(run_matching(UUID(rfq_id)), settings.MATCHING_JOB_TIME_LIMIT)
+
+
+async def run_batch_matching(rfq_ids: List[UUID]) -> int:
+    """Match many RFQs in one run and commit; returns the number of matches"""
+    await redis_client.delete(*(dedup_key(str(rfq_id)) for rfq_id in rfq_ids))
+
+    async with AsyncSessionLocal() as db:
+        try:
+            results = await matching_service.find_and_rank_sellers_batch(rfq_ids, db)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+    await matching_service.publish_matches(results)
+    return sum(len(matches) for matches in results.values())
+
+
+@celery_app.task(
+    name="app.workers.matching_tasks.match_rfq_batch",
+    autoretry_for=(Exception,),
+    retry_backoff=True,
+    retry_backoff_max=settings.MATCHING_JOB_RETRY_BACKOFF_MAX,
+    retry_jitter=True,
+    max_retries=settings.MATCHING_JOB_MAX_RETRIES,
+)
+def match_rfq_batch(rfq_ids: List[str]) -> int:
+    """Find and rank sellers for many RFQs sharing candidate loads (retried like match_rfq)"""
+    logger.info(f"👷 Batch matching job started for {len(rfq_ids)} RFQs")
+    return worker_loop.run(
+        run_batch_matching([UUID(rfq_id) for rfq_id in rfq_ids]), settings.MATCHING_JOB_TIME_LIMIT
+    )
+
+
+async def run_rematch() -> int:
+    """One incremental re-match pass; returns the number of RFQs updated"""
+    async with AsyncSessionLocal() as db:
+        try:
+            results = await incremental_matcher.run(db)
+        except Exception:
+            await db.rollback()
+            raise
+    return len(results)
+
+
+@celery_app.task(name="app.workers.matching_tasks.rematch_changes")
+def rematch_changes() -> int:
+    """Re-match open RFQs against SKUs and sellers changed since the last pass (beat)"""
+    return worker_loop.run(run_rematch(), settings.MATCHING_JOB_TIME_LIMIT)
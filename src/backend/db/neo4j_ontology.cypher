@@ -36,6 +36,10 @@ CREATE INDEX botanical_name IF NOT EXISTS FOR (i:Ingredient) ON (i.botanical_nam
     source: "common_usage"
 })
 
+// Ontology (single node; version is bumped on every ontology write so
+// parsers reload their in-memory synonym matcher)
+// Properties: version
+
 // Grade (quality standards)
 // Properties: name, standard_body, description, typical_assay_range
 (:Grade {
@@ -230,7 +230,10 @@ CREATE TABLE rfq_matches (
     invited BOOLEAN DEFAULT false,
     invited_at TIMESTAMP,
     
-    created_at TIMESTAMP DEFAULT NOW()
+    created_at TIMESTAMP DEFAULT NOW(),
+    
+    -- One row per RFQ and SKU; re-matching upserts in place
+    UNIQUE(rfq_id, sku_id)
 );
 
 -- Bids
@@ -480,6 +483,7 @@ CREATE TABLE ml_predictions (
 CREATE INDEX idx_companies_type ON companies(company_type);
 CREATE INDEX idx_companies_country ON companies(country);
 CREATE INDEX idx_companies_verified ON companies(verified, is_active);
+CREATE INDEX idx_companies_certifications ON companies USING gin(certifications);
 
 CREATE INDEX idx_users_company ON users(company_id);
 CREATE INDEX idx_users_email ON users(email);
@@ -488,6 +492,8 @@ CREATE INDEX idx_skus_company ON skus(company_id);
 CREATE INDEX idx_skus_ingredient ON skus(ingredient_name);
 CREATE INDEX idx_skus_active ON skus(is_active);
 CREATE INDEX idx_skus_ontology ON skus(ontology_node_id);
+CREATE INDEX idx_skus_certifications ON skus USING gin(certifications);
+CREATE INDEX idx_skus_assay ON skus(assay_min);
 
 CREATE INDEX idx_inventory_sku ON inventory_batches(sku_id);
 CREATE INDEX idx_inventory_available ON inventory_batches(available_kg) WHERE available_kg > 0;
@@ -505,6 +511,7 @@ CREATE INDEX idx_bids_rfq ON bids(rfq_id);
 CREATE INDEX idx_bids_seller ON bids(seller_company_id);
 CREATE INDEX idx_bids_status ON bids(status);
 CREATE INDEX idx_bids_awarded ON bids(is_awarded) WHERE is_awarded = true;
+CREATE UNIQUE INDEX bids_auto_bid_rfq_seller_key ON bids(rfq_id, seller_company_id) WHERE is_auto_bid;
 
 CREATE INDEX idx_pos_buyer ON purchase_orders(buyer_company_id);
 CREATE INDEX idx_pos_seller ON purchase_orders(seller_company_id);
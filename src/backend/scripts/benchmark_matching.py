@@ -0,0 +1,321 @@
+"""
+Matching benchmark harness
+
+Generates a seeded synthetic catalog, serves it from memory (no PostgreSQL
+or Redis round trips) and measures:
+
+- find_and_rank_sellers end to end, per RFQ
+- the batch scoring helpers (candidate batch build + score + rank)
+- the per-row reference scorer, on a sample of candidates
+
+Reports p50/p95/p99 latency, throughput and peak RSS to a JSON file,
+together with the commit and matching settings, so runs can be compared
+across commits.
+
+Usage:
+    python scripts/benchmark_matching.py --scale 1k
+    python scripts/benchmark_matching.py --scale 100k --output bench-100k.json
+    python scripts/benchmark_matching.py --scale 100k --baseline bench-100k.json
+
+With --baseline, exits with status 1 if any p50/p95 latency regressed by
+more than --max-regression (default 10%).
+"""
+import sys
+import os
+import argparse
+import asyncio
+import json
+import platform
+import resource
+import subprocess
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from uuid import UUID
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.redis_client import redis_client
+from app.ml.batch_scorer import CandidateBatch, batch_scorer
+from app.models.company import Company, SKU
+from app.models.rfq import RFQ
+from app.services.catalog_index import catalog_index
+from app.services.match_cache import match_cache
+from app.services.matching_executor import matching_executor
+from app.services.matching_service import MatchingService
+from app.services.seller_feature_store import seller_feature_store
+from scripts.synthetic_catalog import SCALES, generate_catalog
+from tests.reference_scorer import calculate_match_score
+
+
+class InMemorySession:
+    """
+    Minimal AsyncSession serving the synthetic catalog
+
+    Selects return the rows of their entity, narrowed to the UUIDs bound
+    in the statement (id lookups and IN lists); writes are discarded.
+    """
+
+    def __init__(self, catalog):
+        self.rows = {
+            RFQ: {rfq.id: rfq for rfq in catalog.rfqs},
+            SKU: {sku.id: sku for sku in catalog.skus},
+            Company: {company.id: company for company in catalog.suppliers},
+        }
+
+    async def execute(self, statement, params=None):
+        descriptions = getattr(statement, "column_descriptions", None)
+        entity = descriptions[0].get("entity") if descriptions else None
+        rows = self.rows.get(entity)
+        if rows is None:
+            return _Result([])
+
+        ids = _bound_ids(statement)
+        if ids:
+            return _Result([rows[i] for i in ids if i in rows])
+        return _Result(list(rows.values()))
+
+    def begin_nested(self):
+        return _Savepoint()
+
+
+class _Savepoint:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class _Result:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalar(self):
+        return self.rows[0] if self.rows else None
+
+    def scalar_one_or_none(self):
+        return self.rows[0] if self.rows else None
+
+    def scalars(self):
+        return SimpleNamespace(all=lambda: self.rows)
+
+
+def _bound_ids(statement) -> set:
+    ids = set()
+    for value in statement.compile().params.values():
+        if isinstance(value, UUID):
+            ids.add(value)
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            ids.update(v for v in value if isinstance(v, UUID))
+    return ids
+
+
+def summarize(latencies_ms, total_seconds=None) -> dict:
+    """Latency percentiles (ms) and throughput (ops/s)"""
+    values = np.asarray(latencies_ms, dtype=np.float64)
+    if len(values) == 0:
+        return {"count": 0}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    total = total_seconds if total_seconds is not None else values.sum() / 1000
+    return {
+        "count": int(len(values)),
+        "p50_ms": round(float(p50), 4),
+        "p95_ms": round(float(p95), 4),
+        "p99_ms": round(float(p99), 4),
+        "mean_ms": round(float(values.mean()), 4),
+        "throughput_per_s": round(len(values) / total, 3) if total > 0 else None,
+    }
+
+
+def peak_rss_bytes() -> int:
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return usage if sys.platform == "darwin" else usage * 1024
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=os.path.dirname(__file__), stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+async def run(args) -> dict:
+    async def _no_cache(*_args, **_kwargs):
+        return None
+
+    async def _no_scores(*_args, **_kwargs):
+        return {}
+
+    async def _cache_miss(*_args, **_kwargs):
+        return None, {}
+
+    redis_client.cache_rfq_matches = _no_cache
+    # Match stream events (partial and complete) have no subscribers here
+    redis_client.publish_match_event = _no_cache
+    # Every RFQ is ranked: a miss without versions, so nothing is stored either
+    match_cache.lookup = _cache_miss
+    # Seller features are served from the preloaded in-process tier
+    redis_client.get_seller_scores = _no_scores
+    redis_client.cache_seller_scores = _no_cache
+
+    started = time.perf_counter()
+    catalog = generate_catalog(args.scale, seed=args.seed, n_rfqs=args.rfqs)
+    generate_seconds = time.perf_counter() - started
+
+    db = InMemorySession(catalog)
+    started = time.perf_counter()
+    await catalog_index.load(db)
+    index_seconds = time.perf_counter() - started
+    await seller_feature_store.rebuild(db)
+
+    service = MatchingService()
+    sellers = {company.id: company for company in catalog.suppliers}
+
+    # Warm-up (imports, ranker load, allocator)
+    for rfq in catalog.rfqs[:args.warmup]:
+        await service.find_and_rank_sellers(rfq.id, db)
+
+    # End to end
+    match_latencies, candidate_counts, match_counts = [], [], []
+    run_started = time.perf_counter()
+    for rfq in catalog.rfqs:
+        started = time.perf_counter()
+        matches = await service.find_and_rank_sellers(rfq.id, db)
+        match_latencies.append((time.perf_counter() - started) * 1000)
+        match_counts.append(len(matches))
+    run_seconds = time.perf_counter() - run_started
+
+    # Scoring helpers
+    score_latencies = []
+    score_started = time.perf_counter()
+    for rfq in catalog.rfqs:
+        candidates = catalog_index.candidates(rfq.parsed_specs)
+        candidate_counts.append(len(candidates))
+        started = time.perf_counter()
+        batch = CandidateBatch.from_skus(candidates, sellers)
+        batch_scorer.rank(batch_scorer.score(rfq, rfq.parsed_specs, batch))
+        score_latencies.append((time.perf_counter() - started) * 1000)
+    score_seconds = time.perf_counter() - score_started
+
+    # Per-row reference, microseconds per SKU
+    per_row_latencies = []
+    sample = catalog.skus[:args.per_row_sample]
+    for rfq in catalog.rfqs[:5]:
+        for sku in sample:
+            started = time.perf_counter()
+            calculate_match_score(rfq, sku, rfq.parsed_specs, sellers)
+            per_row_latencies.append((time.perf_counter() - started) * 1000)
+
+    matching_executor.shutdown()
+
+    return {
+        "benchmark": "matching",
+        "created_at": datetime.utcnow().isoformat(),
+        "commit": git_commit(),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "settings": {
+            "MIN_MATCH_SCORE": settings.MIN_MATCH_SCORE,
+            "MATCH_TOP_K": settings.MATCH_TOP_K,
+            "MATCHER_RANKER": settings.MATCHER_RANKER,
+            "MATCHING_WORKERS": settings.MATCHING_WORKERS,
+            "MATCHING_PARALLEL_MIN_CANDIDATES": settings.MATCHING_PARALLEL_MIN_CANDIDATES,
+        },
+        "dataset": {
+            "scale": args.scale,
+            "seed": args.seed,
+            "skus": len(catalog.skus),
+            "suppliers": len(catalog.suppliers),
+            "rfqs": len(catalog.rfqs),
+            "candidates_per_rfq": summarize_counts(candidate_counts),
+            "matches_per_rfq": summarize_counts(match_counts),
+            "generate_seconds": round(generate_seconds, 3),
+            "index_load_seconds": round(index_seconds, 3),
+        },
+        "results": {
+            "find_and_rank_sellers": summarize(match_latencies, run_seconds),
+            "batch_scoring": summarize(score_latencies, score_seconds),
+            "per_row_scoring": summarize(per_row_latencies),
+        },
+        "peak_rss_bytes": peak_rss_bytes(),
+    }
+
+
+def summarize_counts(counts) -> dict:
+    values = np.asarray(counts)
+    if len(values) == 0:
+        return {}
+    return {
+        "min": int(values.min()),
+        "median": float(np.median(values)),
+        "max": int(values.max()),
+    }
+
+
+def compare(report: dict, baseline: dict, max_regression: float) -> list:
+    """Latency regressions beyond the allowed fraction"""
+    if report["dataset"]["scale"] != baseline["dataset"]["scale"] or \
+            report["dataset"]["seed"] != baseline["dataset"]["seed"] or \
+            report["dataset"]["rfqs"] != baseline["dataset"]["rfqs"]:
+        raise SystemExit("Baseline was produced with a different scale, seed or RFQ count")
+
+    regressions = []
+    for stage, current in report["results"].items():
+        previous = baseline["results"].get(stage)
+        if not previous or not current.get("count"):
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            if current[metric] > previous[metric] * (1 + max_regression):
+                regressions.append(
+                    f"{stage} {metric}: {previous[metric]:.3f} -> {current[metric]:.3f} "
+                    f"(+{(current[metric] / previous[metric] - 1) * 100:.1f}%)"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=list(SCALES), default="1k")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--rfqs", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--per-row-sample", type=int, default=1000)
+    parser.add_argument("--output", help="JSON report path (default: benchmark-matching-<scale>.json)")
+    parser.add_argument("--baseline", help="Previous JSON report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.10)
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+
+    output = args.output or f"benchmark-matching-{args.scale}.json"
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for stage, result in report["results"].items():
+        print(
+            f"{stage:<24} p50 {result['p50_ms']:>10.3f} ms  p95 {result['p95_ms']:>10.3f} ms  "
+            f"p99 {result['p99_ms']:>10.3f} ms  {result['throughput_per_s']:>10.1f}/s"
+        )
+    print(f"peak RSS {report['peak_rss_bytes'] / 2**20:.1f} MiB -> {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Benchmark per-RFQ ranking latency of the weighted and learned rankers (CPU)
+
+Usage:
+    python scripts/benchmark_rankers.py --candidates 5000 --rfqs 200
+    python scripts/benchmark_rankers.py --model-dir models/seller_matcher
+
+Without --model-dir, small demo XGBoost and LightGBM models are trained on
+synthetic features so the comparison can run anywhere.
+"""
+import sys
+import os
+import argparse
+import random
+import tempfile
+import time
+from decimal import Decimal
+from types import SimpleNamespace
+from uuid import uuid4
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from app.core.config import settings
+from app.ml.batch_scorer import CandidateBatch, batch_scorer
+from app.ml.ranker import FEATURE_NAMES, WeightedRanker, get_ranker
+
+
+CERTS = ["GMP", "ISO9001", "Organic", "Halal", "Kosher", "HACCP"]
+
+RFQ_SPECS = {
+    "ingredient": "Curcumin",
+    "assay_min": 95.0,
+    "grade": "USP",
+    "form": "Powder",
+    "certifications_required": ["GMP", "Organic"],
+}
+
+
+def build_batch(n_candidates: int, seed: int = 42) -> CandidateBatch:
+    """Synthetic candidate batch"""
+    rng = random.Random(seed)
+    sellers = {}
+    for _ in range(max(1, n_candidates // 20)):
+        seller = SimpleNamespace(
+            id=uuid4(),
+            rating=Decimal(str(round(rng.uniform(2.5, 5.0), 2))),
+            on_time_delivery_rate=Decimal(str(round(rng.uniform(60, 100), 2))),
+            certifications=rng.sample(CERTS, rng.randint(0, 3)),
+            quality_score=Decimal("0"),
+            verified=True,
+        )
+        sellers[seller.id] = seller
+
+    seller_ids = list(sellers)
+    skus = [
+        SimpleNamespace(
+            id=uuid4(),
+            company_id=rng.choice(seller_ids),
+            grade=rng.choice(["USP", "BP", "Food Grade", None]),
+            form=rng.choice(["Powder", "Extract", None]),
+            assay_min=Decimal(str(round(rng.uniform(85, 99), 2))),
+            base_price_usd=Decimal(str(round(rng.uniform(20, 70), 2))),
+            lead_time_days=rng.choice([None, 10, 21, 30, 45]),
+            certifications=rng.sample(CERTS, rng.randint(0, 3)),
+        )
+        for _ in range(n_candidates)
+    ]
+    return CandidateBatch.from_skus(skus, sellers)
+
+
+def train_demo_models(model_dir: str):
+    """Fit small XGBoost and LightGBM models that imitate the weighted sum"""
+    rng = np.random.default_rng(0)
+    features = rng.random((20000, len(FEATURE_NAMES)))
+    labels = (WeightedRanker().predict(features) >= settings.MIN_MATCH_SCORE).astype(np.float64)
+
+    try:
+        import xgboost
+        booster = xgboost.train(
+            {"objective": "binary:logistic", "max_depth": 6},
+            xgboost.DMatrix(features, label=labels), num_boost_round=100
+        )
+        booster.save_model(os.path.join(model_dir, "model.json"))
+    except ImportError:
+        print("xgboost not installed, skipping")
+
+    try:
+        import lightgbm
+        booster = lightgbm.train(
+            {"objective": "binary", "num_leaves": 63, "verbose": -1},
+            lightgbm.Dataset(features, label=labels), num_boost_round=100
+        )
+        booster.save_model(os.path.join(model_dir, "model.txt"))
+    except ImportError:
+        print("lightgbm not installed, skipping")
+
+
+def benchmark(kind: str, model_dir: str, batch: CandidateBatch, n_rfqs: int):
+    """Per-RFQ latency (score + rank) in milliseconds"""
+    settings.MATCHER_RANKER = kind
+    settings.MATCHER_MODEL_PATH = model_dir
+    ranker = get_ranker()
+    if ranker.name != kind:
+        return None
+
+    rfq = SimpleNamespace(target_price_usd=Decimal("45.00"))
+    batch_scorer.rank(batch_scorer.score(rfq, RFQ_SPECS, batch))  # warm-up
+
+    latencies = []
+    for _ in range(n_rfqs):
+        started = time.perf_counter()
+        batch_scorer.rank(batch_scorer.score(rfq, RFQ_SPECS, batch))
+        latencies.append((time.perf_counter() - started) * 1000)
+    return np.percentile(latencies, [50, 95, 99])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=5000)
+    parser.add_argument("--rfqs", type=int, default=200)
+    parser.add_argument("--model-dir", help="Directory holding model.json (XGBoost) and/or model.txt (LightGBM)")
+    args = parser.parse_args()
+
+    batch = build_batch(args.candidates)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_dir = args.model_dir
+        if not model_dir:
+            train_demo_models(tmp)
+            model_dir = tmp
+
+        print(f"{args.rfqs} RFQs x {args.candidates} candidates")
+        print(f"{'ranker':<10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+        for kind in ("weighted", "xgboost", "lightgbm"):
+            result = benchmark(kind, model_dir, batch, args.rfqs)
+            if result is None:
+                print(f"{kind:<10} {'(no model)':>10}")
+                continue
+            p50, p95, p99 = result
+            print(f"{kind:<10} {p50:>10.3f} {p95:>10.3f} {p99:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
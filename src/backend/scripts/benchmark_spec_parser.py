@@ -0,0 +1,128 @@
+"""
+Benchmark spec field extraction throughput (specs/sec)
+
+Compares the single-pass extractor with one re.search per rule (how the
+parser extracted fields before), on the golden spec corpus.
+
+With --batch, also compares parse() per spec with parse_many() over the
+corpus. Ontology lookups are answered from the corpus' ingredient map
+after --ontology-latency-ms per round trip, standing in for Neo4j.
+
+Usage:
+    python scripts/benchmark_spec_parser.py
+    python scripts/benchmark_spec_parser.py --rounds 50
+    python scripts/benchmark_spec_parser.py --batch --ontology-latency-ms 2
+"""
+import sys
+import os
+import argparse
+import asyncio
+import json
+import re
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from loguru import logger
+
+from app.core.config import settings
+from app.core.neo4j_client import neo4j_driver
+from app.ml.spec_extractor import RULES, spec_extractor
+from app.ml.spec_parser import SpecParser
+
+
+CORPUS = os.path.join(os.path.dirname(__file__), '..', 'tests', 'data', 'spec_parser_golden.json')
+
+PER_RULE = [re.compile(rule.pattern, re.IGNORECASE) for rule in RULES]
+
+
+def per_rule_hits(text: str):
+    """Leftmost hit of every rule, one search per rule"""
+    found = {}
+    for index, pattern in enumerate(PER_RULE):
+        match = pattern.search(text)
+        if match:
+            found[index] = (match.group(), match.groupdict().get("v"))
+    return found
+
+
+def throughput(func, texts, rounds: int) -> float:
+    """Specs per second over ``rounds`` passes of the corpus"""
+    for text in texts:
+        func(text)  # warm-up
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for text in texts:
+            func(text)
+    return rounds * len(texts) / (time.perf_counter() - started)
+
+
+def stub_ontology(ontology: dict, latency_ms: float):
+    """Answer ontology lookups from a map, one simulated round trip per call"""
+    def _entry(text):
+        if text not in ontology:
+            return None
+        return {
+            "ingredient": {"name": text.title(), "botanical_name": None, "cas_number": None, "id": ontology[text]},
+            "confidence": 0.95,
+        }
+
+    def _normalize(text):
+        time.sleep(latency_ms / 1000)
+        return _entry(text)
+
+    def _normalize_many(texts):
+        time.sleep(latency_ms / 1000)
+        return {text: _entry(text) for text in texts}
+
+    neo4j_driver.normalize_ingredient_name = _normalize
+    neo4j_driver.normalize_ingredient_names = _normalize_many
+
+
+async def batch_throughput(texts) -> tuple:
+    """Specs per second through parse() one by one and through parse_many()"""
+    parser = SpecParser()
+    await parser.parse_many(texts[:1])  # warm-up (thread pool start)
+
+    started = time.perf_counter()
+    for text in texts:
+        await parser.parse(text)
+    single = len(texts) / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await parser.parse_many(texts)
+    batch = len(texts) / (time.perf_counter() - started)
+    return single, batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--batch", action="store_true", help="Also compare parse() with parse_many()")
+    parser.add_argument("--ontology-latency-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    with open(CORPUS) as f:
+        corpus = json.load(f)
+    texts = [case["text"].lower().strip() for case in corpus["cases"]]
+
+    mismatches = sum(spec_extractor.hits(text) != per_rule_hits(text) for text in texts)
+    print(f"{len(texts)} specs, {len(RULES)} rules, {mismatches} mismatches")
+
+    per_rule = throughput(per_rule_hits, texts, args.rounds)
+    single_pass = throughput(spec_extractor.hits, texts, args.rounds)
+    print(f"{'extractor':<12} {'specs/sec':>12}")
+    print(f"{'per-rule':<12} {per_rule:>12,.0f}")
+    print(f"{'single-pass':<12} {single_pass:>12,.0f}  ({single_pass / per_rule:.2f}x)")
+
+    if args.batch:
+        logger.remove()
+        settings.PARSE_CACHE_ENABLED = False  # measure parsing, not the cache
+        stub_ontology(corpus["ontology"], args.ontology_latency_ms)
+        single, batch = asyncio.run(batch_throughput([case["text"] for case in corpus["cases"]]))
+        print(f"\n{'parser':<12} {'specs/sec':>12}  (ontology round trip {args.ontology_latency_ms} ms)")
+        print(f"{'parse':<12} {single:>12,.0f}")
+        print(f"{'parse_many':<12} {batch:>12,.0f}  ({batch / single:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
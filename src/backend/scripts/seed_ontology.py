@@ -62,6 +62,10 @@ def seed_ontology():
     
     logger.info(f"✅ Ontology seeding complete: {success_count}/{len(statements)} statements succeeded")
     
+    # Running parsers reload their synonym matcher when the version changes
+    version = neo4j_driver.bump_ontology_version()
+    logger.info(f"🔖 Ontology version {version}")
+    
     # Verify data
     try:
         result = neo4j_driver.execute_query("MATCH (n:Ingredient) RETURN count(n) as count")
@@ -0,0 +1,180 @@
+"""
+Seeded synthetic catalog generator (companies, SKUs and RFQs)
+
+Builds unsaved ORM objects with factory-boy and Faker. The same seed and
+scale always produce the same rows, ids included, so benchmark runs are
+comparable across commits.
+
+Usage:
+    from scripts.synthetic_catalog import generate_catalog
+    catalog = generate_catalog("100k", seed=42)
+"""
+import sys
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import List
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import factory
+import factory.random
+
+from app.models.company import Company, SKU
+from app.models.rfq import RFQ, RFQStatus
+
+
+# SKU counts per named scale
+SCALES = {
+    "1k": 1_000,
+    "100k": 100_000,
+    "1m": 1_000_000,
+}
+
+SKUS_PER_SUPPLIER = 50
+
+INGREDIENTS = [
+    "Curcumin", "Ashwagandha", "Vitamin C", "Omega-3", "Whey Protein", "Collagen Peptides",
+    "Green Tea Extract", "Resveratrol", "Quercetin", "Berberine", "Magnesium Glycinate",
+    "Zinc Picolinate", "Vitamin D3", "Vitamin K2", "Coenzyme Q10", "Alpha Lipoic Acid",
+    "Melatonin", "L-Theanine", "Rhodiola Rosea", "Ginkgo Biloba", "Panax Ginseng",
+    "Milk Thistle", "Saw Palmetto", "Elderberry", "Echinacea", "Spirulina", "Chlorella",
+    "Creatine Monohydrate", "Beta Alanine", "L-Carnitine", "Glucosamine", "Chondroitin",
+    "MSM", "Hyaluronic Acid", "Biotin", "Folic Acid", "Vitamin B12", "Iron Bisglycinate",
+    "Calcium Citrate", "Probiotic Blend", "Inulin", "Psyllium Husk", "Maca Root",
+    "Tribulus Terrestris", "Fenugreek", "Garcinia Cambogia", "Lutein", "Astaxanthin",
+    "Lycopene", "Grape Seed Extract", "Pine Bark Extract", "Boswellia", "Ginger Root",
+    "Cinnamon Bark", "Black Pepper Extract", "Lion's Mane", "Reishi", "Cordyceps",
+    "Moringa", "Apple Cider Vinegar",
+]
+
+NAME_VARIANTS = ["{}", "{} Extract", "{} Powder", "Organic {}", "{} 95%"]
+
+GRADES = ["USP", "BP", "EP", "Food Grade", "Pharmaceutical Grade", "Feed Grade"]
+FORMS = ["Powder", "Extract", "Oil", "Granules", "Liquid", "Capsules"]
+CERTIFICATIONS = ["GMP", "ISO9001", "ISO22000", "Organic", "Halal", "Kosher", "HACCP", "FSSC22000", "NSF"]
+COUNTRIES = ["IN", "CN", "US", "DE", "FR", "BR", "VN", "TH", "ES", "IT"]
+
+
+def ingredient_weights() -> List[float]:
+    """Zipf-like popularity, so candidate set sizes vary the way real catalogs do"""
+    return [1.0 / (rank + 1) for rank in range(len(INGREDIENTS))]
+
+
+def ontology_node_id(ingredient: str) -> str:
+    code = "".join(ch for ch in ingredient.upper() if ch.isalnum())[:4]
+    return f"ING-{code}-{INGREDIENTS.index(ingredient) + 1:03d}"
+
+
+def _sample(values: List[str], low: int, high: int) -> List[str]:
+    return factory.random.randgen.sample(values, factory.random.randgen.randint(low, high))
+
+
+def _money(low: float, high: float) -> Decimal:
+    return Decimal(str(round(factory.random.randgen.uniform(low, high), 2)))
+
+
+class SupplierFactory(factory.Factory):
+    class Meta:
+        model = Company
+
+    id = factory.Faker("uuid4", cast_to=None)
+    name = factory.Faker("company")
+    company_type = "supplier"
+    country = factory.LazyFunction(lambda: factory.random.randgen.choice(COUNTRIES))
+    verified = True
+    certifications = factory.LazyFunction(lambda: _sample(CERTIFICATIONS, 0, 4))
+    rating = factory.LazyFunction(lambda: _money(2.5, 5.0))
+    on_time_delivery_rate = factory.LazyFunction(lambda: _money(60, 100))
+    is_active = True
+
+
+class SKUFactory(factory.Factory):
+    class Meta:
+        model = SKU
+
+    class Params:
+        ingredient = "Curcumin"
+
+    id = factory.Faker("uuid4", cast_to=None)
+    sku_code = factory.Sequence(lambda n: f"SKU-{n:07d}")
+    ingredient_name = factory.LazyAttribute(
+        lambda o: factory.random.randgen.choice(NAME_VARIANTS).format(o.ingredient)
+    )
+    ontology_node_id = factory.LazyAttribute(lambda o: ontology_node_id(o.ingredient))
+    grade = factory.LazyFunction(lambda: factory.random.randgen.choice(GRADES))
+    assay_min = factory.LazyFunction(lambda: _money(80, 99.5))
+    form = factory.LazyFunction(lambda: factory.random.randgen.choice(FORMS))
+    base_price_usd = factory.LazyFunction(lambda: _money(5, 120))
+    moq_kg = factory.LazyFunction(lambda: Decimal(factory.random.randgen.choice([25, 50, 100, 500, 1000])))
+    certifications = factory.LazyFunction(lambda: _sample(CERTIFICATIONS, 0, 3))
+    is_active = True
+    lead_time_days = factory.LazyFunction(lambda: factory.random.randgen.choice([None, 7, 14, 21, 30, 45, 60]))
+
+
+class RFQFactory(factory.Factory):
+    class Meta:
+        model = RFQ
+
+    class Params:
+        ingredient = "Curcumin"
+
+    id = factory.Faker("uuid4", cast_to=None)
+    rfq_number = factory.Sequence(lambda n: f"RFQ-BENCH-{n:06d}")
+    buyer_company_id = factory.Faker("uuid4", cast_to=None)
+    created_by_user_id = factory.Faker("uuid4", cast_to=None)
+    ingredient_name = factory.LazyAttribute(lambda o: o.ingredient)
+    raw_specification = factory.LazyAttribute(lambda o: f"Need {o.ingredient}")
+    parsed_specs = factory.LazyAttribute(lambda o: _rfq_specs(o.ingredient))
+    quantity_required_kg = factory.LazyFunction(lambda: Decimal(factory.random.randgen.choice([100, 500, 1000, 5000])))
+    target_price_usd = factory.LazyFunction(
+        lambda: factory.random.randgen.choice([None, _money(10, 100)])
+    )
+    quotation_deadline = factory.LazyFunction(lambda: datetime(2030, 1, 1) + timedelta(days=14))
+    status = RFQStatus.PUBLISHED
+
+
+def _rfq_specs(ingredient: str) -> dict:
+    rng = factory.random.randgen
+    specs = {"ingredient": ingredient}
+    if rng.random() < 0.7:
+        specs["grade"] = rng.choice(GRADES)
+    if rng.random() < 0.8:
+        specs["assay_min"] = float(rng.choice([90, 95, 98]))
+    if rng.random() < 0.8:
+        specs["form"] = rng.choice(FORMS)
+    if rng.random() < 0.8:
+        specs["certifications_required"] = _sample(CERTIFICATIONS, 1, 3)
+    return specs
+
+
+@dataclass
+class SyntheticCatalog:
+    scale: str
+    seed: int
+    suppliers: List[Company]
+    skus: List[SKU]
+    rfqs: List[RFQ]
+
+
+def generate_catalog(scale: str, seed: int = 42, n_rfqs: int = 200) -> SyntheticCatalog:
+    """Deterministic suppliers, SKUs and open RFQs for a named scale"""
+    n_skus = SCALES[scale]
+    factory.random.reseed_random(seed)
+    SKUFactory.reset_sequence()
+    RFQFactory.reset_sequence()
+    rng = factory.random.randgen
+
+    suppliers = SupplierFactory.build_batch(max(20, n_skus // SKUS_PER_SUPPLIER))
+    weights = ingredient_weights()
+
+    skus = []
+    for ingredient in rng.choices(INGREDIENTS, weights=weights, k=n_skus):
+        skus.append(SKUFactory.build(ingredient=ingredient, company_id=rng.choice(suppliers).id))
+
+    rfqs = [
+        RFQFactory.build(ingredient=ingredient)
+        for ingredient in rng.choices(INGREDIENTS, weights=weights, k=n_rfqs)
+    ]
+
+    return SyntheticCatalog(scale=scale, seed=seed, suppliers=suppliers, skus=skus, rfqs=rfqs)
@@ -0,0 +1,135 @@
+"""
+Shared test fixtures
+"""
+import pytest
+from types import SimpleNamespace
+
+from app.models.company import Company, SKU
+from app.models.rfq import RFQ, RFQMatch
+
+
+class RecordingSession:
+    """
+    In-memory stand-in for AsyncSession
+
+    Serves the rows it was seeded with for any select of that entity and
+    records every statement executed, so tests can assert query counts
+    without a running PostgreSQL.
+    """
+
+    def __init__(self, rfqs=(), skus=(), companies=(), matches=()):
+        self.rows = {
+            RFQ: list(rfqs),
+            SKU: list(skus),
+            Company: list(companies),
+            RFQMatch: list(matches),
+        }
+        self.statements = []
+        self.parameters = []
+        self.added = []
+        self.flushes = 0
+        self.commits = 0
+        self.savepoints = 0
+        self.savepoint_rollbacks = 0
+
+    async def execute(self, statement, params=None):
+        self.statements.append(statement)
+        self.parameters.append(params)
+        descriptions = getattr(statement, "column_descriptions", None)
+        entity = descriptions[0].get("entity") if descriptions else None
+        return FakeResult(self.rows.get(entity, []))
+
+    def add(self, instance):
+        self.added.append(instance)
+
+    def add_all(self, instances):
+        self.added.extend(instances)
+
+    async def flush(self):
+        self.flushes += 1
+
+    async def commit(self):
+        self.commits += 1
+
+    def begin_nested(self):
+        return RecordingSavepoint(self)
+
+
+class RecordingSavepoint:
+    """Savepoint context of a RecordingSession; counts rollbacks"""
+
+    def __init__(self, session):
+        self.session = session
+
+    async def __aenter__(self):
+        self.session.savepoints += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.session.savepoint_rollbacks += 1
+        return False
+
+
+class FakeResult:
+    """Subset of SQLAlchemy's Result API used by the services"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalar_one_or_none(self):
+        return self.rows[0] if self.rows else None
+
+    def scalars(self):
+        return SimpleNamespace(all=lambda: list(self.rows))
+
+    def all(self):
+        return list(self.rows)
+
+
+@pytest.fixture
+def recording_session():
+    """Factory for RecordingSession instances"""
+    return RecordingSession
+
+
+@pytest.fixture(autouse=True)
+def empty_seller_feature_store():
+    """Each test starts with an empty in-process seller feature store"""
+    from app.services.seller_feature_store import seller_feature_store
+
+    seller_feature_store.clear()
+    yield seller_feature_store
+    seller_feature_store.clear()
+
+
+@pytest.fixture(autouse=True)
+def no_parse_cache(monkeypatch):
+    """Specs are parsed uncached unless a test enables the parse cache"""
+    from app.core.config import settings
+    from app.ml.parse_cache import parse_cache
+
+    monkeypatch.setattr(settings, "PARSE_CACHE_ENABLED", False)
+    parse_cache.clear()
+    yield parse_cache
+    parse_cache.clear()
+
+
+@pytest.fixture
+def no_redis(monkeypatch):
+    """Silence Redis reads and writes made by the matching service"""
+    from app.core.redis_client import redis_client
+
+    async def _noop(*args, **kwargs):
+        return None
+
+    async def _miss(*args, **kwargs):
+        return {}
+
+    monkeypatch.setattr(redis_client, "cache_rfq_matches", _noop)
+    monkeypatch.setattr(redis_client, "publish_match_event", _noop)
+    monkeypatch.setattr(redis_client, "cache_seller_scores", _noop)
+    monkeypatch.setattr(redis_client, "get_seller_scores", _miss)
+    monkeypatch.setattr(redis_client, "get_match_cache", _noop)
+    monkeypatch.setattr(redis_client, "cache_match_result", _noop)
+    return redis_client
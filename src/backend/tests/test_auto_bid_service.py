@@ -0,0 +1,132 @@
+"""
+Tests for auto-bid generation after matching
+"""
+import pytest
+from decimal import Decimal
+from sqlalchemy.dialects import postgresql
+
+from app.core.config import settings
+from app.models.rfq import Bid
+from app.services.auto_bid_service import AutoBidService
+from app.services.matching_service import MatchingService
+from tests.test_matching_service import make_catalog, make_rfq
+
+
+def make_match(sku, rank: int, eligible: bool = True, price: str = "46.20") -> dict:
+    return {
+        "seller_company_id": sku.company_id,
+        "sku_id": sku.id,
+        "match_score": Decimal("0.8823"),
+        "rank": rank,
+        "explanation": {},
+        "recommended_price_usd": Decimal(price),
+        "auto_bid_eligible": eligible,
+    }
+
+
+class TestAutoBids:
+    """Eligible matches become one bid per seller, in one insert"""
+
+    @pytest.mark.asyncio
+    async def test_one_insert_one_bid_per_seller(self, recording_session):
+        rfq = make_rfq()
+        skus, _ = make_catalog(6, 2)
+        matches = [make_match(sku, rank) for rank, sku in enumerate(skus, 1)]
+        matches[0]["auto_bid_eligible"] = False
+        db = recording_session()
+
+        rows = await AutoBidService().generate_bids(
+            [rfq], {rfq.id: matches}, db, {sku.id: sku for sku in skus}
+        )
+
+        # skus alternate sellers; each seller's best eligible rank wins
+        assert [row["sku_id"] for row in rows] == [skus[1].id, skus[2].id]
+        assert len(db.statements) == 1
+        assert len({row["bid_number"] for row in rows}) == 2
+        assert all(row["is_auto_bid"] and row["total_price_usd"] == row["unit_price_usd"] * 1000 for row in rows)
+
+        assert (db.savepoints, db.savepoint_rollbacks) == (1, 0)
+
+        sql = str(db.statements[0].compile(dialect=postgresql.dialect()))
+        assert "ON CONFLICT (rfq_id, seller_company_id) WHERE is_auto_bid DO UPDATE" in sql
+        # Only pending auto-bids whose offer changed are refreshed
+        assert "WHERE bids.status = %(status_1)s AND (bids.sku_id IS DISTINCT FROM excluded.sku_id" in sql
+
+    @pytest.mark.asyncio
+    async def test_failed_insert_rolls_back_bids_only(self, recording_session):
+        rfq = make_rfq()
+        skus, _ = make_catalog(2, 2)
+        db = recording_session()
+
+        async def _fail(statement, params=None):
+            raise RuntimeError('type "bidstatus" does not exist')
+
+        db.execute = _fail
+        rows = await AutoBidService().generate_bids(
+            [rfq], {rfq.id: [make_match(sku, rank) for rank, sku in enumerate(skus, 1)]},
+            db, {sku.id: sku for sku in skus}
+        )
+
+        assert rows == []
+        assert (db.savepoints, db.savepoint_rollbacks) == (1, 1)
+
+    def test_status_uses_schema_enum(self):
+        column = Bid.__table__.c.status
+        assert column.type.name == "bid_status"
+        assert column.type.enums == ["draft", "submitted", "under_review", "accepted", "rejected", "withdrawn"]
+
+    @pytest.mark.asyncio
+    async def test_price_capped_at_max_margin(self, recording_session, monkeypatch):
+        monkeypatch.setattr(settings, "MAX_AUTO_BID_MARGIN", 0.05)
+        rfq = make_rfq()
+        skus, _ = make_catalog(1, 1)
+        skus[0].base_price_usd = Decimal("40.00")
+
+        rows = await AutoBidService().generate_bids(
+            [rfq], {rfq.id: [make_match(skus[0], 1, price="44.00")]},
+            recording_session(), {skus[0].id: skus[0]}
+        )
+
+        assert rows[0]["unit_price_usd"] == Decimal("42.00")
+        assert rows[0]["auto_bid_params"]["recommended_price_usd"] == 44.0
+
+    @pytest.mark.asyncio
+    async def test_skips_skus_without_base_price_or_lead_time(self, recording_session):
+        rfq = make_rfq()
+        skus, _ = make_catalog(2, 2)
+        skus[0].base_price_usd = None
+        skus[1].lead_time_days = None
+        db = recording_session()
+
+        rows = await AutoBidService().generate_bids(
+            [rfq], {rfq.id: [make_match(sku, rank) for rank, sku in enumerate(skus, 1)]},
+            db, {sku.id: sku for sku in skus}
+        )
+
+        assert rows == [] and db.statements == []
+
+    @pytest.mark.asyncio
+    async def test_missing_skus_loaded_in_one_query(self, recording_session):
+        rfq = make_rfq()
+        skus, _ = make_catalog(4, 4)
+        db = recording_session(skus=skus)
+
+        rows = await AutoBidService().generate_bids(
+            [rfq], {rfq.id: [make_match(sku, rank) for rank, sku in enumerate(skus, 1)]}, db
+        )
+
+        # SKU load + insert
+        assert len(rows) == 4 and len(db.statements) == 2
+
+    @pytest.mark.asyncio
+    async def test_disabled(self, recording_session, no_redis, monkeypatch):
+        monkeypatch.setattr(settings, "ENABLE_AUTO_BIDDING", False)
+        rfq = make_rfq()
+        skus, sellers = make_catalog(20, 4)
+        db = recording_session(rfqs=[rfq], skus=skus, companies=sellers)
+
+        matches = await MatchingService().find_and_rank_sellers(rfq.id, db)
+
+        assert any(m["auto_bid_eligible"] for m in matches)
+        # RFQ + candidate SKUs + seller load + match upsert; no bid insert
+        assert len(db.statements) == 4
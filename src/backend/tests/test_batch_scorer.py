@@ -0,0 +1,253 @@
+"""
+Parity tests for the vectorized batch scoring engine
+Checks BatchScorer against the per-row reference scorer
+"""
+import pytest
+import random
+from types import SimpleNamespace
+from uuid import uuid4
+from decimal import Decimal
+
+from app.ml.batch_scorer import CandidateBatch, batch_scorer
+from app.ml.seller_features import mask_words, popcount64
+from app.services.matching_service import MatchingService
+from tests.reference_scorer import calculate_match_score, calculate_recommended_price
+
+
+GRADES = ["USP", "BP", "Food Grade", "Pharmaceutical Grade", None]
+FORMS = ["Powder", "Extract", "powder", "Oil", None]
+CERTS = ["GMP", "ISO9001", "Organic", "Halal", "Kosher", "HACCP"]
+
+
+def build_catalog(n_skus: int, n_sellers: int, seed: int = 42):
+    """Seeded random sellers and SKUs covering every scoring branch"""
+    rng = random.Random(seed)
+
+    sellers = {}
+    for _ in range(n_sellers):
+        seller = SimpleNamespace(
+            id=uuid4(),
+            rating=Decimal(str(round(rng.uniform(2.5, 5.0), 2))),
+            on_time_delivery_rate=Decimal(str(round(rng.choice([0, rng.uniform(60, 100)]), 2))),
+            certifications=rng.sample(CERTS, rng.randint(0, 3)),
+            quality_score=Decimal("0"),
+            verified=True
+        )
+        sellers[seller.id] = seller
+
+    seller_ids = list(sellers)
+    skus = []
+    for _ in range(n_skus):
+        skus.append(SimpleNamespace(
+            id=uuid4(),
+            company_id=rng.choice(seller_ids),
+            grade=rng.choice(GRADES),
+            form=rng.choice(FORMS),
+            assay_min=rng.choice([None, Decimal(str(round(rng.uniform(85, 99), 2)))]),
+            base_price_usd=Decimal(str(round(rng.uniform(20, 70), 2))),
+            lead_time_days=rng.choice([None, 10, 21, 25, 30, 45]),
+            certifications=rng.sample(CERTS, rng.randint(0, 3))
+        ))
+
+    return skus, sellers
+
+
+RFQ_CASES = [
+    (
+        {"ingredient": "Curcumin", "assay_min": 95.0, "grade": "USP", "form": "Powder",
+         "certifications_required": ["GMP", "Organic"]},
+        Decimal("45.00")
+    ),
+    ({"ingredient": "Curcumin", "assay_min": 90.5, "form": "Extract"}, Decimal("38.50")),
+    ({"ingredient": "Curcumin", "certifications_required": ["GMP", "Halal", "Kosher"]}, None),
+    ({"ingredient": "Curcumin"}, Decimal("60.00")),
+]
+
+
+class TestBatchScorerParity:
+    """BatchScorer must rank candidates exactly like the per-row code"""
+
+    @pytest.mark.parametrize("parsed_specs,target_price", RFQ_CASES)
+    def test_scores_and_ranking_match_per_row(self, parsed_specs, target_price):
+        skus, sellers = build_catalog(n_skus=400, n_sellers=40)
+        rfq = SimpleNamespace(target_price_usd=target_price, parsed_specs=parsed_specs)
+
+        # Per-row reference
+        expected = []
+        for sku in skus:
+            match_data = calculate_match_score(rfq, sku, parsed_specs, sellers)
+            expected.append(match_data)
+
+        # Vectorized
+        batch = CandidateBatch.from_skus(skus, sellers)
+        scores = batch_scorer.score(rfq, parsed_specs, batch)
+
+        for i, match_data in enumerate(expected):
+            assert float(scores["match_score"][i]) == pytest.approx(
+                float(match_data["match_score"]), abs=1e-12
+            )
+            assert bool(scores["auto_bid_eligible"][i]) == match_data["auto_bid_eligible"]
+            for feature, value in match_data["explanation"].items():
+                if feature != "reasons":
+                    assert float(scores[feature][i]) == pytest.approx(value, abs=1e-12)
+
+        # Same threshold and same ordering
+        reference = [m for m in expected if m["match_score"] >= 0.6]
+        reference.sort(key=lambda x: x["match_score"], reverse=True)
+        ranked = batch_scorer.rank(scores)
+
+        assert [batch.sku_ids[i] for i in ranked] == [m["sku_id"] for m in reference]
+
+    def test_empty_batch(self):
+        batch = CandidateBatch.from_skus([], {})
+        rfq = SimpleNamespace(target_price_usd=Decimal("45.00"))
+        scores = batch_scorer.score(rfq, RFQ_CASES[0][0], batch)
+
+        assert len(scores["match_score"]) == 0
+        assert len(batch_scorer.rank(scores)) == 0
+
+
+class TestCertificationBitmasks:
+    """Bitmask coverage equals the set-based share of required certifications"""
+
+    def test_popcount(self):
+        rng = random.Random(7)
+        values = [0, 1, 2 ** 64 - 1] + [rng.getrandbits(64) for _ in range(1000)]
+        counts = popcount64(mask_words(values, 1)[:, 0])
+
+        assert counts.tolist() == [bin(value).count("1") for value in values]
+
+    def test_coverage_beyond_one_word(self):
+        rng = random.Random(3)
+        names = [f"CERT-{i:03d}" for i in range(150)]
+        skus, sellers = build_catalog(n_skus=200, n_sellers=20)
+        for sku in skus:
+            sku.certifications = rng.sample(names, rng.randint(0, 6))
+        for seller in sellers.values():
+            seller.certifications = rng.sample(names, rng.randint(0, 6))
+
+        batch = CandidateBatch.from_skus(skus, sellers)
+        assert batch.cert_masks.shape == (200, 3)
+
+        required = ["CERT-001", "CERT-070", "CERT-149", "NOT-INTERNED"]
+        scores = batch_scorer._certification_match({"certifications_required": required}, batch)
+        expected = [
+            len(set(required) & (set(sku.certifications) | set(sellers[sku.company_id].certifications))) / 4
+            for sku in skus
+        ]
+        assert scores.tolist() == expected
+
+
+class TestDecimalConversion:
+    """
+    Float feature math may deviate from the Decimal reference only within
+    the documented tolerance: half a unit of NUMERIC(5,4) for the persisted
+    match score, and not at all for the recommended price
+    """
+
+    SCORE_TOLERANCE = Decimal("0.00005") + Decimal("1e-12")
+
+    @pytest.mark.parametrize("parsed_specs,target_price", RFQ_CASES)
+    def test_persisted_values_within_tolerance(self, parsed_specs, target_price):
+        skus, sellers = build_catalog(n_skus=400, n_sellers=40)
+        rfq = SimpleNamespace(target_price_usd=target_price, parsed_specs=parsed_specs)
+
+        service = MatchingService()
+        batch = CandidateBatch.from_skus(skus, sellers)
+        scores = batch_scorer.score(rfq, parsed_specs, batch)
+
+        for idx, sku in enumerate(skus):
+            match = service._build_match(rfq, batch, scores, idx, 1)
+            reference = calculate_match_score(rfq, sku, parsed_specs, sellers)
+            exact_score = Decimal(reference["match_score"])
+
+            assert abs(match["match_score"] - exact_score) <= self.SCORE_TOLERANCE
+            assert match["match_score"] == match["match_score"].quantize(Decimal("0.0001"))
+            assert match["recommended_price_usd"] == calculate_recommended_price(
+                sku, rfq, reference["match_score"]
+            )
+
+
+class TestTopKRanking:
+    """rank_top_k must return the head of the full ranking"""
+
+    @pytest.mark.parametrize("parsed_specs,target_price", RFQ_CASES)
+    @pytest.mark.parametrize("k", [1, 20, 150])
+    def test_top_k_matches_full_ranking(self, parsed_specs, target_price, k):
+        skus, sellers = build_catalog(n_skus=3000, n_sellers=200, seed=7)
+        rfq = SimpleNamespace(target_price_usd=target_price)
+        batch = CandidateBatch.from_skus(skus, sellers)
+
+        full = batch_scorer.rank(batch_scorer.score(rfq, parsed_specs, batch))
+        top, scores = batch_scorer.rank_top_k(rfq, parsed_specs, batch, k)
+
+        assert list(top) == list(full[:k])
+        assert scores["evaluated"][top].all()
+
+    def test_bounds_prune_candidates(self):
+        skus, sellers = build_catalog(n_skus=3000, n_sellers=200, seed=7)
+        parsed_specs, target_price = RFQ_CASES[0]
+        rfq = SimpleNamespace(target_price_usd=target_price)
+        batch = CandidateBatch.from_skus(skus, sellers)
+
+        _, scores = batch_scorer.rank_top_k(rfq, parsed_specs, batch, 20)
+
+        assert scores["evaluated"].sum() < len(batch)
+
+
+class TestMatchingExecutor:
+    """Sharded process-pool ranking must equal in-process ranking"""
+
+    @pytest.fixture
+    def pooled(self, monkeypatch):
+        from app.core.config import settings
+        from app.services.matching_executor import matching_executor
+
+        monkeypatch.setattr(settings, "MATCHING_WORKERS", 2)
+        monkeypatch.setattr(settings, "MATCHING_PARALLEL_MIN_CANDIDATES", 1)
+        yield matching_executor
+        matching_executor.shutdown()
+
+    def test_batch_pickles_without_orm_rows(self):
+        import pickle
+
+        skus, sellers = build_catalog(n_skus=50, n_sellers=5)
+        batch = pickle.loads(pickle.dumps(CandidateBatch.from_skus(skus, sellers)))
+
+        assert batch.skus is None
+        assert len(batch) == 50
+        assert len(batch.take([1, 2, 3])) == 3
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("k", [0, 20])
+    async def test_pooled_ranking_matches_in_process(self, pooled, k):
+        skus, sellers = build_catalog(n_skus=3000, n_sellers=200, seed=7)
+        parsed_specs, target_price = RFQ_CASES[0]
+        rfq = SimpleNamespace(target_price_usd=target_price)
+        batch = CandidateBatch.from_skus(skus, sellers)
+
+        if k:
+            expected, expected_scores = batch_scorer.rank_top_k(rfq, parsed_specs, batch, k)
+        else:
+            expected_scores = batch_scorer.score(rfq, parsed_specs, batch)
+            expected = batch_scorer.rank(expected_scores)
+
+        order, scores = await pooled.rank(rfq, parsed_specs, batch, k)
+
+        assert list(order) == list(expected)
+        assert list(scores["match_score"][order]) == list(expected_scores["match_score"][expected])
+
+    @pytest.mark.asyncio
+    async def test_daemon_process_scores_in_process(self, pooled, monkeypatch):
+        import multiprocessing
+
+        monkeypatch.setattr(multiprocessing.current_process(), "daemon", True, raising=False)
+        skus, sellers = build_catalog(n_skus=200, n_sellers=20)
+        parsed_specs, target_price = RFQ_CASES[0]
+        rfq = SimpleNamespace(target_price_usd=target_price)
+        batch = CandidateBatch.from_skus(skus, sellers)
+
+        order, _ = await pooled.rank(rfq, parsed_specs, batch)
+
+        assert pooled._pool is None
+        assert list(order) == list(batch_scorer.rank(batch_scorer.score(rfq, parsed_specs, batch)))
@@ -0,0 +1,273 @@
+"""
+Tests for spec constraints pushed into candidate retrieval
+"""
+import pytest
+from decimal import Decimal
+from types import SimpleNamespace
+from sqlalchemy.dialects import postgresql
+
+from app.core.config import Settings, settings
+from app.ml.batch_scorer import CandidateBatch, batch_scorer
+from app.services.candidate_filter import CandidateFilter
+from app.services.matching_service import MatchingService
+from tests.test_batch_scorer import RFQ_CASES, build_catalog
+from tests.test_matching_service import make_catalog, make_rfq
+
+
+def rfq_for(parsed_specs, quantity_kg=None):
+    return SimpleNamespace(parsed_specs=parsed_specs, quantity_required_kg=quantity_kg)
+
+
+@pytest.fixture
+def spec_prefilter(monkeypatch):
+    monkeypatch.setattr(settings, "MATCH_SPEC_PREFILTER", True)
+
+
+@pytest.mark.usefixtures("spec_prefilter")
+class TestCandidateFilter:
+    """Only candidates whose score bound is below MIN_MATCH_SCORE are dropped"""
+
+    # One spec check, so no assay credit costs the whole 0.4 spec weight
+    SPECS = {"ingredient": "Curcumin", "assay_min": 95.0, "certifications_required": ["GMP", "Halal"]}
+
+    def test_drops_only_below_bound(self):
+        candidate_filter = CandidateFilter.from_rfq(rfq_for(self.SPECS))
+        sku = SimpleNamespace(assay_min=Decimal("80"), certifications=["GMP", "Halal"], moq_kg=None)
+
+        # Bound exactly 0.6 with everything else perfect
+        assert candidate_filter.admits(sku, None)
+
+        sku.certifications = ["GMP"]
+        assert not candidate_filter.admits(sku, None)
+
+    def test_partial_assay_credit(self, monkeypatch):
+        sku = SimpleNamespace(assay_min=Decimal("90.25"), certifications=[], moq_kg=None)
+        assert CandidateFilter.from_rfq(rfq_for(self.SPECS)).admits(sku, None)
+
+        monkeypatch.setattr(settings, "MIN_MATCH_SCORE", 0.75)
+        candidate_filter = CandidateFilter.from_rfq(rfq_for(self.SPECS))
+        assert not candidate_filter.admits(sku, None)
+        sku.certifications = ["GMP"]
+        assert candidate_filter.admits(sku, None)
+
+    def test_seller_certifications_count(self):
+        candidate_filter = CandidateFilter.from_rfq(rfq_for(self.SPECS))
+        sku = SimpleNamespace(assay_min=None, certifications=["Organic"], moq_kg=None)
+
+        assert not candidate_filter.admits(sku, SimpleNamespace(certifications=["GMP"]))
+        assert candidate_filter.admits(sku, SimpleNamespace(certifications=["GMP", "Halal"]))
+
+    def test_moq_is_not_filtered(self):
+        # MOQ is not scored, so it cannot rule a candidate out
+        candidate_filter = CandidateFilter.from_rfq(rfq_for(self.SPECS, Decimal("500")))
+        sku = SimpleNamespace(assay_min=Decimal("96"), certifications=["GMP"], moq_kg=Decimal("1000"))
+
+        assert candidate_filter.admits(sku, None)
+        sql = str(candidate_filter.query().compile(dialect=postgresql.dialect()))
+        assert "moq_kg" not in sql.split("WHERE", 1)[1]
+
+    def test_no_bound_when_threshold_is_reachable(self):
+        # Three spec checks: no assay credit and no certifications still bound at 0.667
+        specs = {**self.SPECS, "grade": "USP", "form": "Powder"}
+        candidate_filter = CandidateFilter.from_rfq(rfq_for(specs))
+
+        assert candidate_filter.max_shortfall is None
+        assert candidate_filter.key == CandidateFilter.from_rfq(rfq_for({"ingredient": "Curcumin", "grade": "USP"})).key
+
+    def test_learned_ranker_is_not_bounded(self, monkeypatch):
+        from app.services import candidate_filter as candidate_filter_module
+
+        monkeypatch.setattr(candidate_filter_module, "get_ranker", lambda: SimpleNamespace(supports_bounds=False))
+        assert CandidateFilter.from_rfq(rfq_for(self.SPECS)).max_shortfall is None
+
+    def test_query_pushes_bound(self):
+        candidate_filter = CandidateFilter.from_rfq(rfq_for(self.SPECS, Decimal("1000")))
+        sql = str(candidate_filter.query().compile(dialect=postgresql.dialect()))
+
+        assert "skus.assay_min >=" in sql
+        assert "skus.certifications ?" in sql
+        assert "companies.certifications ?" in sql
+        assert "CASE WHEN" in sql
+
+    def test_prefilter_is_on_by_default(self):
+        assert Settings.model_fields["MATCH_SPEC_PREFILTER"].default is True
+
+    def test_prefilter_can_be_disabled(self, monkeypatch):
+        monkeypatch.setattr(settings, "MATCH_SPEC_PREFILTER", False)
+        candidate_filter = CandidateFilter.from_rfq(rfq_for(self.SPECS, Decimal("1000")))
+
+        assert candidate_filter.admits(SimpleNamespace(assay_min=None, certifications=[], moq_kg=None), None)
+        assert "CASE" not in str(candidate_filter.query().compile(dialect=postgresql.dialect()))
+
+    @pytest.mark.parametrize("min_score", [0.5, 0.6, 0.75, 0.9])
+    def test_rankings_match_without_prefilter(self, min_score, monkeypatch):
+        monkeypatch.setattr(settings, "MIN_MATCH_SCORE", min_score)
+        skus, sellers = build_catalog(n_skus=400, n_sellers=40)
+        dropped = 0
+
+        for parsed_specs, target_price in RFQ_CASES + [(self.SPECS, Decimal("45.00"))]:
+            rfq = SimpleNamespace(target_price_usd=target_price, parsed_specs=parsed_specs, quantity_required_kg=None)
+            candidate_filter = CandidateFilter.from_rfq(rfq)
+            admitted = [sku for sku in skus if candidate_filter.admits(sku, sellers[sku.company_id])]
+            dropped += len(skus) - len(admitted)
+
+            rankings = []
+            for candidates in (skus, admitted):
+                batch = CandidateBatch.from_skus(candidates, sellers)
+                scores = batch_scorer.score(rfq, parsed_specs, batch)
+                rankings.append([
+                    (batch.sku_ids[i], float(scores["match_score"][i])) for i in batch_scorer.rank(scores)
+                ])
+            assert rankings[1] == rankings[0]
+
+        assert dropped
+
+
+@pytest.mark.usefixtures("spec_prefilter")
+class TestIndexedPrefilter:
+    """Candidates served from the catalog index get the same prefilter"""
+
+    @pytest.mark.asyncio
+    async def test_index_matches_are_unchanged(self, recording_session, no_redis, monkeypatch):
+        from app.services import matching_service
+        from app.services.catalog_index import CatalogIndex
+
+        monkeypatch.setattr(settings, "MIN_MATCH_SCORE", 0.75)
+        rfq = make_rfq()
+        skus, sellers = make_catalog(30, 5)
+        sellers[0].certifications = []
+        for sku in skus[:10]:
+            sku.assay_min = Decimal("80.00")
+            sku.certifications = []
+
+        index = CatalogIndex()
+        await index.load(recording_session(skus=skus))
+        monkeypatch.setattr(matching_service, "catalog_index", index)
+
+        candidate_filter = CandidateFilter.from_rfq(rfq)
+        by_id = {seller.id: seller for seller in sellers}
+        dropped = {sku.id for sku in skus if not candidate_filter.admits(sku, by_id[sku.company_id])}
+        # Seller 0's SKUs among the first ten: no assay credit and no GMP
+        assert dropped == {sku.id for sku in skus[:10:5]}
+
+        runs = []
+        for enabled in (True, False):
+            monkeypatch.setattr(settings, "MATCH_SPEC_PREFILTER", enabled)
+            db = recording_session(rfqs=[rfq], companies=sellers)
+            runs.append(await MatchingService().find_and_rank_sellers(rfq.id, db))
+
+        assert runs[0] == runs[1]
+        assert not dropped & {m["sku_id"] for m in runs[1]}
+
+
+class TestOntologyRetrieval:
+    """Candidates are selected by ontology node, with optional substitutes"""
+
+    NODE = "ING-CURC-001"
+    SUBSTITUTE = "ING-TURM-002"
+
+    @pytest.fixture
+    def substitutes(self, monkeypatch):
+        from app.services.substitute_expander import substitute_expander
+
+        async def _substitutes(ingredient_name):
+            return [(self.SUBSTITUTE, 0.9)]
+        monkeypatch.setattr(substitute_expander, "substitutes", _substitutes)
+        monkeypatch.setattr(settings, "MATCH_SUBSTITUTES", True)
+
+    def ontology_catalog(self):
+        skus, sellers = make_catalog(12, 3)
+        for sku in skus[:8]:
+            sku.ontology_node_id = self.NODE
+        for sku in skus[4:8]:
+            sku.ingredient_name = "Turmeric Extract 95%"
+        for sku in skus[8:]:
+            sku.ingredient_name = "Turmeric Root Powder"
+            sku.ontology_node_id = self.SUBSTITUTE
+        return skus, sellers
+
+    def make_rfq(self):
+        rfq = make_rfq()
+        rfq.parsed_specs = {**rfq.parsed_specs, "ontology_node_id": self.NODE}
+        return rfq
+
+    @pytest.mark.asyncio
+    async def test_query_uses_node_equality(self):
+        candidate_filter = await CandidateFilter.resolve(self.make_rfq())
+        sql = str(candidate_filter.query().compile(dialect=postgresql.dialect()))
+
+        assert "skus.ontology_node_id IN" in sql
+        # Unmapped SKUs only are matched by name
+        assert "skus.ontology_node_id IS NULL AND skus.ingredient_name ILIKE" in sql
+
+    @pytest.mark.asyncio
+    async def test_unresolved_rfq_falls_back_to_substring(self):
+        candidate_filter = await CandidateFilter.resolve(make_rfq())
+        sql = str(candidate_filter.query().compile(dialect=postgresql.dialect()))
+
+        assert candidate_filter.ontology_factors == {}
+        assert "ILIKE" in sql.upper()
+
+    @pytest.mark.asyncio
+    async def test_synonym_skus_are_retrieved(self, recording_session, no_redis, monkeypatch):
+        from app.services import matching_service
+        from app.services.catalog_index import CatalogIndex
+
+        skus, sellers = self.ontology_catalog()
+        index = CatalogIndex()
+        await index.load(recording_session(skus=skus))
+        monkeypatch.setattr(matching_service, "catalog_index", index)
+
+        rfq = self.make_rfq()
+        db = recording_session(rfqs=[rfq], companies=sellers)
+        matches = await MatchingService().find_and_rank_sellers(rfq.id, db)
+
+        assert {m["sku_id"] for m in matches} == {sku.id for sku in skus[:8]}
+
+    @pytest.mark.asyncio
+    async def test_unmapped_skus_match_by_name(self, recording_session, no_redis, monkeypatch):
+        from app.services import matching_service
+        from app.services.catalog_index import CatalogIndex
+
+        skus, sellers = self.ontology_catalog()
+        for sku in skus[:2]:
+            sku.ontology_node_id = None
+        skus[8].ontology_node_id = None  # "Turmeric Root Powder", another name
+        index = CatalogIndex()
+        await index.load(recording_session(skus=skus))
+        monkeypatch.setattr(matching_service, "catalog_index", index)
+
+        rfq = self.make_rfq()
+        candidate_filter = await CandidateFilter.resolve(rfq)
+        expected = {sku.id for sku in skus[:8]}
+
+        assert {sku.id for sku in index.candidates(candidate_filter.parsed_specs)} == expected
+        assert {sku.id for sku in skus if candidate_filter.selects(sku)} == expected
+        db = recording_session(rfqs=[rfq], companies=sellers)
+        matches = await MatchingService().find_and_rank_sellers(rfq.id, db)
+        assert {m["sku_id"] for m in matches} == expected
+
+    @pytest.mark.asyncio
+    async def test_substitutes_are_discounted(self, recording_session, no_redis, monkeypatch, substitutes):
+        from app.services import matching_service
+        from app.services.catalog_index import CatalogIndex
+
+        skus, sellers = self.ontology_catalog()
+        index = CatalogIndex()
+        await index.load(recording_session(skus=skus))
+        monkeypatch.setattr(matching_service, "catalog_index", index)
+        monkeypatch.setattr(settings, "MIN_MATCH_SCORE", 0.0)
+
+        rfq = self.make_rfq()
+        db = recording_session(rfqs=[rfq], companies=sellers)
+        matches = await MatchingService().find_and_rank_sellers(rfq.id, db)
+        by_sku = {m["sku_id"]: m for m in matches}
+
+        assert set(by_sku) == {sku.id for sku in skus}
+        factor = 0.9 * settings.SUBSTITUTE_SCORE_FACTOR
+        # Same specs and price, so the substitute scores exactly factor x primary
+        primary, substitute = by_sku[skus[3].id], by_sku[skus[10].id]
+        assert skus[3].base_price_usd == skus[10].base_price_usd
+        assert float(substitute["match_score"]) == pytest.approx(float(primary["match_score"]) * factor, abs=1e-4)
+        assert substitute["explanation"]["substitute_factor"] == pytest.approx(factor)
+        assert "substitute_factor" not in primary["explanation"]
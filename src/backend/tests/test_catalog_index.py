@@ -0,0 +1,123 @@
+"""
+Tests for the in-process SKU catalog index
+"""
+import pytest
+from uuid import uuid4
+from decimal import Decimal
+from datetime import datetime
+
+from app.models.company import SKU
+from app.services.catalog_index import CatalogIndex
+
+
+def make_sku(ingredient: str, grade: str = "USP", updated_at: datetime = None, **kwargs) -> SKU:
+    return SKU(
+        id=uuid4(),
+        company_id=kwargs.pop("company_id", uuid4()),
+        sku_code=f"SKU-{uuid4().hex[:6]}",
+        ingredient_name=ingredient,
+        grade=grade,
+        form=kwargs.pop("form", "Powder"),
+        base_price_usd=kwargs.pop("base_price_usd", Decimal("40.00")),
+        certifications=kwargs.pop("certifications", ["GMP"]),
+        is_active=kwargs.pop("is_active", True),
+        updated_at=updated_at or datetime(2024, 1, 1),
+        **kwargs
+    )
+
+
+class TestCatalogIndex:
+
+    @pytest.mark.asyncio
+    async def test_candidates_follow_sql_semantics(self, recording_session):
+        skus = [
+            make_sku("Curcumin"),
+            make_sku("Curcumin Extract 95%", grade="Food Grade"),
+            make_sku("CURCUMIN C3 Complex"),
+            make_sku("Ashwagandha Root"),
+        ]
+        index = CatalogIndex()
+        await index.load(recording_session(skus=skus))
+
+        found = {sku.id for sku in index.candidates({"ingredient": "curcumin"})}
+        assert found == {skus[0].id, skus[1].id, skus[2].id}
+
+        found = {sku.id for sku in index.candidates({"ingredient": "Curcumin", "grade": "USP"})}
+        assert found == {skus[0].id, skus[2].id}
+
+        assert index.candidates({"ingredient": "Whey"}) == []
+
+    @pytest.mark.asyncio
+    async def test_refresh_applies_changes(self, recording_session):
+        price_change = make_sku("Curcumin")
+        deactivated = make_sku("Curcumin")
+        index = CatalogIndex()
+        await index.load(recording_session(skus=[price_change, deactivated]))
+
+        later = datetime(2024, 1, 2)
+        updated = make_sku("Curcumin", updated_at=later, base_price_usd=Decimal("35.00"))
+        updated.id = price_change.id
+        retired = make_sku("Curcumin", updated_at=later, is_active=False)
+        retired.id = deactivated.id
+        added = make_sku("Curcumin", grade="BP", updated_at=later)
+
+        changed = await index.refresh(recording_session(skus=[updated, retired, added]))
+
+        assert len(changed) == 3
+        candidates = {sku.id: sku for sku in index.candidates({"ingredient": "Curcumin"})}
+        assert set(candidates) == {price_change.id, added.id}
+        assert candidates[price_change.id].base_price_usd == Decimal("35.00")
+        assert index.metrics()["high_water_updated_at"] == later.isoformat()
+
+    @pytest.mark.asyncio
+    async def test_overlap_window_rows_are_reported_once(self, recording_session):
+        index = CatalogIndex()
+        await index.load(recording_session(skus=[make_sku("Curcumin")]))
+
+        later = datetime(2024, 1, 2)
+        added = make_sku("Curcumin", updated_at=later)
+        retired = make_sku("Ashwagandha", updated_at=later, is_active=False)
+        session = recording_session(skus=[added, retired])
+
+        assert {sku.id for sku in await index.refresh(session)} == {added.id, retired.id}
+        # Later polls re-read the same rows through the overlap window
+        assert await index.refresh(session) == []
+        assert await index.refresh(session) == []
+
+        renamed = make_sku("Curcumin C3", updated_at=datetime(2024, 1, 3))
+        renamed.id = added.id
+        changed = await index.refresh(recording_session(skus=[added, retired, renamed]))
+        assert [sku.id for sku in changed] == [added.id]
+        assert index.candidates({"ingredient": "c3"})[0].ingredient_name == "Curcumin C3"
+
+    @pytest.mark.asyncio
+    async def test_reload_reports_differences_from_snapshot(self, recording_session):
+        kept, repriced, dropped = make_sku("Curcumin"), make_sku("Curcumin"), make_sku("Curcumin")
+        index = CatalogIndex()
+        await index.load(recording_session(skus=[kept, repriced, dropped]))
+
+        updated = make_sku("Curcumin", updated_at=datetime(2024, 1, 2), base_price_usd=Decimal("35.00"))
+        updated.id = repriced.id
+        added = make_sku("Curcumin", grade="BP")
+
+        changed = await index.reload(recording_session(skus=[kept, updated, added]))
+
+        assert {sku.id: sku.is_active for sku in changed} == {
+            repriced.id: True, added.id: True, dropped.id: False,
+        }
+        assert len(index.candidates({"ingredient": "Curcumin"})) == 3
+        assert await index.reload(recording_session(skus=[kept, updated, added])) == []
+
+    @pytest.mark.asyncio
+    async def test_metrics(self, recording_session):
+        index = CatalogIndex()
+        assert index.metrics()["loaded"] is False
+
+        await index.load(recording_session(skus=[make_sku("Curcumin"), make_sku("Ashwagandha")]))
+        metrics = index.metrics()
+
+        assert metrics["loaded"] is True
+        assert metrics["sku_count"] == 2
+        assert metrics["ingredient_keys"] == 2
+        assert metrics["approx_memory_bytes"] > 0
+        assert metrics["seconds_since_refresh"] >= 0
@@ -0,0 +1,279 @@
+"""
+Tests for incremental re-matching of open RFQs
+"""
+import pytest
+from uuid import uuid4
+from decimal import Decimal
+from datetime import datetime
+
+from app.models.rfq import RFQMatch, RFQStatus
+from app.services import incremental_matcher as incremental_matcher_module
+from app.services.incremental_matcher import ChangeCursor, IncrementalMatcher
+from app.services.matching_service import MatchingService
+from tests.test_matching_service import make_catalog, make_rfq
+
+
+async def stored_matches(rfq, skus, sellers, recording_session):
+    """Full match of an RFQ, returned as persisted rows"""
+    db = recording_session(rfqs=[rfq], skus=skus, companies=sellers)
+    matches = await MatchingService().find_and_rank_sellers(rfq.id, db)
+    return [RFQMatch(rfq_id=rfq.id, **m) for m in matches]
+
+
+def ranking(matches):
+    return sorted((m["sku_id"], m["match_score"]) for m in matches)
+
+
+def order(matches, skip=None):
+    return [m["sku_id"] for m in matches if m["sku_id"] != skip]
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Redis keys used by re-match passes, in a dict"""
+    store = {}
+    redis_client = incremental_matcher_module.redis_client
+
+    async def _get(key):
+        return store.get(key)
+
+    async def _set(key, value, expire=None):
+        store[key] = value
+
+    async def _set_if_absent(key, value, expire=None):
+        if key in store:
+            return False
+        store[key] = value
+        return True
+
+    async def _delete(*keys):
+        for key in keys:
+            store.pop(key, None)
+
+    async def _delete_if_equal(key, value):
+        if store.get(key) != value:
+            return False
+        del store[key]
+        return True
+
+    monkeypatch.setattr(redis_client, "get", _get)
+    monkeypatch.setattr(redis_client, "set", _set)
+    monkeypatch.setattr(redis_client, "set_if_absent", _set_if_absent)
+    monkeypatch.setattr(redis_client, "delete", _delete)
+    monkeypatch.setattr(redis_client, "delete_if_equal", _delete_if_equal)
+    return store
+
+
+class TestReverseIndex:
+    """Only RFQs whose candidate set can contain a SKU are affected"""
+
+    def test_affected_rfqs(self):
+        skus, _ = make_catalog(1, 1)
+        curcumin, usp_only, other = make_rfq(), make_rfq(grade="BP"), make_rfq("Ashwagandha")
+        closed = make_rfq()
+        closed.status = RFQStatus.AWARDED
+
+        matcher = IncrementalMatcher()
+        for rfq in (curcumin, usp_only, other, closed):
+            matcher.track(rfq)
+
+        assert matcher.affected_rfqs(skus[0]) == {curcumin.id}
+
+        curcumin.status = RFQStatus.CANCELLED
+        matcher.track(curcumin)
+        assert matcher.affected_rfqs(skus[0]) == set()
+
+    def test_affected_by_ontology_node(self):
+        matcher = IncrementalMatcher()
+        rfq = make_rfq()
+        rfq.parsed_specs = {**rfq.parsed_specs, "ontology_node_id": "ING-CURC-001"}
+        matcher.track(rfq)
+
+        skus, _ = make_catalog(1, 1)
+        skus[0].ingredient_name = "Turmeric Extract 95%"
+        skus[0].ontology_node_id = "ING-CURC-001"
+        assert matcher.affected_rfqs(skus[0]) == {rfq.id}
+
+        matcher.untrack(rfq.id)
+        assert matcher.affected_rfqs(skus[0]) == set()
+
+    def test_affected_by_term_contained_in_name(self):
+        curcumin, any_grade, unnamed = make_rfq(), make_rfq("curcumin c3"), make_rfq("")
+        any_grade.parsed_specs["grade"] = None
+        unnamed.parsed_specs["ingredient"] = None
+
+        matcher = IncrementalMatcher()
+        for rfq in (curcumin, any_grade, unnamed):
+            matcher.track(rfq)
+
+        skus, _ = make_catalog(1, 1)
+        skus[0].ingredient_name = "Curcumin C3 Complex"
+        assert matcher.affected_rfqs(skus[0]) == {curcumin.id, any_grade.id, unnamed.id}
+
+        skus[0].grade = "BP"
+        assert matcher.affected_rfqs(skus[0]) == {any_grade.id}
+
+        matcher.untrack(any_grade.id)
+        matcher.untrack(unnamed.id)
+        assert matcher.affected_rfqs(skus[0]) == set()
+
+
+class TestChangeCursor:
+
+    def test_overlap_rows_are_reported_once(self):
+        first, second = uuid4(), uuid4()
+        t1, t2 = datetime(2024, 1, 1, 12, 0), datetime(2024, 1, 1, 12, 0, 30)
+        cursor = ChangeCursor()
+
+        assert cursor.advance([(first, t1)]) == {first}
+        assert cursor.advance([(first, t1), (second, t2)]) == {second}
+        assert cursor.advance([(first, t1), (second, t2)]) == set()
+        assert cursor.advance([(first, datetime(2024, 1, 1, 12, 1))]) == {first}
+
+    def test_round_trips_through_json(self):
+        row = uuid4()
+        cursor = ChangeCursor()
+        cursor.advance([(row, datetime(2024, 1, 1, 12, 0))])
+
+        restored = ChangeCursor.from_dict(cursor.to_dict())
+
+        assert restored.high_water == cursor.high_water
+        assert restored.advance([(row, datetime(2024, 1, 1, 12, 0))]) == set()
+
+
+class TestApplyChanges:
+    """Patched rankings must equal a full re-match"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("change", ["cheaper", "pricier", "deactivated", "new", "touched"])
+    async def test_patch_matches_full_rematch(self, recording_session, no_redis, change):
+        rfq = make_rfq()
+        skus, sellers = make_catalog(40, 8)
+        stored = await stored_matches(rfq, skus, sellers, recording_session)
+
+        if change == "new":
+            changed, _ = make_catalog(1, 1)
+            changed[0].company_id = sellers[0].id
+            skus = skus + changed
+        else:
+            changed = [skus[3]]
+        sku = changed[0]
+        if change == "cheaper":
+            sku.base_price_usd = Decimal("20.00")
+        elif change == "pricier":
+            sku.base_price_usd = Decimal("90.00")
+        elif change == "deactivated":
+            sku.is_active = False
+
+        matcher = IncrementalMatcher()
+        matcher.track(rfq)
+        db = recording_session(rfqs=[rfq], skus=skus, companies=sellers, matches=stored)
+        patched = await matcher.apply_changes(changed, db)
+
+        active = [s for s in skus if s.is_active]
+        expected = await MatchingService().find_and_rank_sellers(
+            rfq.id, recording_session(rfqs=[rfq], skus=active, companies=sellers)
+        )
+
+        assert ranking(patched[rfq.id]) == ranking(expected)
+        # Tied rows keep the full run's order
+        assert order(patched[rfq.id], sku.id) == order(expected, sku.id)
+        scores = [m["match_score"] for m in patched[rfq.id]]
+        assert scores == sorted(scores, reverse=True)
+        assert [m["rank"] for m in patched[rfq.id]] == list(range(1, len(scores) + 1))
+
+        # RFQ + stored matches + one bulk upsert; sellers come from the feature store.
+        # Auto-bidding adds the matched SKUs (no catalog index here) and one insert
+        assert len(db.statements) == 5
+
+    @pytest.mark.asyncio
+    async def test_ties_keep_stored_order(self, recording_session, no_redis):
+        # Prices repeat every 7 SKUs, so most scores are tied
+        rfq = make_rfq()
+        skus, sellers = make_catalog(40, 8)
+        stored = await stored_matches(rfq, skus, sellers, recording_session)
+
+        matcher = IncrementalMatcher()
+        matcher.track(rfq)
+        db = recording_session(rfqs=[rfq], skus=skus, companies=sellers, matches=stored)
+        patched = await matcher.apply_changes([skus[10]], db)
+
+        assert order(patched[rfq.id]) == [row.sku_id for row in stored]
+        sql = str(db.statements[1].compile())
+        assert "ORDER BY rfq_matches.rank, rfq_matches.sku_id" in sql
+
+    @pytest.mark.asyncio
+    async def test_unrelated_sku_issues_no_queries(self, recording_session, no_redis):
+        rfq = make_rfq("Ashwagandha")
+        skus, sellers = make_catalog(5, 2)
+
+        matcher = IncrementalMatcher()
+        matcher.track(rfq)
+        db = recording_session(rfqs=[rfq], companies=sellers)
+
+        assert await matcher.apply_changes(skus, db) == {}
+        assert db.statements == []
+
+
+class TestRun:
+    """Periodic re-match passes share their cursors through Redis"""
+
+    @pytest.mark.asyncio
+    async def test_unchanged_rows_are_not_rematched(self, recording_session, fake_redis, monkeypatch):
+        skus, sellers = make_catalog(2, 1)
+        for sku in skus:
+            sku.updated_at = datetime(2024, 1, 2)
+        company = (sellers[0].id, datetime(2024, 1, 2))
+        fake_redis[incremental_matcher_module.CURSOR_KEY] = {
+            "skus": ChangeCursor(high_water=datetime(2024, 1, 1)).to_dict(),
+            "companies": ChangeCursor(high_water=datetime(2024, 1, 1)).to_dict(),
+        }
+        applied = []
+
+        async def _apply(changed, db):
+            applied.append(sorted(sku.sku_code for sku in changed))
+            return {}
+
+        async def _refresh_companies(company_ids, db):
+            pass
+
+        monkeypatch.setattr(incremental_matcher_module.seller_feature_store, "refresh_companies", _refresh_companies)
+        matcher = IncrementalMatcher()
+        monkeypatch.setattr(matcher, "apply_changes", _apply)
+
+        # Another worker process picks up the next pass with its own matcher
+        other = IncrementalMatcher()
+        monkeypatch.setattr(other, "apply_changes", _apply)
+        for instance in (matcher, other, matcher):
+            db = recording_session(skus=skus, companies=[company])
+            await instance.run(db)
+            assert db.commits == 1
+
+        assert applied == [sorted(sku.sku_code for sku in skus)]
+        assert incremental_matcher_module.LOCK_KEY not in fake_redis
+
+    @pytest.mark.asyncio
+    async def test_pass_skipped_while_another_runs(self, recording_session, fake_redis):
+        fake_redis[incremental_matcher_module.LOCK_KEY] = "other"
+        db = recording_session()
+
+        assert await IncrementalMatcher().run(db) == {}
+        assert db.statements == []
+        assert fake_redis[incremental_matcher_module.LOCK_KEY] == "other"
+
+    @pytest.mark.asyncio
+    async def test_overrun_pass_keeps_next_holders_lock(self, recording_session, fake_redis, monkeypatch):
+        fake_redis[incremental_matcher_module.CURSOR_KEY] = {
+            "skus": ChangeCursor(high_water=datetime(2024, 1, 1)).to_dict(),
+            "companies": ChangeCursor(high_water=datetime(2024, 1, 1)).to_dict(),
+        }
+        matcher = IncrementalMatcher()
+
+        async def _load(db):
+            # The lock expired mid-pass and another worker took it
+            fake_redis[incremental_matcher_module.LOCK_KEY] = "next"
+
+        monkeypatch.setattr(matcher, "load", _load)
+        await matcher.run(recording_session())
+
+        assert fake_redis[incremental_matcher_module.LOCK_KEY] == "next"
@@ -0,0 +1,201 @@
+"""
+Tests for the spec-fingerprint match cache
+"""
+import pytest
+import pytest_asyncio
+from decimal import Decimal
+
+from app.core.config import settings
+from app.services.candidate_filter import CandidateFilter
+from app.services.catalog_index import CatalogIndex
+from app.services.match_cache import MatchCache
+from app.services.matching_service import MatchingService
+from tests.test_matching_service import make_catalog, make_rfq
+
+
+@pytest.fixture
+def fake_cache(no_redis, monkeypatch):
+    """Cache entries, version counters and sets held in a dict"""
+    store = {"entries": {}, "versions": {}, "sets": {}}
+
+    async def _get(fingerprint):
+        return store["entries"].get(fingerprint)
+
+    async def _set(fingerprint, entry, expire=None):
+        store["entries"][fingerprint] = entry
+
+    async def _versions(keys):
+        return {key: store["versions"].get(key, 0) for key in keys}
+
+    async def _bump(keys):
+        for key in keys:
+            store["versions"][key] = store["versions"].get(key, 0) + 1
+
+    async def _add(key, *values):
+        store["sets"].setdefault(key, set()).update(values)
+
+    async def _members(key):
+        return store["sets"].get(key, set())
+
+    monkeypatch.setattr(no_redis, "get_match_cache", _get)
+    monkeypatch.setattr(no_redis, "cache_match_result", _set)
+    monkeypatch.setattr(no_redis, "get_catalog_versions", _versions)
+    monkeypatch.setattr(no_redis, "bump_catalog_versions", _bump)
+    monkeypatch.setattr(no_redis, "add_to_set", _add)
+    monkeypatch.setattr(no_redis, "get_set_members", _members)
+    return store
+
+
+@pytest_asyncio.fixture
+async def indexed_catalog(recording_session, monkeypatch):
+    """A loaded catalog index, seen by both the matching service and the cache"""
+    from app.services import auto_bid_service, match_cache, matching_service
+
+    skus, sellers = make_catalog(30, 5)
+    index = CatalogIndex()
+    await index.load(recording_session(skus=skus))
+    monkeypatch.setattr(matching_service, "catalog_index", index)
+    monkeypatch.setattr(match_cache, "catalog_index", index)
+    monkeypatch.setattr(auto_bid_service, "catalog_index", index)
+    return index, skus, sellers
+
+
+class TestFingerprint:
+    """Reissued RFQs share a fingerprint; anything scored differs"""
+
+    def fingerprint(self, rfq):
+        return MatchCache().fingerprint(rfq, CandidateFilter.from_rfq(rfq))
+
+    def test_reissued_specs_match(self):
+        first, second = make_rfq(), make_rfq()
+        second.parsed_specs = dict(
+            second.parsed_specs,
+            ingredient="curcumin",
+            assay_min=95,
+            form="powder",
+            certifications_required=["GMP", "GMP"],
+        )
+        assert self.fingerprint(first) == self.fingerprint(second)
+
+    def test_scored_inputs_differ(self):
+        base = make_rfq()
+        other_grade = make_rfq(grade="BP")
+        other_price = make_rfq()
+        other_price.target_price_usd = Decimal("44.99")
+
+        fingerprints = {self.fingerprint(rfq) for rfq in (base, other_grade, other_price)}
+        assert len(fingerprints) == 3
+
+    def test_quantity_is_not_scored(self):
+        base, other_quantity = make_rfq(), make_rfq()
+        other_quantity.quantity_required_kg = Decimal("50")
+        assert self.fingerprint(base) == self.fingerprint(other_quantity)
+
+    def test_price_bucket(self, monkeypatch):
+        monkeypatch.setattr(settings, "MATCH_CACHE_PRICE_BUCKET_USD", 1.0)
+        low, high = make_rfq(), make_rfq()
+        low.target_price_usd, high.target_price_usd = Decimal("45.10"), Decimal("45.90")
+        assert self.fingerprint(low) == self.fingerprint(high)
+
+
+    def test_ontology_keys_cover_unmapped_skus(self):
+        candidate_filter = CandidateFilter(ingredient="Curcumin", ontology_factors={"ING-CURC-001": 1.0})
+        assert MatchCache().catalog_keys(candidate_filter) == ["node:ING-CURC-001", "term:curcumin"]
+
+
+class TestCachedMatching:
+    """Hits reuse the ranking; catalog changes invalidate it"""
+
+    @pytest.mark.asyncio
+    async def test_hit_skips_scoring_and_equals_fresh_run(
+        self, recording_session, fake_cache, indexed_catalog, monkeypatch
+    ):
+        _, _, sellers = indexed_catalog
+        service = MatchingService()
+        first, reissued = make_rfq(), make_rfq()
+
+        fresh = await service.find_and_rank_sellers(
+            first.id, recording_session(rfqs=[first], companies=sellers)
+        )
+
+        async def _no_scoring(*args, **kwargs):
+            raise AssertionError("cache hit should not rank")
+
+        monkeypatch.setattr(service, "_rank_matches", _no_scoring)
+        db = recording_session(rfqs=[reissued], companies=sellers)
+        cached = await service.find_and_rank_sellers(reissued.id, db)
+
+        assert cached == fresh
+        # RFQ + bulk upsert + auto-bid insert; no SKU or seller reads
+        assert len(db.statements) == 3
+
+    @pytest.mark.asyncio
+    async def test_catalog_change_invalidates(
+        self, recording_session, fake_cache, indexed_catalog
+    ):
+        _, skus, sellers = indexed_catalog
+        service = MatchingService()
+        rfq = make_rfq()
+        await service.find_and_rank_sellers(rfq.id, recording_session(rfqs=[rfq], companies=sellers))
+
+        cache = MatchCache()
+        assert (await cache.lookup(rfq, CandidateFilter.from_rfq(rfq)))[0] is not None
+
+        await cache.on_catalog_refresh([skus[0]], None)
+
+        assert fake_cache["versions"] == {"term:curcumin": 1}
+        assert (await cache.lookup(rfq, CandidateFilter.from_rfq(rfq)))[0] is None
+
+    @pytest.mark.asyncio
+    async def test_seller_change_bumps_their_ingredients(self, fake_cache, indexed_catalog):
+        _, _, sellers = indexed_catalog
+        fake_cache["sets"]["catalog:version:terms"] = {"curcumin", "ashwagandha"}
+
+        await MatchCache().on_sellers_changed({sellers[0].id}, None)
+
+        assert fake_cache["versions"] == {"term:curcumin": 1}
+
+    @pytest.mark.asyncio
+    async def test_redis_down_computes_fresh(
+        self, recording_session, no_redis, indexed_catalog, monkeypatch
+    ):
+        _, _, sellers = indexed_catalog
+
+        async def _down(*args, **kwargs):
+            raise ConnectionError("Connection refused")
+
+        monkeypatch.setattr(no_redis, "get_catalog_versions", _down)
+        rfq = make_rfq()
+
+        matches = await MatchingService().find_and_rank_sellers(
+            rfq.id, recording_session(rfqs=[rfq], companies=sellers)
+        )
+        assert len(matches) == 30
+
+    def test_worker_registers_invalidation(self, recording_session, monkeypatch):
+        from app.services import catalog_index as catalog_index_module
+        from app.services import seller_feature_store as seller_feature_store_module
+        from app.services.match_cache import match_cache
+        from app.services.seller_feature_store import SellerFeatureStore
+        from app.workers.celery_app import init_worker
+
+        skus, _ = make_catalog(5, 1)
+        index, store = CatalogIndex(), SellerFeatureStore()
+
+        async def _start_index(session_factory):
+            await index.load(recording_session(skus=skus))
+
+        async def _start_store(session_factory):
+            return None
+
+        monkeypatch.setattr(index, "start", _start_index)
+        monkeypatch.setattr(store, "start", _start_store)
+        monkeypatch.setattr(catalog_index_module, "catalog_index", index)
+        monkeypatch.setattr(seller_feature_store_module, "seller_feature_store", store)
+        monkeypatch.setattr(settings, "ENABLE_CATALOG_INDEX", True)
+        monkeypatch.setattr(settings, "MATCH_CACHE_ENABLED", True)
+
+        init_worker()
+
+        assert index._listeners == [match_cache.on_catalog_refresh]
+        assert store._listeners == [match_cache.on_sellers_changed]
@@ -0,0 +1,183 @@
+"""
+Tests for streaming match results over Server-Sent Events
+"""
+import pytest
+import json
+from contextlib import asynccontextmanager
+
+from app.core.config import settings
+from app.services.match_stream import match_events
+from app.services.matching_service import MatchingService
+from tests.test_matching_service import make_catalog, make_rfq
+
+
+class FakePubSub:
+    """Delivers queued messages, then reports an idle channel"""
+
+    def __init__(self, events):
+        self.messages = [{"type": "message", "data": json.dumps(event)} for event in events]
+
+    async def get_message(self, ignore_subscribe_messages=False, timeout=None):
+        return self.messages.pop(0) if self.messages else None
+
+
+@pytest.fixture
+def fake_channel(monkeypatch):
+    """Replace the RFQ channel and match cache with in-memory stand-ins"""
+    from app.core.redis_client import redis_client
+
+    channel = {"events": [], "cached": None, "subscribed": []}
+
+    @asynccontextmanager
+    async def _subscribe(rfq_id):
+        channel["subscribed"].append(rfq_id)
+        yield FakePubSub(channel["events"])
+
+    async def _get_rfq_matches(rfq_id):
+        return channel["cached"]
+
+    monkeypatch.setattr(redis_client, "subscribe_match_events", _subscribe)
+    monkeypatch.setattr(redis_client, "get_rfq_matches", _get_rfq_matches)
+    return channel
+
+
+def parse(frames):
+    events = []
+    for frame in frames:
+        if frame.startswith(":"):
+            events.append(("keep-alive", None))
+            continue
+        event_line, data_line = frame.strip().split("\n")
+        events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+    return events
+
+
+class TestMatchEventStream:
+    """The SSE stream relays channel events until matching completes"""
+
+    @pytest.mark.asyncio
+    async def test_relays_until_complete(self, fake_channel):
+        rfq = make_rfq()
+        fake_channel["events"] = [
+            {"event": "partial", "matches": [{"rank": 1}], "shards_done": 1, "shards_total": 2},
+            {"event": "complete", "matches": [{"rank": 1}, {"rank": 2}]},
+            {"event": "partial", "matches": []},
+        ]
+
+        events = parse([frame async for frame in match_events(rfq.id)])
+
+        assert [name for name, _ in events] == ["partial", "complete"]
+        assert len(events[1][1]["matches"]) == 2
+
+    @pytest.mark.asyncio
+    async def test_finished_matching_is_replayed(self, fake_channel):
+        rfq = make_rfq()
+        fake_channel["cached"] = [{"seller_id": "s", "match_score": 0.9, "rank": 1}]
+
+        events = parse([frame async for frame in match_events(rfq.id)])
+
+        assert events == [("complete", {
+            "event": "complete",
+            "rfq_id": str(rfq.id),
+            "total_matches": 1,
+            "matches": fake_channel["cached"],
+        })]
+        assert fake_channel["subscribed"] == [str(rfq.id)]
+
+    @pytest.mark.asyncio
+    async def test_keep_alive_and_timeout(self, fake_channel, monkeypatch):
+        monkeypatch.setattr(settings, "MATCH_STREAM_HEARTBEAT_SECONDS", 0)
+        monkeypatch.setattr(settings, "MATCH_STREAM_TIMEOUT_SECONDS", 0.01)
+
+        events = parse([frame async for frame in match_events(make_rfq().id)])
+
+        assert events[0][0] == "keep-alive"
+        assert events[-1][0] == "timeout"
+
+    @pytest.mark.asyncio
+    async def test_stops_when_client_disconnects(self, fake_channel):
+        async def _disconnected():
+            return True
+
+        assert [frame async for frame in match_events(make_rfq().id, _disconnected)] == []
+
+
+class TestMatchEventPublishing:
+    """Matching publishes partial rankings per shard and the final ranks"""
+
+    @pytest.fixture
+    def published(self, no_redis, monkeypatch):
+        events = []
+
+        async def _publish(rfq_id, event):
+            events.append(event)
+
+        monkeypatch.setattr(no_redis, "publish_match_event", _publish)
+        return events
+
+    @pytest.fixture
+    def pooled(self, monkeypatch):
+        from app.services.matching_executor import matching_executor
+
+        monkeypatch.setattr(settings, "MATCHING_WORKERS", 2)
+        monkeypatch.setattr(settings, "MATCHING_PARALLEL_MIN_CANDIDATES", 1)
+        monkeypatch.setattr(settings, "MATCH_STREAM_PARTIAL_LIMIT", 5)
+        yield matching_executor
+        matching_executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_partial_then_complete(self, recording_session, published, pooled):
+        rfq = make_rfq()
+        skus, sellers = make_catalog(40, 8)
+        db = recording_session(rfqs=[rfq], skus=skus, companies=sellers)
+
+        service = MatchingService()
+        matches = await service.find_and_rank_sellers(rfq.id, db)
+        assert [event["event"] for event in published] == ["partial"]
+        await service.publish_matches({rfq.id: matches})
+
+        assert [event["event"] for event in published] == ["partial", "complete"]
+        partial, complete = published
+        assert (partial["shards_done"], partial["shards_total"]) == (1, 2)
+        assert len(partial["matches"]) == 5
+        assert [m["rank"] for m in partial["matches"]] == [1, 2, 3, 4, 5]
+
+        assert complete["total_matches"] == len(matches)
+        assert [(m["seller_id"], m["rank"]) for m in complete["matches"]] == \
+            [(str(m["seller_company_id"]), m["rank"]) for m in matches]
+
+    def test_worker_job_publishes_partial(self, recording_session, no_redis, published, monkeypatch):
+        from app.services.matching_executor import matching_executor
+        from app.workers import matching_tasks
+        from tests.test_matching_queue import SessionFactory, run_on_worker_pool
+
+        async def _delete(*keys):
+            return None
+
+        monkeypatch.setattr(no_redis, "delete", _delete)
+        rfq = make_rfq()
+        skus, sellers = make_catalog(40, 8)
+        monkeypatch.setattr(settings, "MATCHING_PARALLEL_MIN_CANDIDATES", len(skus))
+        factory = SessionFactory(recording_session(rfqs=[rfq], skus=skus, companies=sellers))
+        monkeypatch.setattr(matching_tasks, "AsyncSessionLocal", factory)
+
+        try:
+            run_on_worker_pool(matching_tasks.match_rfq, str(rfq.id))
+        finally:
+            matching_executor.shutdown()
+
+        events = [event["event"] for event in published]
+        assert events == ["partial"] * (settings.MATCHING_WORKERS - 1) + ["complete"]
+        assert published[0]["shards_total"] == settings.MATCHING_WORKERS
+
+    @pytest.mark.asyncio
+    async def test_in_process_publishes_complete_only(self, recording_session, published):
+        rfq = make_rfq()
+        skus, sellers = make_catalog(10, 2)
+        db = recording_session(rfqs=[rfq], skus=skus, companies=sellers)
+
+        service = MatchingService()
+        matches = await service.find_and_rank_sellers(rfq.id, db)
+        await service.publish_matches({rfq.id: matches})
+
+        assert [event["event"] for event in published] == ["complete"]
@@ -0,0 +1,217 @@
+"""
+Tests for the matching job queue
+"""
+import asyncio
+import pytest
+from types import SimpleNamespace
+
+from app.core.config import settings
+from app.services.matching_queue import MatchingQueue
+from app.workers import matching_tasks
+from app.workers.celery_app import celery_app, worker_loop
+from app.workers.matching_tasks import match_rfq, match_rfq_batch
+from tests.test_matching_service import make_catalog, make_rfq
+
+
+@pytest.fixture
+def fake_broker(no_redis, monkeypatch):
+    """Dedup keys in a dict; sent jobs recorded instead of published"""
+    broker = {"keys": {}, "sent": [], "cleared": []}
+
+    async def _set_if_absent(key, value, expire=None):
+        if key in broker["keys"]:
+            return False
+        broker["keys"][key] = value
+        return True
+
+    async def _delete(*keys):
+        for key in keys:
+            broker["keys"].pop(key, None)
+
+    async def _clear(*rfq_ids):
+        broker["cleared"].extend(rfq_ids)
+
+    def _apply_async(args):
+        broker["sent"].append(args[0])
+        return SimpleNamespace(id=f"task-{len(broker['sent'])}")
+
+    monkeypatch.setattr(no_redis, "set_if_absent", _set_if_absent)
+    monkeypatch.setattr(no_redis, "delete", _delete)
+    monkeypatch.setattr(no_redis, "clear_rfq_matches", _clear)
+    monkeypatch.setattr(match_rfq, "apply_async", _apply_async)
+    monkeypatch.setattr(match_rfq_batch, "apply_async", _apply_async)
+    return broker
+
+
+class SessionFactory:
+    """AsyncSessionLocal stand-in handing out RecordingSessions"""
+
+    def __init__(self, session):
+        self.session = session
+        self.commits = 0
+
+    def __call__(self):
+        return self
+
+    async def __aenter__(self):
+        return self.session
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def commit(self):
+        self.commits += 1
+
+
+def run_on_worker_pool(task, *args):
+    """Run a task body on the configured Celery worker pool, as the worker does"""
+    from celery.concurrency import get_implementation
+
+    pool = get_implementation(celery_app.conf.worker_pool)(limit=settings.MATCHING_QUEUE_CONCURRENCY)
+    pool.start()
+    results = []
+    try:
+        pool.apply_async(task.run, args=args, callback=results.append).wait()
+    finally:
+        pool.stop()
+    return results[0]
+
+
+class TestEnqueue:
+    """One pending job per RFQ"""
+
+    @pytest.mark.asyncio
+    async def test_duplicate_enqueue_is_skipped(self, fake_broker):
+        rfq = make_rfq()
+        queue = MatchingQueue()
+
+        assert await queue.enqueue(rfq.id) is True
+        assert await queue.enqueue(rfq.id) is False
+        assert fake_broker["sent"] == [str(rfq.id)]
+
+    @pytest.mark.asyncio
+    async def test_enqueue_drops_previous_ranks(self, fake_broker):
+        first, second = make_rfq(), make_rfq()
+        queue = MatchingQueue()
+
+        await queue.enqueue(first.id)
+        await queue.enqueue(first.id)
+        await queue.enqueue_batch([first.id, second.id])
+
+        # Only when a new run is queued, so streams wait for its "complete"
+        assert fake_broker["cleared"] == [str(first.id), str(second.id)]
+
+    @pytest.mark.asyncio
+    async def test_failed_send_releases_dedup_key(self, fake_broker, monkeypatch):
+        def _down(args):
+            raise ConnectionError("Connection refused")
+
+        monkeypatch.setattr(match_rfq, "apply_async", _down)
+        rfq = make_rfq()
+
+        with pytest.raises(ConnectionError):
+            await MatchingQueue().enqueue(rfq.id)
+        assert fake_broker["keys"] == {}
+
+    @pytest.mark.asyncio
+    async def test_batch_is_one_job_for_rfqs_not_pending(self, fake_broker):
+        pending, first, second = make_rfq(), make_rfq(), make_rfq()
+        queue = MatchingQueue()
+        await queue.enqueue(pending.id)
+
+        task_id, queued = await queue.enqueue_batch([pending.id, first.id, second.id, first.id])
+
+        assert task_id == "task-2"
+        assert queued == [first.id, second.id]
+        assert fake_broker["sent"] == [str(pending.id), [str(first.id), str(second.id)]]
+        assert await queue.enqueue_batch([first.id]) == (None, [])
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_send_releases_dedup_keys(self, fake_broker, monkeypatch):
+        def _down(args):
+            raise ConnectionError("Connection refused")
+
+        monkeypatch.setattr(match_rfq_batch, "apply_async", _down)
+
+        with pytest.raises(ConnectionError):
+            await MatchingQueue().enqueue_batch([make_rfq().id, make_rfq().id])
+        assert fake_broker["keys"] == {}
+
+    @pytest.mark.asyncio
+    async def test_metrics_report_queue_depth(self, no_redis, monkeypatch):
+        async def _length(key):
+            return 7 if key == settings.MATCHING_QUEUE else 0
+
+        monkeypatch.setattr(no_redis, "list_length", _length)
+        assert await MatchingQueue().metrics() == {"queue": settings.MATCHING_QUEUE, "queued_jobs": 7}
+
+
+class TestMatchingJob:
+    """Jobs match in their own session on the worker loop"""
+
+    def test_retry_policy(self):
+        assert match_rfq.max_retries == settings.MATCHING_JOB_MAX_RETRIES
+        assert match_rfq.autoretry_for == (Exception,)
+        assert match_rfq.retry_backoff is True
+
+    def test_job_uses_its_own_session(self, recording_session, no_redis, fake_broker, monkeypatch):
+        rfq = make_rfq()
+        skus, sellers = make_catalog(10, 2)
+        factory = SessionFactory(recording_session(rfqs=[rfq], skus=skus, companies=sellers))
+        monkeypatch.setattr(matching_tasks, "AsyncSessionLocal", factory)
+        fake_broker["keys"][matching_tasks.dedup_key(str(rfq.id))] = 1
+
+        order = []
+
+        async def _commit():
+            order.append("commit")
+
+        async def _announce(rfq_id, matches, expire=3600):
+            order.append("cache")
+
+        factory.session.commit = _commit
+        monkeypatch.setattr(no_redis, "cache_rfq_matches", _announce)
+
+        # Runs the task body in this thread; the coroutine runs on the worker loop
+        assert match_rfq.run(str(rfq.id)) == 10
+
+        # Matches are cached and announced only once committed
+        assert order == ["commit", "cache"]
+        assert fake_broker["keys"] == {}
+
+    def test_batch_job_matches_in_one_session(self, recording_session, fake_broker, monkeypatch):
+        rfqs = [make_rfq(), make_rfq()]
+        skus, sellers = make_catalog(10, 2)
+        factory = SessionFactory(recording_session(rfqs=rfqs, skus=skus, companies=sellers))
+        factory.session.commit = factory.commit
+        monkeypatch.setattr(matching_tasks, "AsyncSessionLocal", factory)
+        for rfq in rfqs:
+            fake_broker["keys"][matching_tasks.dedup_key(str(rfq.id))] = 1
+
+        assert match_rfq_batch.run([str(rfq.id) for rfq in rfqs]) == 20
+
+        assert factory.commits == 1
+        assert fake_broker["keys"] == {}
+
+    def test_worker_pool_job_shards_in_spawned_processes(self, recording_session, fake_broker, monkeypatch):
+        from app.services.matching_executor import matching_executor
+
+        monkeypatch.setattr(settings, "MATCHING_WORKERS", 2)
+        monkeypatch.setattr(settings, "MATCHING_PARALLEL_MIN_CANDIDATES", 1)
+        rfq = make_rfq()
+        skus, sellers = make_catalog(10, 2)
+        factory = SessionFactory(recording_session(rfqs=[rfq], skus=skus, companies=sellers))
+        monkeypatch.setattr(matching_tasks, "AsyncSessionLocal", factory)
+
+        try:
+            assert run_on_worker_pool(match_rfq, str(rfq.id)) == 10
+            process_pool = matching_executor._pool
+        finally:
+            matching_executor.shutdown()
+
+        assert process_pool is not None
+        assert process_pool._mp_context.get_start_method() == "spawn"
+
+    def test_overrunning_job_is_cancelled(self):
+        with pytest.raises(asyncio.TimeoutError):
+            worker_loop.run(asyncio.sleep(5), timeout=0.01)
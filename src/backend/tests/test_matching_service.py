@@ -0,0 +1,242 @@
+"""
+Tests for MatchingService database access patterns
+"""
+import pytest
+from uuid import uuid4
+from decimal import Decimal
+from datetime import datetime, timedelta
+
+from app.models.company import Company, SKU
+from app.models.rfq import RFQ, RFQMatch, RFQStatus
+from app.ml.ranker import FEATURE_WEIGHTS
+from app.services.matching_service import MatchingService, match_reasons
+from tests.reference_scorer import generate_explanation
+
+
+def make_rfq(ingredient: str = "Curcumin", grade: str = "USP") -> RFQ:
+    return RFQ(
+        id=uuid4(),
+        rfq_number=f"RFQ-TEST-{uuid4().hex[:8].upper()}",
+        buyer_company_id=uuid4(),
+        created_by_user_id=uuid4(),
+        ingredient_name=ingredient,
+        raw_specification=f"Need {ingredient} 95% {grade} powder, GMP certified",
+        parsed_specs={
+            "ingredient": ingredient,
+            "assay_min": 95.0,
+            "grade": grade,
+            "form": "Powder",
+            "certifications_required": ["GMP"]
+        },
+        quantity_required_kg=Decimal("1000"),
+        target_price_usd=Decimal("45.00"),
+        quotation_deadline=datetime.utcnow() + timedelta(days=14),
+        status=RFQStatus.PUBLISHED
+    )
+
+
+def make_catalog(n_skus: int, n_sellers: int):
+    sellers = [
+        Company(
+            id=uuid4(),
+            name=f"Supplier {i}",
+            company_type="supplier",
+            country="IN",
+            certifications=["GMP"],
+            rating=Decimal("4.6"),
+            on_time_delivery_rate=Decimal("96.0")
+        )
+        for i in range(n_sellers)
+    ]
+    skus = [
+        SKU(
+            id=uuid4(),
+            company_id=sellers[i % n_sellers].id,
+            sku_code=f"CUR-{i:05d}",
+            ingredient_name="Curcumin",
+            grade="USP",
+            assay_min=Decimal("95.00"),
+            form="Powder",
+            base_price_usd=Decimal("40.00") + Decimal(i % 7),
+            lead_time_days=14,
+            certifications=["GMP"],
+            is_active=True
+        )
+        for i in range(n_skus)
+    ]
+    return skus, sellers
+
+
+def last_upsert(db):
+    """The last match upsert statement and its parameters"""
+    for statement, params in zip(reversed(db.statements), reversed(db.parameters)):
+        if "INSERT INTO rfq_matches" in getattr(statement, "text", ""):
+            return statement, params
+    raise AssertionError("no match upsert executed")
+
+
+class TestMatchingQueries:
+    """Matching must not issue per-SKU queries"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("n_skus,n_sellers", [(1, 1), (10, 5), (500, 120)])
+    async def test_query_count_is_constant(self, recording_session, no_redis, n_skus, n_sellers):
+        rfq = make_rfq()
+        skus, sellers = make_catalog(n_skus, n_sellers)
+        db = recording_session(rfqs=[rfq], skus=skus, companies=sellers)
+
+        matches = await MatchingService().find_and_rank_sellers(rfq.id, db)
+
+        # RFQ + candidate SKUs + one bulk seller load + one bulk upsert,
+        # plus one auto-bid insert when any match is eligible
+        assert len(db.statements) == 4 + any(m["auto_bid_eligible"] for m in matches)
+        assert len(matches) == n_skus
+        assert [m["rank"] for m in matches] == list(range(1, n_skus + 1))
+
+    @pytest.mark.asyncio
+    async def test_candidates_served_from_catalog_index(
+        self, recording_session, no_redis, monkeypatch
+    ):
+        from app.services import matching_service
+        from app.services.catalog_index import CatalogIndex
+
+        rfq = make_rfq()
+        skus, sellers = make_catalog(50, 10)
+        index = CatalogIndex()
+        await index.load(recording_session(skus=skus))
+        monkeypatch.setattr(matching_service, "catalog_index", index)
+
+        db = recording_session(rfqs=[rfq], companies=sellers)
+        matches = await MatchingService().find_and_rank_sellers(rfq.id, db)
+
+        # RFQ + one bulk seller load + one bulk upsert + one auto-bid insert; no SKU query
+        assert len(db.statements) == 4
+        assert len(matches) == 50
+
+
+class TestMatchPersistence:
+    """Matches are written with one idempotent bulk statement"""
+
+    @pytest.mark.asyncio
+    async def test_single_upsert_statement(self, recording_session, no_redis):
+        rfq = make_rfq()
+        skus, sellers = make_catalog(5000, 300)
+        db = recording_session(rfqs=[rfq], skus=skus, companies=sellers)
+
+        matches = await MatchingService().find_and_rank_sellers(rfq.id, db)
+
+        upsert, params = last_upsert(db)
+        assert "ON CONFLICT (rfq_id, sku_id)" in upsert.text
+        assert db.added == []
+        assert params["matched_rfq_ids"] == [rfq.id]
+        assert len(params["sku_ids"]) == len(matches) == 5000
+        assert params["ranks"] == list(range(1, 5001))
+
+    @pytest.mark.asyncio
+    async def test_rematch_replaces_rows(self, recording_session, no_redis):
+        rfq = make_rfq()
+        skus, sellers = make_catalog(10, 5)
+        db = recording_session(rfqs=[rfq], skus=skus, companies=sellers)
+        service = MatchingService()
+
+        await service.find_and_rank_sellers(rfq.id, db)
+        db.rows[type(skus[0])] = skus[:4]
+        await service.find_and_rank_sellers(rfq.id, db)
+
+        # Second run carries only the remaining SKUs; the statement deletes the rest
+        upsert, params = last_upsert(db)
+        assert set(params["sku_ids"]) == {sku.id for sku in skus[:4]}
+        assert "DELETE FROM rfq_matches" in upsert.text
+
+
+class TestBatchMatching:
+    """Many RFQs share candidate loads, seller loads and one write"""
+
+    @pytest.mark.asyncio
+    async def test_groups_by_candidate_set(self, recording_session, no_redis):
+        rfqs = [make_rfq("Curcumin") for _ in range(8)] + [make_rfq("Ashwagandha") for _ in range(4)]
+        skus, sellers = make_catalog(200, 40)
+        db = recording_session(rfqs=rfqs, skus=skus, companies=sellers)
+
+        results = await MatchingService().find_and_rank_sellers_batch(
+            [rfq.id for rfq in rfqs] + [uuid4()], db
+        )
+
+        # RFQs + one SKU load per ingredient group + one seller load + one upsert
+        # + one auto-bid insert
+        assert len(db.statements) == 6
+        assert set(results) == {rfq.id for rfq in rfqs}
+        assert all(len(matches) == 200 for matches in results.values())
+
+        _, params = last_upsert(db)
+        assert set(params["matched_rfq_ids"]) == {rfq.id for rfq in rfqs}
+        assert len(params["sku_ids"]) == 12 * 200
+
+    @pytest.mark.asyncio
+    async def test_batch_matches_single_rfq_results(self, recording_session, no_redis):
+        rfq = make_rfq()
+        skus, sellers = make_catalog(60, 12)
+        service = MatchingService()
+
+        single = await service.find_and_rank_sellers(
+            rfq.id, recording_session(rfqs=[rfq], skus=skus, companies=sellers)
+        )
+        batch = await service.find_and_rank_sellers_batch(
+            [rfq.id], recording_session(rfqs=[rfq], skus=skus, companies=sellers)
+        )
+
+        assert batch[rfq.id] == single
+
+
+class TestLazyExplanations:
+    """Only feature scores are stored; reasons are built when served"""
+
+    @pytest.mark.asyncio
+    async def test_persists_feature_scores_only(self, recording_session, no_redis):
+        rfq = make_rfq()
+        skus, sellers = make_catalog(20, 4)
+        db = recording_session(rfqs=[rfq], skus=skus, companies=sellers)
+
+        matches = await MatchingService().find_and_rank_sellers(rfq.id, db)
+
+        assert all(
+            set(m["explanation"]) == set(FEATURE_WEIGHTS)
+            for m in matches
+        )
+
+    @pytest.mark.asyncio
+    async def test_served_reasons_match_eager_explanation(self, recording_session, no_redis):
+        rfq = make_rfq()
+        skus, sellers = make_catalog(20, 4)
+        service = MatchingService()
+        matches = await service.find_and_rank_sellers(
+            rfq.id, recording_session(rfqs=[rfq], skus=skus, companies=sellers)
+        )
+
+        sku_by_id = {sku.id: sku for sku in skus}
+        seller_by_id = {seller.id: seller for seller in sellers}
+        rows = [
+            (
+                RFQMatch(rfq_id=rfq.id, **m),
+                rfq.target_price_usd,
+                sku_by_id[m["sku_id"]],
+                seller_by_id[m["seller_company_id"]],
+            )
+            for m in matches
+        ]
+        # The page query selects (RFQMatch, target price, SKU, Company) rows
+        db = recording_session(matches=rows)
+
+        match_reasons.cache_clear()
+        served = await service.get_ranked_matches(rfq.id, 0.6, 20, db)
+
+        assert len(db.statements) == 1
+        for page_row, (row, _, sku, seller) in zip(served, rows):
+            eager = generate_explanation(
+                *(row.explanation[name] for name in FEATURE_WEIGHTS),
+                rfq, sku, seller
+            )
+            assert page_row["explanation"] == eager
+
+        # Catalog rows repeat prices and ratings, so reasons are mostly cache hits
+        assert match_reasons.cache_info().hits > 0
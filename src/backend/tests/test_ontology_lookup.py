@@ -0,0 +1,175 @@
+"""
+Tests for non-blocking ontology lookups in SpecParser
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.core.neo4j_client import neo4j_driver
+from app.ml import spec_parser
+from app.ml.ontology_lookup import OntologyLookup
+from app.ml.spec_parser import SpecParser
+
+
+CURCUMIN = {"id": "ING-CURC-001", "name": "Curcumin", "botanical_name": "Curcuma longa", "cas_number": "458-37-7"}
+
+
+@pytest.fixture
+def lookup(monkeypatch):
+    """Fresh lookup pool for the parser, shut down after the test"""
+    instance = OntologyLookup()
+    monkeypatch.setattr(spec_parser, "ontology_lookup", instance)
+    yield instance
+    instance.shutdown()
+
+
+def slow_neo4j(monkeypatch, seconds: float):
+    """Blocking Neo4j lookup taking ``seconds``; resolves 'curcumin'"""
+    def _normalize(text):
+        time.sleep(seconds)
+        return {"ingredient": CURCUMIN, "confidence": 1.0} if text == "curcumin" else None
+
+    monkeypatch.setattr(neo4j_driver, "normalize_ingredient_name", _normalize)
+
+
+async def max_tick_gap(coro, interval: float = 0.01) -> float:
+    """Run ``coro`` while a ticker measures the longest event loop stall"""
+    gaps = []
+    done = asyncio.Event()
+
+    async def _ticker():
+        last = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(interval)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    ticker = asyncio.create_task(_ticker())
+    try:
+        await coro
+    finally:
+        done.set()
+        await ticker
+    return max(gaps)
+
+
+class TestNonBlocking:
+
+    @pytest.mark.asyncio
+    async def test_event_loop_stays_responsive_under_concurrent_parses(self, lookup, monkeypatch):
+        slow_neo4j(monkeypatch, 0.2)
+        parser = SpecParser()
+        texts = [f"Curcumin 95% USP, lot {i}" for i in range(8)]
+
+        started = time.perf_counter()
+        results = []
+
+        async def _parse_all():
+            results.extend(await asyncio.gather(*(parser.parse(text) for text in texts)))
+
+        gap = await max_tick_gap(_parse_all())
+        elapsed = time.perf_counter() - started
+
+        assert all(r["ontology_node_id"] == "ING-CURC-001" for r in results)
+        # Blocking calls on the loop would stall it 0.2s per parse (1.6s in all)
+        assert gap < 0.1
+        assert elapsed < 0.2 * len(texts) / 2
+
+    @pytest.mark.asyncio
+    async def test_lookups_run_off_the_loop_thread(self, lookup, monkeypatch):
+        threads = []
+
+        def _normalize(text):
+            threads.append(threading.current_thread().name)
+            return None
+
+        monkeypatch.setattr(neo4j_driver, "normalize_ingredient_name", _normalize)
+        await SpecParser().parse("Curcumin 95% USP")
+
+        assert threads and all(name.startswith("ontology-lookup") for name in threads)
+
+    @pytest.mark.asyncio
+    async def test_pool_is_bounded(self, lookup, monkeypatch):
+        monkeypatch.setattr(settings, "ONTOLOGY_LOOKUP_WORKERS", 2)
+        active, peak = [0], [0]
+        guard = threading.Lock()
+
+        def _normalize(text):
+            with guard:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with guard:
+                active[0] -= 1
+            return None
+
+        monkeypatch.setattr(neo4j_driver, "normalize_ingredient_name", _normalize)
+        parser = SpecParser()
+        await asyncio.gather(*(parser.parse(f"Curcumin lot {i}") for i in range(6)))
+
+        assert peak[0] == 2
+
+
+class TestDegraded:
+
+    @pytest.mark.asyncio
+    async def test_slow_ontology_times_out_to_fallback(self, lookup, monkeypatch):
+        monkeypatch.setattr(settings, "ONTOLOGY_LOOKUP_TIMEOUT_SECONDS", 0.05)
+        slow_neo4j(monkeypatch, 0.5)
+
+        started = time.perf_counter()
+        parsed = await SpecParser().parse("Curcumin 95% USP powder")
+
+        assert time.perf_counter() - started < 0.4
+        assert parsed == {"ingredient": "Curcumin", "assay_min": 95.0, "grade": "USP", "form": "Powder"}
+        assert lookup.metrics()["timeouts"] == 1
+
+    @pytest.mark.asyncio
+    async def test_ontology_error_falls_back(self, lookup, monkeypatch):
+        def _down(text):
+            raise ConnectionError("Neo4j unavailable")
+
+        monkeypatch.setattr(neo4j_driver, "normalize_ingredient_name", _down)
+        parsed = await SpecParser().parse("Turmeric 95% USP")
+
+        assert parsed["ingredient"] == "Turmeric"
+        assert "ontology_node_id" not in parsed
+        assert lookup.metrics()["errors"] == 1
+
+    @pytest.mark.asyncio
+    async def test_degraded_parse_is_not_cached(self, lookup, no_parse_cache, monkeypatch):
+        monkeypatch.setattr(settings, "PARSE_CACHE_ENABLED", True)
+        writes = []
+
+        async def _miss(*args, **kwargs):
+            return None
+
+        async def _write(key, parsed, expire=None):
+            writes.append(key)
+
+        monkeypatch.setattr(spec_parser.parse_cache, "get", _miss)
+        monkeypatch.setattr(spec_parser.parse_cache, "put", _write)
+        monkeypatch.setattr(settings, "ONTOLOGY_LOOKUP_TIMEOUT_SECONDS", 0.05)
+        slow_neo4j(monkeypatch, 0.5)
+
+        await SpecParser().parse("Curcumin 95% USP")
+
+        assert writes == []
+
+    @pytest.mark.asyncio
+    async def test_batch_lookup_timeout_falls_back(self, lookup, monkeypatch):
+        monkeypatch.setattr(settings, "ONTOLOGY_BATCH_LOOKUP_TIMEOUT_SECONDS", 0.05)
+
+        def _slow_many(texts):
+            time.sleep(0.5)
+            return {}
+
+        monkeypatch.setattr(neo4j_driver, "normalize_ingredient_names", _slow_many)
+        results = await SpecParser().parse_many(["Curcumin 95% USP", "Turmeric powder"])
+
+        assert [r["ingredient"] for r in results] == ["Curcumin", "Turmeric"]
+        assert lookup.metrics()["timeouts"] == 1
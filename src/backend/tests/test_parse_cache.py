@@ -0,0 +1,119 @@
+"""
+Tests for the two-tier spec parse cache
+"""
+import pytest
+
+from app.core.config import settings
+from app.core.neo4j_client import neo4j_driver
+from app.ml import parse_cache as parse_cache_module, spec_parser
+from app.ml.parse_cache import ParseCache
+from app.ml.spec_parser import SpecParser
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Redis tier in a dict"""
+    store = {}
+
+    async def _get(key):
+        return store.get(key)
+
+    async def _set(key, parsed, expire=None):
+        store[key] = parsed
+
+    redis_client = parse_cache_module.redis_client
+    monkeypatch.setattr(redis_client, "get_parsed_spec", _get)
+    monkeypatch.setattr(redis_client, "cache_parsed_spec", _set)
+    return store
+
+
+@pytest.fixture
+def cached_parser(no_parse_cache, fake_redis, monkeypatch):
+    """SpecParser with the parse cache on and Neo4j lookups counted"""
+    monkeypatch.setattr(settings, "PARSE_CACHE_ENABLED", True)
+    lookups = []
+
+    def _normalize(text):
+        lookups.append(text)
+        return None
+
+    monkeypatch.setattr(neo4j_driver, "normalize_ingredient_name", _normalize)
+    return SpecParser(), lookups
+
+
+class TestParseCache:
+
+    @pytest.mark.asyncio
+    async def test_whitespace_variants_hit_local_tier(self, cached_parser, no_parse_cache):
+        parser, lookups = cached_parser
+
+        first = await parser.parse("Curcumin 95% USP powder, GMP")
+        second = await parser.parse("  curcumin   95%  USP\tpowder, GMP ")
+
+        assert first == second
+        assert lookups == ["curcumin"]
+        metrics = no_parse_cache.metrics()
+        assert (metrics["misses"], metrics["local_hits"], metrics["redis_hits"]) == (1, 1, 0)
+        assert metrics["hit_rate"] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_redis_tier_shared_across_processes(self, cached_parser, fake_redis, monkeypatch):
+        parser, lookups = cached_parser
+        await parser.parse("Curcumin 95% USP powder")
+
+        # Another API worker: empty local tier, same Redis
+        other = ParseCache()
+        monkeypatch.setattr(spec_parser, "parse_cache", other)
+        parsed = await parser.parse("Curcumin 95% USP powder")
+
+        assert parsed["assay_min"] == 95.0
+        assert len(lookups) == 1
+        assert other.metrics()["redis_hits"] == 1
+        assert other.metrics()["local_entries"] == 1
+
+    @pytest.mark.asyncio
+    async def test_hits_are_copies(self, cached_parser):
+        parser, _ = cached_parser
+        parsed = await parser.parse("Curcumin powder, GMP, Halal")
+        parsed["certifications_required"].append("Kosher")
+
+        assert (await parser.parse("Curcumin powder, GMP, Halal"))["certifications_required"] == ["GMP", "Halal"]
+
+    @pytest.mark.asyncio
+    async def test_version_change_invalidates(self, cached_parser, no_parse_cache, monkeypatch):
+        parser, lookups = cached_parser
+        await parser.parse("Curcumin 95% USP powder")
+
+        monkeypatch.setattr(spec_parser, "PARSER_VERSION", spec_parser.PARSER_VERSION + 1)
+        await parser.parse("Curcumin 95% USP powder")
+
+        assert len(lookups) == 2
+        assert no_parse_cache.metrics()["local_entries"] == 1
+
+    @pytest.mark.asyncio
+    async def test_redis_failure_is_a_miss(self, cached_parser, no_parse_cache, monkeypatch):
+        parser, _ = cached_parser
+
+        async def _down(*args, **kwargs):
+            raise ConnectionError("Connection refused")
+
+        monkeypatch.setattr(parse_cache_module.redis_client, "get_parsed_spec", _down)
+        monkeypatch.setattr(parse_cache_module.redis_client, "cache_parsed_spec", _down)
+
+        parsed = await parser.parse("Curcumin 95% USP powder")
+
+        assert parsed["grade"] == "USP"
+        assert no_parse_cache.metrics()["redis_errors"] == 2
+
+    @pytest.mark.asyncio
+    async def test_local_tier_is_bounded_and_expires(self, fake_redis, monkeypatch):
+        monkeypatch.setattr(settings, "PARSE_CACHE_LOCAL_SIZE", 2)
+        cache = ParseCache()
+        for text in ("a", "b", "c"):
+            await cache.put(text, "v1", {"ingredient": text})
+        assert cache.metrics()["local_entries"] == 2
+
+        monkeypatch.setattr(settings, "PARSE_CACHE_LOCAL_SECONDS", -1)
+        await cache.put("d", "v1", {"ingredient": "d"})
+        fake_redis.clear()
+        assert await cache.get("d", "v1") is None
@@ -0,0 +1,94 @@
+"""
+Tests for batch spec parsing
+"""
+import pytest
+
+from app.core.config import settings
+from app.core.neo4j_client import neo4j_driver
+from app.ml import parse_cache as parse_cache_module
+from app.ml.spec_parser import SpecParser
+from tests.test_spec_extractor import GOLDEN
+
+
+@pytest.fixture
+def batched_ontology(monkeypatch):
+    """Batched ontology lookups answered from the corpus' map; calls recorded"""
+    ontology = GOLDEN["ontology"]
+    calls = []
+
+    def _normalize_many(texts):
+        calls.append(list(texts))
+        return {
+            text: {
+                "ingredient": {"name": text.title(), "botanical_name": None, "cas_number": None, "id": ontology[text]},
+                "confidence": 0.95,
+            } if text in ontology else None
+            for text in texts
+        }
+
+    def _single(text):
+        raise AssertionError("per-text Neo4j lookup in parse_many")
+
+    monkeypatch.setattr(neo4j_driver, "normalize_ingredient_names", _normalize_many)
+    monkeypatch.setattr(neo4j_driver, "normalize_ingredient_name", _single)
+    return calls
+
+
+class TestParseMany:
+
+    @pytest.mark.asyncio
+    async def test_matches_parse_on_golden_corpus(self, batched_ontology):
+        texts = [case["text"] for case in GOLDEN["cases"]]
+
+        results = await SpecParser().parse_many(texts)
+
+        assert results == [case["expected"] for case in GOLDEN["cases"]]
+        # Every distinct ingredient term of the whole batch in one query
+        assert len(batched_ontology) == 1
+        assert len(batched_ontology[0]) == len(set(batched_ontology[0]))
+
+    @pytest.mark.asyncio
+    async def test_duplicates_parsed_once_in_input_order(self, batched_ontology):
+        texts = ["Turmeric 95% USP", "WPI 90% powder", "  turmeric 95%   usp", "Turmeric 95% USP"]
+
+        results = await SpecParser().parse_many(texts)
+
+        assert [r["ontology_node_id"] for r in results] == ["ING-CURC-001", "ING-WHEY-001", "ING-CURC-001", "ING-CURC-001"]
+        assert batched_ontology == [["turmeric", "wpi"]]
+        results[0]["assay_min"] = 10.0
+        assert results[2]["assay_min"] == 95.0
+
+    @pytest.mark.asyncio
+    async def test_no_ingredient_terms_skips_ontology(self, batched_ontology):
+        results = await SpecParser().parse_many(["Rhodiola 3% rosavins, GMP"])
+
+        assert results == [{"ingredient": "Rhodiola", "certifications_required": ["GMP"]}]
+        assert batched_ontology == []
+
+    @pytest.mark.asyncio
+    async def test_cached_batch_is_one_round_trip(self, batched_ontology, no_parse_cache, monkeypatch):
+        monkeypatch.setattr(settings, "PARSE_CACHE_ENABLED", True)
+        store, round_trips = {}, []
+
+        async def _get_many(keys):
+            round_trips.append("mget")
+            return {key: store[key] for key in keys if key in store}
+
+        async def _set_many(entries, expire=None):
+            round_trips.append("pipeline")
+            store.update(entries)
+
+        monkeypatch.setattr(parse_cache_module.redis_client, "get_parsed_specs", _get_many)
+        monkeypatch.setattr(parse_cache_module.redis_client, "cache_parsed_specs", _set_many)
+        texts = ["Turmeric 95% USP", "WPI 90% powder", "fish oil 30%"]
+        parser = SpecParser()
+
+        first = await parser.parse_many(texts)
+        no_parse_cache.clear()  # another API worker: only Redis is shared
+        second = await parser.parse_many(texts)
+
+        assert first == second
+        assert round_trips == ["mget", "pipeline", "mget"]
+        assert len(batched_ontology) == 1
+        assert no_parse_cache.metrics()["redis_hits"] == 3
+
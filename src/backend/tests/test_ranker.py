@@ -0,0 +1,94 @@
+"""
+Tests for pluggable match rankers
+"""
+import pytest
+import numpy as np
+from types import SimpleNamespace
+
+from app.core.config import settings
+from app.ml.batch_scorer import CandidateBatch, batch_scorer
+from app.ml.ranker import FEATURE_NAMES, Ranker, WeightedRanker, get_ranker
+from tests.test_batch_scorer import RFQ_CASES, build_catalog
+
+
+def training_data(n: int = 2000, seed: int = 3):
+    """Feature matrix labelled by the weighted score crossing the threshold"""
+    rng = np.random.default_rng(seed)
+    features = rng.random((n, len(FEATURE_NAMES)))
+    labels = (WeightedRanker().predict(features) >= 0.6).astype(np.float64)
+    return features, labels
+
+
+def train_xgboost(path):
+    xgboost = pytest.importorskip("xgboost")
+    features, labels = training_data()
+    booster = xgboost.train(
+        {"objective": "binary:logistic", "max_depth": 3},
+        xgboost.DMatrix(features, label=labels), num_boost_round=20
+    )
+    booster.save_model(str(path / "model.json"))
+
+
+def train_lightgbm(path):
+    lightgbm = pytest.importorskip("lightgbm")
+    features, labels = training_data()
+    booster = lightgbm.train(
+        {"objective": "binary", "num_leaves": 8, "verbose": -1},
+        lightgbm.Dataset(features, label=labels), num_boost_round=20
+    )
+    booster.save_model(str(path / "model.txt"))
+
+
+@pytest.fixture
+def configure_ranker(monkeypatch):
+    def _configure(kind, model_path="models/seller_matcher"):
+        monkeypatch.setattr(settings, "MATCHER_RANKER", kind)
+        monkeypatch.setattr(settings, "MATCHER_MODEL_PATH", str(model_path))
+        return get_ranker()
+    yield _configure
+    monkeypatch.undo()
+    get_ranker()
+
+
+class TestWeightedRanker:
+    """Default ranker must reproduce the weighted sum exactly"""
+
+    def test_matches_weighted_sum(self):
+        features, _ = training_data()
+        columns = [features[:, i] for i in range(len(FEATURE_NAMES))]
+
+        assert np.array_equal(WeightedRanker().predict(features), batch_scorer._weighted(*columns))
+
+    def test_missing_model_falls_back(self, configure_ranker, tmp_path):
+        assert isinstance(configure_ranker("xgboost", tmp_path), WeightedRanker)
+
+    def test_base_ranker_is_abstract(self):
+        with pytest.raises(TypeError):
+            Ranker()
+
+
+class TestLearnedRankers:
+    """Learned models are loaded once and score a batch in one predict call"""
+
+    @pytest.mark.parametrize("kind,train", [("xgboost", train_xgboost), ("lightgbm", train_lightgbm)])
+    def test_single_predict_per_batch(self, configure_ranker, tmp_path, kind, train):
+        train(tmp_path)
+        ranker = configure_ranker(kind, tmp_path)
+        assert ranker.name == kind
+        assert get_ranker() is ranker
+
+        calls = []
+        predict = ranker.predict
+        ranker.predict = lambda features: calls.append(len(features)) or predict(features)
+
+        skus, sellers = build_catalog(n_skus=500, n_sellers=40)
+        parsed_specs, target_price = RFQ_CASES[0]
+        rfq = SimpleNamespace(target_price_usd=target_price)
+        batch = CandidateBatch.from_skus(skus, sellers)
+
+        scores = batch_scorer.score(rfq, parsed_specs, batch)
+        top, _ = batch_scorer.rank_top_k(rfq, parsed_specs, batch, 10)
+
+        assert calls == [500, 500]
+        assert ((scores["match_score"] >= 0) & (scores["match_score"] <= 1)).all()
+        assert list(top) == list(batch_scorer.rank(scores)[:10])
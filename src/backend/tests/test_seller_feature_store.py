@@ -0,0 +1,175 @@
+"""
+Tests for the seller feature store
+"""
+import pytest
+from datetime import datetime
+from decimal import Decimal
+
+from app.core.config import settings
+from app.ml.batch_scorer import CandidateBatch
+from app.ml.seller_features import CertificationVocabulary, SellerFeatures
+from app.services.matching_service import MatchingService
+from app.services.seller_feature_store import SellerFeatureStore
+from tests.test_matching_service import make_catalog, make_rfq
+
+
+class TestSellerFeatures:
+    """Features stand in for Company rows without changing scores"""
+
+    def test_cache_round_trip(self):
+        _, sellers = make_catalog(1, 1)
+        sellers[0].certifications = ["GMP", "Halal"]
+        features = SellerFeatures.from_company(sellers[0])
+
+        assert features.rating == 4.6 and features.on_time_rate == 96.0
+        assert features.certifications == {"GMP", "Halal"}
+        assert SellerFeatures.from_cache(features.to_cache()) == features
+
+    def test_vocabulary_masks(self):
+        vocabulary = CertificationVocabulary()
+        mask = vocabulary.mask(["GMP", "Kosher"])
+
+        assert vocabulary.mask(["Kosher", "GMP"]) == mask
+        assert vocabulary.mask(["Organic"]) & mask == 0
+        assert vocabulary.names(mask) == {"GMP", "Kosher"}
+        assert len(vocabulary) == 3
+
+    def test_vocabulary_memos_are_bounded(self, monkeypatch):
+        from concurrent.futures import ThreadPoolExecutor
+        from app.ml import seller_features
+
+        monkeypatch.setattr(seller_features, "VOCABULARY_MEMO_SIZE", 8)
+        vocabulary = CertificationVocabulary()
+        name_sets = [[f"CERT-{i}", f"CERT-{i + 1}"] for i in range(64)]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            masks = list(pool.map(vocabulary.mask, name_sets))
+        for mask in masks:
+            vocabulary.names(mask)
+
+        assert len(vocabulary) == 65
+        assert vocabulary._mask.cache_info().currsize == 8
+        assert vocabulary._names.cache_info().currsize == 8
+        # Evicted sets recompute to the same mask
+        assert [vocabulary.mask(names) for names in name_sets] == masks
+        assert [vocabulary.names(mask) for mask in masks] == [set(names) for names in name_sets]
+
+    def test_batch_from_features_equals_batch_from_companies(self):
+        skus, sellers = make_catalog(30, 4)
+        sellers[1].certifications = ["GMP", "Organic"]
+        sellers[2].on_time_delivery_rate = None
+        by_id = {seller.id: seller for seller in sellers}
+        features = {seller.id: SellerFeatures.from_company(seller) for seller in sellers}
+
+        from_companies = CandidateBatch.from_skus(skus, by_id)
+        from_features = CandidateBatch.from_skus(skus, features)
+
+        assert from_companies.rating.tolist() == from_features.rating.tolist()
+        assert from_companies.on_time_rate.tolist() == from_features.on_time_rate.tolist()
+        assert (from_companies.cert_masks == from_features.cert_masks).all()
+
+
+class TestFeatureStoreTiers:
+    """In-process, then Redis, then one PostgreSQL query for the rest"""
+
+    @pytest.mark.asyncio
+    async def test_database_read_once(self, recording_session, no_redis):
+        _, sellers = make_catalog(1, 3)
+        store = SellerFeatureStore()
+        db = recording_session(companies=sellers)
+
+        first = await store.get_many([seller.id for seller in sellers], db)
+        second = await store.get_many([seller.id for seller in sellers], db)
+
+        assert first == second and len(first) == 3
+        assert len(db.statements) == 1
+
+    @pytest.mark.asyncio
+    async def test_redis_hits_skip_database(self, recording_session, no_redis, monkeypatch):
+        _, sellers = make_catalog(1, 3)
+        cached = {str(sellers[0].id): SellerFeatures.from_company(sellers[0]).to_cache()}
+        written = {}
+
+        async def _get(seller_ids):
+            return {seller_id: cached[seller_id] for seller_id in seller_ids if seller_id in cached}
+
+        async def _set(scores, expire=None):
+            written.update(scores)
+
+        monkeypatch.setattr(no_redis, "get_seller_scores", _get)
+        monkeypatch.setattr(no_redis, "cache_seller_scores", _set)
+
+        store = SellerFeatureStore()
+        db = recording_session(companies=sellers[1:])
+        features = await store.get_many([seller.id for seller in sellers], db)
+
+        assert set(features) == {seller.id for seller in sellers}
+        assert len(db.statements) == 1
+        assert set(written) == {str(seller.id) for seller in sellers[1:]}
+
+    @pytest.mark.asyncio
+    async def test_redis_down_falls_through(self, recording_session, no_redis, monkeypatch):
+        _, sellers = make_catalog(1, 2)
+
+        async def _down(*args, **kwargs):
+            raise ConnectionError("Connection refused")
+
+        monkeypatch.setattr(no_redis, "get_seller_scores", _down)
+        monkeypatch.setattr(no_redis, "cache_seller_scores", _down)
+
+        features = await SellerFeatureStore().get_many(
+            [seller.id for seller in sellers], recording_session(companies=sellers)
+        )
+        assert len(features) == 2
+
+    @pytest.mark.asyncio
+    async def test_refresh_companies_picks_up_changes(self, recording_session, no_redis):
+        _, sellers = make_catalog(1, 2)
+        store = SellerFeatureStore()
+        db = recording_session(companies=sellers)
+        await store.get_many([seller.id for seller in sellers], db)
+
+        sellers[0].rating = Decimal("3.1")
+        await store.refresh_companies([sellers[0].id], db)
+
+        features = await store.get_many([sellers[0].id], db)
+        assert features[sellers[0].id].rating == 3.1
+
+    @pytest.mark.asyncio
+    async def test_refresh_polls_companies_only(self, recording_session, no_redis):
+        db = recording_session()
+
+        await SellerFeatureStore().refresh(db)
+
+        # Features are read from company columns, so only their changes are polled
+        assert [statement.get_final_froms()[0].name for statement in db.statements] == ["companies"]
+
+    def test_rebuild_is_nightly(self, monkeypatch):
+        monkeypatch.setattr(settings, "SELLER_FEATURES_REBUILD_HOUR", 3)
+        store = SellerFeatureStore()
+        assert store.next_rebuild_at() == datetime.min
+
+        store._rebuilt_at = datetime(2030, 1, 1, 1, 30)
+        assert store.next_rebuild_at() == datetime(2030, 1, 1, 3, 0)
+        store._rebuilt_at = datetime(2030, 1, 1, 3, 0, 5)
+        assert store.next_rebuild_at() == datetime(2030, 1, 2, 3, 0)
+
+
+class TestMatchingReadsStore:
+    """Matching reads seller features from the store, not Company rows"""
+
+    @pytest.mark.asyncio
+    async def test_warm_store_skips_seller_query(self, recording_session, no_redis):
+        rfq = make_rfq()
+        skus, sellers = make_catalog(20, 4)
+        service = MatchingService()
+
+        cold_db = recording_session(rfqs=[rfq], skus=skus, companies=sellers)
+        cold = await service.find_and_rank_sellers(rfq.id, cold_db)
+
+        warm_db = recording_session(rfqs=[rfq], skus=skus, companies=sellers)
+        warm = await service.find_and_rank_sellers(rfq.id, warm_db)
+
+        assert [(m["sku_id"], m["match_score"]) for m in warm] == \
+            [(m["sku_id"], m["match_score"]) for m in cold]
+        assert len(warm_db.statements) == len(cold_db.statements) - 1
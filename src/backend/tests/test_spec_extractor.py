@@ -0,0 +1,74 @@
+"""
+Tests for the single-pass spec extractor
+"""
+import json
+from pathlib import Path
+
+import pytest
+
+from app.core.neo4j_client import neo4j_driver
+from app.ml.spec_extractor import SpecExtractor
+from app.ml.spec_parser import SpecParser
+
+
+GOLDEN = json.loads((Path(__file__).parent / "data" / "spec_parser_golden.json").read_text())
+
+
+@pytest.fixture
+def golden_ontology(monkeypatch):
+    """Ontology lookups answered from the corpus' ingredient map"""
+    ontology = GOLDEN["ontology"]
+
+    def _normalize(text):
+        if text not in ontology:
+            return None
+        return {
+            "ingredient": {"name": text.title(), "botanical_name": None, "cas_number": None, "id": ontology[text]},
+            "confidence": 0.95,
+        }
+
+    monkeypatch.setattr(neo4j_driver, "normalize_ingredient_name", _normalize)
+
+
+class TestGoldenCorpus:
+    """Output is identical to the per-field regex parser it replaced"""
+
+    @pytest.mark.asyncio
+    async def test_parse_matches_golden_output(self, golden_ontology):
+        parser = SpecParser()
+        for case in GOLDEN["cases"]:
+            assert await parser.parse(case["text"]) == case["expected"], case["text"]
+
+
+class TestSpecExtractor:
+
+    def test_overlapping_certifications_are_all_found(self):
+        fields = SpecExtractor().extract("usda organic and eu organic, non-gmo")
+        assert fields["certifications_required"] == ["Organic", "USDA Organic", "EU Organic", "Non-GMO"]
+
+    def test_each_rule_keeps_its_leftmost_hit(self):
+        fields = SpecExtractor().extract("90% powder, 95% extract, 200 mesh, 80 mesh")
+        assert fields["assay_min"] == 90.0
+        assert fields["mesh_size"] == "200 mesh"
+
+    def test_first_rule_wins_over_first_position(self):
+        # Powder is listed before Extract, so it wins even though it appears later
+        assert SpecExtractor().extract("extract or powder")["form"] == "Powder"
+
+    def test_assay_outside_range_falls_through_to_next_rule(self):
+        fields = SpecExtractor().extract("10% moisture, assay: 95")
+        assert fields["assay_min"] == 95.0
+
+    def test_ingredient_terms_in_rule_order(self):
+        fields = SpecExtractor().extract("fish oil with turmeric")
+        assert fields["ingredient_terms"] == ["turmeric", "fish oil"]
+        assert fields["form"] == "Oil"
+
+    def test_case_insensitive(self):
+        fields = SpecExtractor().extract("Curcumin 95% USP Powder, GMP, FOB")
+        assert fields["ingredient_terms"] == ["Curcumin"]
+        assert (fields["grade"], fields["form"], fields["incoterm"]) == ("USP", "Powder", "FOB")
+        assert fields["certifications_required"] == ["GMP"]
+
+    def test_empty_text(self):
+        assert SpecExtractor().extract("") == {"ingredient_terms": [], "certifications_required": []}
@@ -0,0 +1,169 @@
+"""
+Tests for the ontology synonym matcher
+"""
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.core.neo4j_client import neo4j_driver
+from app.ml import spec_parser, synonym_matcher as synonym_matcher_module
+from app.ml.spec_parser import SpecParser
+from app.ml.synonym_matcher import SynonymMatcher
+
+
+CURCUMIN = {"id": "ING-CURC-001", "name": "Curcumin", "botanical_name": "Curcuma longa", "cas_number": "458-37-7"}
+VITAMIN_C = {"id": "ING-VITC-001", "name": "Vitamin C", "botanical_name": None, "cas_number": "50-81-7"}
+OMEGA_3 = {"id": "ING-OMEGA3-001", "name": "Omega-3 Fatty Acids"}
+
+
+def synonym(ingredient, normalized, confidence, text=None):
+    return {"i": ingredient, "normalized": normalized, "matched_synonym": text or normalized, "confidence": confidence}
+
+
+class FakeOntology:
+    """Neo4j ontology reads served from lists"""
+
+    def __init__(self):
+        self.version = 1
+        self.ingredients = [CURCUMIN, VITAMIN_C, OMEGA_3]
+        self.synonyms = [
+            synonym(CURCUMIN, "turmeric", 0.95),
+            synonym(CURCUMIN, "turmeric extract", 0.98, "Turmeric Extract 95%"),
+            synonym(VITAMIN_C, "l ascorbic acid", 1.0, "L-Ascorbic Acid"),
+            synonym(OMEGA_3, "fish oil omega 3", 0.98, "Fish Oil Omega-3"),
+            synonym(OMEGA_3, "fish oil", 0.9),
+        ]
+        self.loads = 0
+
+    def get_ontology_version(self):
+        return self.version
+
+    def get_all_ingredients(self):
+        self.loads += 1
+        return list(self.ingredients)
+
+    def get_synonym_mappings(self, min_confidence=0.7):
+        return [s for s in self.synonyms if s["confidence"] >= min_confidence]
+
+
+@pytest.fixture
+def ontology(monkeypatch):
+    fake = FakeOntology()
+    for name in ("get_ontology_version", "get_all_ingredients", "get_synonym_mappings"):
+        monkeypatch.setattr(synonym_matcher_module.neo4j_driver, name, getattr(fake, name))
+    return fake
+
+
+@pytest.fixture
+def matcher(ontology):
+    matcher = SynonymMatcher()
+    matcher.load()
+    return matcher
+
+
+class TestFind:
+
+    def test_exact_name(self, matcher):
+        result = matcher.find("need curcumin 95% usp")
+        assert result["ingredient"]["id"] == "ING-CURC-001"
+        assert (result["confidence"], result["match_type"]) == (1.0, "exact")
+
+    def test_longest_phrase_wins(self, matcher):
+        assert matcher.find("turmeric extract 95%")["matched_text"] == "Turmeric Extract 95%"
+        assert matcher.find("fish oil omega-3, 1000kg")["matched_text"] == "Fish Oil Omega-3"
+        assert matcher.find("fish oil softgels")["matched_text"] == "fish oil"
+
+    def test_punctuation_is_normalized_like_synonyms(self, matcher):
+        result = matcher.find("L-Ascorbic Acid, food grade")
+        assert result["ingredient"]["name"] == "Vitamin C"
+
+    def test_leftmost_mention_wins(self, matcher):
+        assert matcher.find("vitamin c blended with turmeric")["ingredient"]["id"] == "ING-VITC-001"
+
+    def test_partial_phrase_does_not_match(self, matcher):
+        # "vitamin" alone is a prefix of "vitamin c", not a phrase
+        assert matcher.find("vitamin e 1000 iu") is None
+
+    def test_no_mention(self, matcher):
+        assert matcher.find("") is None
+        assert matcher.find("unknown botanical 10:1") is None
+
+    def test_most_confident_entry_keeps_shared_phrase(self, ontology):
+        ontology.synonyms.append(synonym(OMEGA_3, "curcumin", 0.8))
+        matcher = SynonymMatcher()
+        matcher.load()
+        assert matcher.find("curcumin")["ingredient"]["id"] == "ING-CURC-001"
+
+
+class TestReload:
+
+    @pytest.mark.asyncio
+    async def test_reloads_when_version_changes(self, ontology, monkeypatch):
+        monkeypatch.setattr(settings, "ONTOLOGY_REFRESH_SECONDS", 0.01)
+        matcher = SynonymMatcher()
+        await matcher.start()
+        try:
+            assert matcher.find("ashwagandha root") is None
+
+            ashwagandha = {"id": "ING-ASHW-001", "name": "Ashwagandha"}
+            ontology.ingredients.append(ashwagandha)
+            ontology.version = 2
+            for _ in range(100):
+                if matcher.version == 2:
+                    break
+                await asyncio.sleep(0.01)
+
+            assert matcher.version == 2
+            assert matcher.find("ashwagandha root")["ingredient"]["id"] == "ING-ASHW-001"
+        finally:
+            await matcher.stop()
+
+    @pytest.mark.asyncio
+    async def test_unchanged_version_is_not_reloaded(self, ontology, monkeypatch):
+        monkeypatch.setattr(settings, "ONTOLOGY_REFRESH_SECONDS", 0.01)
+        matcher = SynonymMatcher()
+        await matcher.start()
+        await asyncio.sleep(0.05)
+        await matcher.stop()
+        assert ontology.loads == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_reload_keeps_snapshot(self, ontology, monkeypatch):
+        monkeypatch.setattr(settings, "ONTOLOGY_REFRESH_SECONDS", 0.01)
+        matcher = SynonymMatcher()
+        await matcher.start()
+
+        def _down():
+            raise ConnectionError("Neo4j unavailable")
+
+        monkeypatch.setattr(synonym_matcher_module.neo4j_driver, "get_ontology_version", _down)
+        await asyncio.sleep(0.05)
+        await matcher.stop()
+
+        assert matcher.metrics()["reload_failures"] > 0
+        assert matcher.find("curcumin")["ingredient"]["id"] == "ING-CURC-001"
+
+
+class TestParserIntegration:
+
+    @pytest.mark.asyncio
+    async def test_parser_uses_matcher_without_network(self, matcher, monkeypatch):
+        def _no_network(text):
+            raise AssertionError("Neo4j lookup during parse")
+
+        monkeypatch.setattr(spec_parser, "synonym_matcher", matcher)
+        monkeypatch.setattr(neo4j_driver, "normalize_ingredient_name", _no_network)
+
+        parsed = await SpecParser().parse("Turmeric Extract 95% USP powder, GMP")
+
+        assert parsed["ingredient"] == "Curcumin"
+        assert parsed["ontology_node_id"] == "ING-CURC-001"
+        assert parsed["ontology_confidence"] == 0.98
+        assert parsed["assay_min"] == 95.0
+
+    @pytest.mark.asyncio
+    async def test_unknown_ingredient_falls_back_to_first_word(self, matcher, monkeypatch):
+        monkeypatch.setattr(spec_parser, "synonym_matcher", matcher)
+        parsed = await SpecParser().parse("Rhodiola 3% rosavins")
+        assert parsed["ingredient"] == "Rhodiola"